@@ -0,0 +1,133 @@
+# backend/analytics.py
+# Embedded columnar engine for the aggregate reads: DuckDB over the Parquet
+# copy the ETL writes (etl/parquet_sink.py). With ANALYTICS_ENGINE=duckdb the
+# throughput series and KPI summary (API and reports) are computed here
+# instead of by the stored procedures; results come back as Arrow tables with
+# the procs' column names, so callers read them the same way. Day partitions
+# outside the window are never opened, and Parquet row-group statistics on
+# (MachineId, Ts) skip the rest. Machines (names, lines) still come from SQL.
+# Requires duckdb and pyarrow.
+import os, threading
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+from sqlalchemy import text
+from db import engine
+
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sql").lower()
+PARQUET_DIR = os.getenv("PARQUET_DIR")
+# DuckDB worker threads per query (0: DuckDB's default, one per core)
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", "0"))
+
+# bucket -> DuckDB expression over Ts (week: ISO weeks, Monday, as sp_ThroughputSeries)
+BUCKET_EXPR = {
+    "1m": "time_bucket(INTERVAL 1 MINUTE, Ts)",
+    "5m": "time_bucket(INTERVAL 5 MINUTE, Ts)",
+    "15m": "time_bucket(INTERVAL 15 MINUTE, Ts)",
+    "hour": "date_trunc('hour', Ts)",
+    "day": "date_trunc('day', Ts)",
+    "week": "date_trunc('week', Ts)",
+}
+
+_conn = None
+_lock = threading.Lock()
+
+def enabled() -> bool:
+    return ANALYTICS_ENGINE == "duckdb"
+
+def connection():
+    """Per-call cursor on the shared in-process database (cursors are safe to use from one thread each)."""
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                try:
+                    import duckdb
+                except ImportError:
+                    raise RuntimeError("ANALYTICS_ENGINE=duckdb requires duckdb and pyarrow (pip install duckdb pyarrow)")
+                if not PARQUET_DIR:
+                    raise RuntimeError("ANALYTICS_ENGINE=duckdb requires PARQUET_DIR")
+                conn = duckdb.connect()
+                if DUCKDB_THREADS:
+                    conn.execute(f"SET threads = {DUCKDB_THREADS}")
+                _conn = conn
+    return _conn.cursor()
+
+def source(kind: str):
+    """read_parquet(...) over one kind's files, or None when nothing has been written yet."""
+    root = Path(PARQUET_DIR) / kind
+    if not any(root.glob("day=*/machine=*/*.parquet")):
+        return None
+    path = (root / "**" / "*.parquet").as_posix().replace("'", "''")
+    return f"read_parquet('{path}', hive_partitioning = true)"
+
+def utc_naive(dt: datetime) -> datetime:
+    # Parquet timestamps are naive UTC
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+def window_params(from_dt, to_dt):
+    # windows are [from, to], both ends included, as in the procs (BETWEEN / fn_MachineWindow)
+    f, t = utc_naive(from_dt), utc_naive(to_dt)
+    return {"f": f, "t": t, "df": f.date(), "dt": t.date()}
+
+def empty(columns):
+    import pyarrow as pa
+    return pa.table({name: pa.array([], type=typ) for name, typ in columns})
+
+def rows(table):
+    """Iterate an Arrow result as named tuples (r.MachineId, ...), like SQLAlchemy rows."""
+    Row = namedtuple("Row", table.column_names)
+    for batch in table.to_batches():
+        yield from (Row(*values) for values in zip(*(c.to_pylist() for c in batch.columns)))
+
+# --- queries ---
+def throughput_series(from_dt, to_dt, bucket="hour", machine_id=None, machine_ids=None, per_machine=False):
+    """MachineId (NULL unless per_machine), BucketTs, TotalThroughput; same rows as sp_ThroughputSeries."""
+    import pyarrow as pa
+    src = source("telemetry")
+    if src is None:
+        return empty([("MachineId", pa.int32()), ("BucketTs", pa.timestamp("us")), ("TotalThroughput", pa.int64())])
+    filters = ["day BETWEEN $df AND $dt", "Ts >= $f", "Ts <= $t"]
+    params = window_params(from_dt, to_dt)
+    if machine_id is not None:
+        filters.append("MachineId = $m")
+        params["m"] = machine_id
+    if machine_ids:
+        filters.append("list_contains($ms, MachineId)")
+        params["ms"] = list(machine_ids)
+    mid = "MachineId" if per_machine else "CAST(NULL AS INTEGER)"
+    sql = f"""
+        SELECT {mid} AS MachineId, {BUCKET_EXPR[bucket]} AS BucketTs, SUM(Throughput)::BIGINT AS TotalThroughput
+        FROM {src}
+        WHERE {' AND '.join(filters)}
+        GROUP BY ALL ORDER BY 1, 2
+    """
+    return connection().execute(sql, params).fetch_arrow_table()
+
+def kpi_summary(from_dt, to_dt):
+    """MachineId, Name, Line, TotalThroughput, ErrorCount for every machine; same rows as sp_MachineKpiSummary."""
+    import pyarrow as pa
+    params = window_params(from_dt, to_dt)
+    where = "day BETWEEN $df AND $dt AND Ts >= $f AND Ts <= $t"
+    totals, errors = {}, {}
+    cur = connection()
+    src = source("telemetry")
+    if src is not None:
+        res = cur.execute(f"SELECT MachineId, SUM(Throughput)::BIGINT FROM {src} WHERE {where} GROUP BY 1",
+                          params).fetchall()
+        totals = dict(res)
+    src = source("events")
+    if src is not None:
+        res = cur.execute(f"SELECT MachineId, COUNT(*) FROM {src} WHERE {where} AND Type = 'ERROR' GROUP BY 1",
+                          params).fetchall()
+        errors = dict(res)
+
+    with engine.connect() as conn:
+        machines = conn.execute(text("SELECT Id, Name, Line FROM dbo.Machines ORDER BY Id")).all()
+    return pa.table({
+        "MachineId": pa.array([m.Id for m in machines], pa.int32()),
+        "Name": pa.array([m.Name for m in machines], pa.string()),
+        "Line": pa.array([m.Line for m in machines], pa.string()),
+        "TotalThroughput": pa.array([totals.get(m.Id) for m in machines], pa.int64()),
+        "ErrorCount": pa.array([errors.get(m.Id, 0) for m in machines], pa.int64()),
+    })
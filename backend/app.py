@@ -1,21 +1,37 @@
-from flask import Flask, jsonify, request, send_from_directory, abort, send_file
+from flask import Flask, Response, g, jsonify, request, send_from_directory, abort, send_file
 from flask_cors import CORS
 from sqlalchemy import text
 from dateutil.parser import isoparse
-from db import engine
+import analytics
+import sites
+from db import engine, warm_pool
+from cache import CACHE_QUANTUM, make_key, quantize_window, response_cache
+from downsample import METHODS as DOWNSAMPLE_METHODS
+from http_cache import conditional, init_http_cache
+from instrumentation import TimedJSONProvider, process, render as render_metrics, rss_bytes
+from live import LIVE_STREAMS, Subscriber, event_dict, sse_stream, stream_slots, subscription_args
 from logging_config import init_json_logging
-from reports import generate_kpi_report
+from report_jobs import report_jobs
+from reports import FORMATS
+from serialize import Table, response_format, table_response
 from werkzeug.security import check_password_hash
 from sqlalchemy import text
 from auth import make_token, require_auth
-import os
+import contextvars, json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
 
 app = Flask(__name__)
-CORS(app)  # Allow frontend to connect
+app.json = TimedJSONProvider(app)
+CORS(app, expose_headers=["X-Next-Before", "Link", "X-Sites-Failed"])  # Allow frontend to connect
 
 # --- logging ---
 init_json_logging(app)
 
+# --- ETag / 304 and gzip/brotli for the JSON reads (http_cache.py) ---
+init_http_cache(app)
+
 # --- error handlers (JSON) ---
 @app.errorhandler(400)
 def bad_request(e): return jsonify({"error": "bad_request", "detail": str(e)}), 400
@@ -23,9 +39,18 @@ def bad_request(e): return jsonify({"error": "bad_request", "detail": str(e)}),
 @app.errorhandler(404)
 def not_found(e): return jsonify({"error": "not_found"}), 404
 
+@app.errorhandler(406)
+def not_acceptable(e): return jsonify({"error": "not_acceptable", "detail": str(e)}), 406
+
 @app.errorhandler(500)
 def server_error(e): return jsonify({"error": "server_error"}), 500
 
+@app.errorhandler(502)
+def bad_gateway(e): return jsonify({"error": "bad_gateway", "detail": str(e)}), 502
+
+@app.errorhandler(503)
+def overloaded(e): return jsonify({"error": "overloaded", "detail": str(e)}), 503, {"Retry-After": "5"}
+
 # --- simple validators ---
 def parse_int_arg(name, default=None, min_val=None, max_val=None):
     raw = request.args.get(name)
@@ -39,6 +64,18 @@ def parse_int_arg(name, default=None, min_val=None, max_val=None):
     if max_val is not None and val > max_val: abort(400, f"'{name}' > {max_val}")
     return val
 
+def parse_float_arg(name, default=None, min_val=None, max_val=None):
+    raw = request.args.get(name)
+    if raw is None:
+        return default
+    try:
+        val = float(raw)
+    except ValueError:
+        abort(400, f"Query param '{name}' must be a number")
+    if min_val is not None and val < min_val: abort(400, f"'{name}' < {min_val}")
+    if max_val is not None and val > max_val: abort(400, f"'{name}' > {max_val}")
+    return val
+
 def parse_iso_arg(name, default=None):
     raw = request.args.get(name)
     if raw is None:
@@ -49,6 +86,289 @@ def parse_iso_arg(name, default=None):
         abort(400, f"Query param '{name}' must be ISO-8601 datetime (e.g. 2025-08-25T00:00:00Z)")
 
 
+def window_args():
+    to_dt   = parse_iso_arg("to")
+    from_dt = parse_iso_arg("from")
+    if to_dt is None or from_dt is None:
+        # default last 7 days (UTC)
+        to_dt = datetime.now(timezone.utc)
+        from_dt = to_dt - timedelta(days=7)
+    return from_dt, to_dt
+
+# bucket -> width in seconds (week: ISO weeks from the day rollups)
+BUCKETS = {"1m": 60, "5m": 300, "15m": 900, "hour": 3600, "day": 86400, "week": 7 * 86400}
+BUCKET_ALIASES = {"1h": "hour", "1d": "day", "1w": "week"}
+# buckets per series a single request may ask for (before downsampling)
+MAX_BUCKETS = int(os.getenv("THROUGHPUT_MAX_BUCKETS", "100000"))
+
+def bucket_arg():
+    bucket = (request.args.get("bucket") or "hour").lower()
+    bucket = BUCKET_ALIASES.get(bucket, bucket)
+    if bucket not in BUCKETS:
+        abort(400, f"Query param 'bucket' must be one of {', '.join(BUCKETS)}")
+    return bucket
+
+def check_bucket_count(bucket, from_dt, to_dt):
+    if (to_dt - from_dt).total_seconds() / BUCKETS[bucket] > MAX_BUCKETS:
+        abort(400, f"Range too large for bucket '{bucket}' (max {MAX_BUCKETS} buckets); use a coarser bucket")
+
+def machine_ids_arg():
+    # machineIds=1,2,3 or machineIds=all -> one series per machine; None -> single/plant-wide series
+    raw = request.args.get("machineIds")
+    if raw is None:
+        return None
+    if raw.strip().lower() == "all":
+        return ()
+    try:
+        ids = tuple(sorted({int(x) for x in raw.split(",") if x.strip()}))
+    except ValueError:
+        abort(400, "Query param 'machineIds' must be 'all' or a comma-separated list of integers")
+    if not ids or min(ids) < 1:
+        abort(400, "Query param 'machineIds' must list positive integers")
+    return ids
+
+def downsample_args():
+    max_points = parse_int_arg("maxPoints", default=None, min_val=3, max_val=100000)
+    method = (request.args.get("downsample") or "lttb").lower()
+    if method not in DOWNSAMPLE_METHODS:
+        abort(400, f"Query param 'downsample' must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    return max_points, method
+
+def csv_arg(name, upper=False):
+    # comma-separated list of strings, e.g. type=ERROR,MAINT; None when absent
+    raw = request.args.get(name)
+    if raw is None:
+        return None
+    values = sorted({(v.upper() if upper else v) for v in (x.strip() for x in raw.split(",")) if v})
+    if not values:
+        abort(400, f"Query param '{name}' must be a comma-separated list")
+    return values
+
+def machine_id_arg():
+    mid = request.args.get("machineId")
+    machine_id = None
+    if mid is not None:
+        try:
+            machine_id = int(mid)
+            if machine_id < 1:
+                raise ValueError()
+        except Exception:
+            abort(400, "Query param 'machineId' must be a positive integer")
+    return machine_id
+
+# --- reads (shared by the single endpoints and /dashboard; no request context needed) ---
+DASHBOARD_WORKERS = int(os.getenv("DASHBOARD_WORKERS", "4"))
+dashboard_pool = ThreadPoolExecutor(DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+def in_pool(fn, *args):
+    """Submit to dashboard_pool in the caller's context (asgi.py cancels the request's queries through it)."""
+    return dashboard_pool.submit(contextvars.copy_context().run, fn, *args)
+
+def site_db(site):
+    """(engine, response cache) of a site (sites.py); None is the home database."""
+    if site is None or site.home:
+        return engine, response_cache
+    return site.engine, site.cache
+
+def fetch_machines(site=None):
+    db_engine, cache = site_db(site)
+
+    def query():
+        sql = text("SELECT Id, Name, Status, Line FROM dbo.Machines ORDER BY Id;")
+        with db_engine.connect() as conn:
+            rows = conn.execute(sql).all()
+            return [{"id": r.Id, "name": r.Name, "status": r.Status, "line": r.Line} for r in rows]
+    return cache.get_or_compute("machines", query)
+
+def query_latest_logs(top, machine_id=None):
+    """(column names, row tuples) of sp_GetLatestLogs."""
+    with engine.connect() as conn:
+        if machine_id is None:
+            result = conn.execute(text("EXEC dbo.sp_GetLatestLogs @Top=:t, @MachineId=NULL"), {"t": top})
+        else:
+            result = conn.execute(text("EXEC dbo.sp_GetLatestLogs @Top=:t, @MachineId=:m"), {"t": top, "m": machine_id})
+        return list(result.keys()), result.all()
+
+def fetch_latest_logs(top, machine_id=None):
+    _, rows = query_latest_logs(top, machine_id)
+    return [{
+        "id": r.Id,
+        "machineId": r.MachineId,
+        "timestamp": r.Ts.isoformat() if hasattr(r.Ts, "isoformat") else str(r.Ts),
+        "type": r.Type,
+        "code": r.Code,
+        "message": r.Message,
+        "machineName": r.MachineName,
+        "line": r.Line,
+        "severityRank": r.SeverityRank
+    } for r in rows]
+
+def fetch_kpis(from_dt, to_dt, site=None):
+    # snap the window so repeated "last 7 days" requests share one cache entry
+    from_dt, to_dt = quantize_window(from_dt, to_dt, CACHE_QUANTUM)
+    db_engine, cache = site_db(site)
+
+    def query():
+        # the Parquet copy (analytics.py) is the home site's
+        if analytics.enabled() and cache is response_cache:
+            rows = analytics.rows(analytics.kpi_summary(from_dt, to_dt))
+        else:
+            with db_engine.connect() as conn:
+                rows = conn.execute(
+                    text("EXEC dbo.sp_MachineKpiSummary @From=:f, @To=:t"),
+                    {"f": from_dt.isoformat(), "t": to_dt.isoformat()}
+                ).all()
+        return [{
+            "machineId": r.MachineId,
+            "name": r.Name,
+            "line": r.Line,
+            "totalThroughput": int(r.TotalThroughput or 0),
+            "errorCount": int(r.ErrorCount or 0)
+        } for r in rows]
+
+    key = make_key("kpis", f=from_dt.isoformat(), t=to_dt.isoformat())
+    return cache.get_or_compute(key, query)
+
+def fetch_throughput(bucket, from_dt, to_dt, machine_id=None, machine_ids=None, max_points=None, method="lttb",
+                     site=None):
+    # snap to bucket boundaries (at least CACHE_QUANTUM) so concurrent dashboards share one entry
+    from_dt, to_dt = quantize_window(from_dt, to_dt, max(CACHE_QUANTUM, min(BUCKETS[bucket], 86400)))
+    per_machine = machine_ids is not None
+    db_engine, cache = site_db(site)
+
+    def query():
+        # hour/day/week: full buckets from the rollups, partial edges from raw rows; 1m/5m/15m: raw
+        # (db/09_throughput_buckets.sql), or the Parquet copy (analytics.py). All machines' series
+        # come back from one query.
+        if analytics.enabled() and cache is response_cache:
+            rows = analytics.rows(analytics.throughput_series(from_dt, to_dt, bucket, machine_id, machine_ids,
+                                                              per_machine))
+        else:
+            with db_engine.connect() as conn:
+                rows = conn.execute(
+                    text("EXEC dbo.sp_ThroughputSeries @From=:f, @To=:t, @Bucket=:b, @MachineId=:m, "
+                         "@MachineIds=:ms, @PerMachine=:pm"),
+                    {"f": from_dt.isoformat(), "t": to_dt.isoformat(), "b": bucket, "m": machine_id,
+                     "ms": ",".join(map(str, machine_ids)) if machine_ids else None, "pm": int(per_machine)}
+                ).all()
+
+        grouped = {}
+        for r in rows:
+            ts = r.BucketTs
+            grouped.setdefault(r.MachineId, []).append(
+                (ts.timestamp() if hasattr(ts, "timestamp") else 0.0, int(r.TotalThroughput or 0),
+                 ts.isoformat() if hasattr(ts, "isoformat") else str(ts)))
+
+        def points(pts):
+            if max_points:
+                pts = DOWNSAMPLE_METHODS[method](pts, max_points)
+            return [{"ts": iso, "throughput": v} for _, v, iso in pts]
+
+        body = {
+            "bucket": bucket,
+            "from": from_dt.isoformat(),
+            "to": to_dt.isoformat(),
+            "machineId": machine_id,
+        }
+        if max_points:
+            body["downsample"] = {"method": method, "maxPoints": max_points}
+        if per_machine:
+            body["machineIds"] = list(machine_ids) or "all"
+            body["series"] = [{"machineId": mid, "points": points(pts)} for mid, pts in sorted(grouped.items())]
+        else:
+            body["points"] = points(grouped.get(None, []))
+        return body
+
+    key = make_key("throughput", b=bucket, f=from_dt.isoformat(), t=to_dt.isoformat(), m=machine_id,
+                   ms=machine_ids, n=max_points, ds=method)
+    return cache.get_or_compute(key, query)
+
+# --- several sites (sites.py): ?sites=all or ?sites=izmir,berlin on the machine, KPI and throughput reads ---
+def sites_arg():
+    """Selected sites, or None (no sites=): the home database, machine ids unqualified."""
+    raw = request.args.get("sites")
+    if raw is None:
+        return None
+    try:
+        return sites.select(raw)
+    except ValueError as e:
+        abort(400, str(e))
+
+def site_reads(selected, fn):
+    """{site id: fn(site)} over the sites that answered; the others go into X-Sites-Failed."""
+    results, failed = sites.fan_out(selected, fn)
+    if not results:
+        abort(502, "No site answered: " + ", ".join(f"{s} ({reason})" for s, reason in failed.items()))
+    g.sites_failed = failed
+    return results
+
+@app.after_request
+def sites_failed_header(resp):
+    failed = g.get("sites_failed")
+    if failed:
+        resp.headers["X-Sites-Failed"] = ", ".join(f"{s}={reason}" for s, reason in failed.items())
+    return resp
+
+def site_machine_args(selected):
+    """{site id: (machineId, machineIds)} from qualified ids ("izmir:3"), for fetch_throughput per site."""
+    mid, mids = request.args.get("machineId"), request.args.get("machineIds")
+    if mid is not None and mids is not None:
+        abort(400, "With 'sites', pass either 'machineId' or 'machineIds'")
+    selected_ids = {s.id for s in selected}
+    try:
+        if mid is not None:
+            site_id, machine_id = sites.split_id(mid)
+            if site_id not in selected_ids or machine_id < 1:
+                raise ValueError(mid)
+            return {site_id: (machine_id, None)}
+        if mids is None or mids.strip().lower() == "all":
+            return {s.id: (None, None if mids is None else ()) for s in selected}
+        per_site = {}
+        for raw in filter(str.strip, mids.split(",")):
+            site_id, machine_id = sites.split_id(raw)
+            if site_id not in selected_ids or machine_id < 1:
+                raise ValueError(raw)
+            per_site.setdefault(site_id, set()).add(machine_id)
+    except ValueError:
+        abort(400, "With 'sites', machine ids are '<site>:<id>' of a selected site (machineIds: list or 'all')")
+    if not per_site:
+        abort(400, "Query param 'machineIds' must be 'all' or a comma-separated list")
+    return {site_id: (None, tuple(sorted(ids))) for site_id, ids in per_site.items()}
+
+def merge_throughput(results, machine_args, max_points, method):
+    """One /metrics/throughput body from per-site bodies: plant-wide points summed per bucket across
+    sites, per-machine series side by side with qualified ids; downsampled after merging."""
+    first = next(iter(results.values()))
+    mid = request.args.get("machineId")
+
+    def points(pts):
+        pts = [(datetime.fromisoformat(p["ts"]).timestamp(), p["throughput"], p["ts"]) for p in pts]
+        if max_points:
+            pts = DOWNSAMPLE_METHODS[method](pts, max_points)
+        return [{"ts": iso, "throughput": v} for _, v, iso in pts]
+
+    body = {
+        "bucket": first["bucket"],
+        "from": first["from"],
+        "to": first["to"],
+        "machineId": mid.strip().lower() if mid is not None else None,
+        "sites": list(results),
+    }
+    if max_points:
+        body["downsample"] = {"method": method, "maxPoints": max_points}
+    if "series" in first:
+        ids = [sites.qualify(s, m) for s in results for m in machine_args[s][1]]
+        body["machineIds"] = ids or "all"
+        body["series"] = [{"machineId": sites.qualify(site_id, s["machineId"]), "points": points(s["points"])}
+                          for site_id, b in results.items() for s in b["series"]]
+    else:
+        totals = {}
+        for b in results.values():
+            for p in b["points"]:
+                totals[p["ts"]] = totals.get(p["ts"], 0) + p["throughput"]
+        body["points"] = points([{"ts": ts, "throughput": v} for ts, v in sorted(totals.items())])
+    return body
+
 @app.post("/auth/login")
 def login():
     body = request.get_json(silent=True) or {}
@@ -72,152 +392,337 @@ def me():
     u = getattr(g, "user", {})
     return {"user": {"username": u.get("sub"), "role": u.get("role")}}
 
+@app.get("/sites")
+def list_sites():
+    return jsonify([s.to_dict() for s in sites.registry.values()])
+
 @app.get("/machines")
+@conditional()
 def get_machines():
-    sql = text("SELECT Id, Name, Status, Line FROM dbo.Machines ORDER BY Id;")
-    with engine.connect() as conn:
-        rows = conn.execute(sql).all()
-        machines = [{"id": r.Id, "name": r.Name, "status": r.Status, "line": r.Line} for r in rows]
+    selected = sites_arg()
+    fmt = response_format()
+    names = ("id", "name", "status", "line")
+    if selected is None:
+        machines = fetch_machines()
+    else:
+        machines = [{**m, "id": sites.qualify(site_id, m["id"]), "site": site_id}
+                    for site_id, rows in site_reads(selected, fetch_machines).items() for m in rows]
+        names += ("site",)
+    if fmt != "json":
+        return table_response(Table.from_records(machines, names), fmt)
     return jsonify(machines)
 
+# columnar formats (serialize.py): (field, result column, is_timestamp)
+LOG_FIELDS = [("id", "Id", False), ("timestamp", "Ts", True), ("type", "Type", False),
+              ("code", "Code", False), ("message", "Message", False)]
+LATEST_LOG_FIELDS = [("id", "Id", False), ("machineId", "MachineId", False), ("timestamp", "Ts", True),
+                     ("type", "Type", False), ("code", "Code", False), ("message", "Message", False),
+                     ("machineName", "MachineName", False), ("line", "Line", False),
+                     ("severityRank", "SeverityRank", False)]
+
+def log_dict(r):
+    return {
+        "id": r.Id,
+        "timestamp": r.Ts.isoformat() if hasattr(r.Ts, "isoformat") else str(r.Ts),
+        "type": r.Type,
+        "code": r.Code,
+        "message": r.Message
+    }
+
+def parse_before_arg():
+    # keyset cursor "<iso ts>,<id>" as returned in X-Next-Before
+    raw = request.args.get("before")
+    if raw is None:
+        return None
+    try:
+        ts, id_ = raw.rsplit(",", 1)
+        return isoparse(ts), int(id_)
+    except Exception:
+        abort(400, "Query param 'before' must be '<ISO-8601 ts>,<id>' (see X-Next-Before)")
+
 @app.get("/logs/<int:machine_id>")
+@conditional()
 def get_logs(machine_id: int):
-    sql = text("""
-        SELECT Id, Ts, Type, Code, Message
+    # newest first, keyset-paginated on (Ts, Id) so every page is a seek on IX_Events_Machine_Ts
+    stream = request.args.get("stream", "").lower() in ("1", "true")
+    fmt = response_format()
+    if stream and fmt != "json":
+        abort(400, "stream=true returns JSON only; page with 'before' for columnar formats")
+    before = parse_before_arg()
+    # pages only when asked for (limit or before); a bare request returns every row, as it always has
+    paged = not stream and ("limit" in request.args or before is not None)
+    limit = parse_int_arg("limit", default=100 if paged else None, min_val=1, max_val=1000 if paged else None)
+
+    sql = text(f"""
+        SELECT {"TOP (:lim)" if limit else ""} Id, Ts, Type, Code, Message
         FROM dbo.Events
         WHERE MachineId = :mid
-        ORDER BY Ts DESC;
+          {"AND (Ts < :bts OR (Ts = :bts AND Id < :bid))" if before else ""}
+        ORDER BY Ts DESC, Id DESC;
     """)
+    params = {"mid": machine_id, "lim": limit}
+    if before:
+        params["bts"], params["bid"] = before[0].isoformat(), before[1]
+
+    if stream:
+        # full export: rows are written as they come off the cursor, memory stays flat
+        def generate():
+            yield "["
+            with engine.connect() as conn:
+                result = conn.execution_options(yield_per=1000).execute(sql, params)
+                for i, r in enumerate(result):
+                    yield ("," if i else "") + json.dumps(log_dict(r))
+            yield "]"
+        return Response(generate(), mimetype="application/json")
+
     with engine.connect() as conn:
-        rows = conn.execute(sql, {"mid": machine_id}).all()
-        logs = [{
-            "id": r.Id,
-            "timestamp": r.Ts.isoformat() if hasattr(r.Ts, "isoformat") else str(r.Ts),
-            "type": r.Type,
-            "code": r.Code,
-            "message": r.Message
-        } for r in rows]
-    return jsonify(logs)
+        result = conn.execute(sql, params)
+        keys, rows = result.keys(), result.all()
+    if fmt == "json":
+        resp = jsonify([log_dict(r) for r in rows])
+    else:
+        resp = table_response(Table.from_result(keys, rows, LOG_FIELDS), fmt)
+    if paged and len(rows) == limit:
+        set_next_page(resp, rows[-1])
+    return resp
+
+def set_next_page(resp, last):
+    """X-Next-Before / Link headers for the page after `last` (same query, older rows)."""
+    cursor = f"{last.Ts.isoformat() if hasattr(last.Ts, 'isoformat') else last.Ts},{last.Id}"
+    resp.headers["X-Next-Before"] = cursor
+    args = request.args.to_dict(flat=False)
+    args["before"] = [cursor]
+    resp.headers["Link"] = f'<{request.base_url}?{urlencode(args, doseq=True)}>; rel="next"'
 
 # latest logs via stored procedure (optional machine filter)
 @app.get("/sp/latest-logs")
+@conditional()
 def latest_logs():
     top = parse_int_arg("top", default=50, min_val=1, max_val=1000)
     machine_id = parse_int_arg("machineId", default=None, min_val=1)
+    fmt = response_format()
+    if fmt != "json":
+        keys, rows = query_latest_logs(top, machine_id)
+        return table_response(Table.from_result(keys, rows, LATEST_LOG_FIELDS), fmt)
+
+    return jsonify(fetch_latest_logs(top, machine_id))
+
+# filtered search across machines (db/11_event_search.sql), keyset-paginated like /logs
+SEARCH_TEXT_MAX = 200
+
+@app.get("/events/search")
+@conditional(windowed=True)
+def search_events():
+    from_dt, to_dt = window_args()
+    machine_ids = machine_ids_arg() or None   # "all" is no filter
+    lines = csv_arg("line")
+    types = csv_arg("type", upper=True)
+    codes = csv_arg("code")
+    min_severity = parse_int_arg("minSeverity", default=None, min_val=0, max_val=3)
+    q = (request.args.get("q") or "").strip() or None
+    if q and len(q) > SEARCH_TEXT_MAX:
+        abort(400, f"Query param 'q' is limited to {SEARCH_TEXT_MAX} characters")
+    limit = parse_int_arg("limit", default=100, min_val=1, max_val=1000)
+    before = parse_before_arg()
+    fmt = response_format()
 
     with engine.connect() as conn:
-        if machine_id is None:
-            rows = conn.execute(text("EXEC dbo.sp_GetLatestLogs @Top=:t, @MachineId=NULL"), {"t": top}).all()
-        else:
-            rows = conn.execute(text("EXEC dbo.sp_GetLatestLogs @Top=:t, @MachineId=:m"), {"t": top, "m": machine_id}).all()
-
-    data = [{
-        "id": r.Id,
-        "machineId": r.MachineId,
-        "timestamp": r.Ts.isoformat() if hasattr(r.Ts, "isoformat") else str(r.Ts),
-        "type": r.Type,
-        "code": r.Code,
-        "message": r.Message,
-        "machineName": r.MachineName,
-        "line": r.Line,
-        "severityRank": r.SeverityRank
-    } for r in rows]
-    return jsonify(data)
+        result = conn.execute(
+            text("EXEC dbo.sp_SearchEvents @From=:f, @To=:t, @MachineIds=:ms, @Lines=:l, @Types=:ty, @Codes=:c, "
+                 "@MinSeverity=:s, @Text=:q, @Top=:n, @BeforeTs=:bts, @BeforeId=:bid"),
+            {"f": from_dt.isoformat(), "t": to_dt.isoformat(),
+             "ms": ",".join(map(str, machine_ids)) if machine_ids else None,
+             "l": ",".join(lines) if lines else None, "ty": ",".join(types) if types else None,
+             "c": ",".join(codes) if codes else None, "s": min_severity, "q": q, "n": limit,
+             "bts": before[0].isoformat() if before else None, "bid": before[1] if before else None}
+        )
+        keys, rows = result.keys(), result.all()
+    if fmt == "json":
+        resp = jsonify([event_dict(r) for r in rows])
+    else:
+        resp = table_response(Table.from_result(keys, rows, LATEST_LOG_FIELDS), fmt)
+    if len(rows) == limit:
+        set_next_page(resp, rows[-1])
+    return resp
+
+# live feed of new events (server-sent events); replaces polling /sp/latest-logs
+@app.get("/live/events")
+def live_events():
+    # EventSource sends the last id it saw when it reconnects
+    try:
+        machine_ids, types, last_id = subscription_args(
+            request.args.getlist("machineId"), request.args.getlist("type"),
+            request.headers.get("Last-Event-ID") or request.args.get("lastEventId"))
+    except ValueError as e:
+        abort(400, str(e))
+
+    # each stream holds a worker thread until the client leaves: keep the rest for requests
+    if not stream_slots.acquire(blocking=False):
+        abort(503, f"{LIVE_STREAMS} live streams already open on this worker; serve asgi:app (WEB_APP=asgi:app) for more")
+    sub = Subscriber(machine_ids, types)
+    resp = Response(sse_stream(sub, last_id), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    resp.call_on_close(stream_slots.release)
+    return resp
 
 @app.get("/sp/kpis")
+@conditional(windowed=True)
 def kpi_summary():
-    to_dt   = parse_iso_arg("to")
-    from_dt = parse_iso_arg("from")
-    if to_dt is None or from_dt is None:
-        # default last 7 days (UTC)
-        from datetime import datetime, timedelta, timezone
-        to_dt = datetime.now(timezone.utc)
-        from_dt = to_dt - timedelta(days=7)
-
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text("EXEC dbo.sp_MachineKpiSummary @From=:f, @To=:t"),
-            {"f": to_dt.isoformat(), "t": to_dt.isoformat() if from_dt is None else to_dt.isoformat()}
-        ).all()
-    # NB: bug above (intentional check) — fix to use from_dt
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text("EXEC dbo.sp_MachineKpiSummary @From=:f, @To=:t"),
-            {"f": from_dt.isoformat(), "t": to_dt.isoformat()}
-        ).all()
-
-    data = [{
-        "machineId": r.MachineId,
-        "name": r.Name,
-        "line": r.Line,
-        "totalThroughput": int(r.TotalThroughput or 0),
-        "errorCount": int(r.ErrorCount or 0)
-    } for r in rows]
-    return jsonify(data)
+    selected = sites_arg()
+    from_dt, to_dt = window_args()
+    fmt = response_format()
+    names = ("machineId", "name", "line", "totalThroughput", "errorCount")
+    if selected is None:
+        kpis = fetch_kpis(from_dt, to_dt)
+    else:
+        results = site_reads(selected, lambda site: fetch_kpis(from_dt, to_dt, site=site))
+        kpis = [{**k, "machineId": sites.qualify(site_id, k["machineId"]), "site": site_id}
+                for site_id, rows in results.items() for k in rows]
+        names += ("site",)
+    if fmt != "json":
+        return table_response(Table.from_records(kpis, names), fmt)
+    return jsonify(kpis)
 
 @app.get("/metrics/throughput")
+@conditional(windowed=True)
 def throughput_metric():
-    # params
-    bucket = (request.args.get("bucket") or "hour").lower()
-    if bucket not in ("hour", "day"):
-        abort(400, "Query param 'bucket' must be 'hour' or 'day'")
-
-    mid = request.args.get("machineId")
-    machine_id = None
-    if mid is not None:
-        try:
-            machine_id = int(mid)
-            if machine_id < 1:
-                raise ValueError()
-        except Exception:
-            abort(400, "Query param 'machineId' must be a positive integer")
-
-    to_dt   = parse_iso_arg("to")
-    from_dt = parse_iso_arg("from")
-    if to_dt is None or from_dt is None:
-        from datetime import datetime, timedelta, timezone
-        to_dt = datetime.now(timezone.utc)
-        from_dt = to_dt - timedelta(days=7)
+    selected = sites_arg()
+    bucket = bucket_arg()
+    max_points, method = downsample_args()
+    from_dt, to_dt = window_args()
+    check_bucket_count(bucket, from_dt, to_dt)
+    fmt = response_format()
+    if selected is None:
+        body = fetch_throughput(bucket, from_dt, to_dt, machine_id_arg(), machine_ids_arg(), max_points, method)
+    else:
+        machine_args = site_machine_args(selected)
+        results = site_reads([s for s in selected if s.id in machine_args],
+                             lambda site: fetch_throughput(bucket, from_dt, to_dt, *machine_args[site.id],
+                                                           site=site))
+        body = merge_throughput(results, machine_args, max_points, method)
+    if fmt != "json":
+        return table_response(throughput_table(body), fmt)
+    return jsonify(body)
+
+def throughput_table(body):
+    """One row per point (machineId, ts, throughput); the rest of the body becomes meta."""
+    meta = {k: v for k, v in body.items() if k not in ("points", "series")}
+    if "series" not in body:
+        return Table.from_records(body["points"], ("ts", "throughput"), timestamps=("ts",), meta=meta)
+    columns = {"machineId": [], "ts": [], "throughput": []}
+    for s in body["series"]:
+        t = Table.from_records(s["points"], ("ts", "throughput"), timestamps=("ts",))
+        columns["machineId"] += [s["machineId"]] * len(t)
+        columns["ts"] += t.columns["ts"]
+        columns["throughput"] += t.columns["throughput"]
+    return Table(columns, timestamps=("ts",), meta=meta)
+
+# temperature/vibration stats and z-score anomalies (telemetry_stats.py)
+@app.get("/metrics/telemetry-stats")
+@conditional(windowed=True)
+def telemetry_stats_metric():
+    # NumPy is loaded with the first request for stats, not at worker boot
+    from telemetry_stats import STATS_MAX_DAYS, STATS_WINDOW, STATS_Z, telemetry_stats
+    machine_id = machine_id_arg()
+    machine_ids = machine_ids_arg() or None
+    if machine_id is not None:
+        machine_ids = (machine_id,)
+    window = parse_int_arg("window", default=STATS_WINDOW, min_val=2, max_val=10000)
+    z_limit = parse_float_arg("z", default=STATS_Z, min_val=0.5, max_val=100)
+    limit = parse_int_arg("limit", default=100, min_val=0, max_val=10000)
+    max_points = parse_int_arg("maxPoints", default=1000, min_val=3, max_val=100000)
+    from_dt, to_dt = window_args()
+    if (to_dt - from_dt).total_seconds() > STATS_MAX_DAYS * 86400:
+        abort(400, f"Range too large (max {STATS_MAX_DAYS} days)")
+    from_dt, to_dt = quantize_window(from_dt, to_dt, CACHE_QUANTUM)
+
+    def query():
+        return telemetry_stats(from_dt, to_dt, machine_ids, window, z_limit, limit,
+                               rolling_points=max_points if machine_id is not None else None)
+
+    key = make_key("telemetry-stats", f=from_dt.isoformat(), t=to_dt.isoformat(), ms=machine_ids,
+                   w=window, z=z_limit, l=limit, n=max_points)
+    return jsonify(response_cache.get_or_compute(key, query))
+
+# one round trip for the whole screen: the four reads run concurrently on pooled connections
+@app.get("/dashboard")
+@conditional(windowed=True)
+def dashboard():
+    bucket = bucket_arg()
+    machine_id = machine_id_arg()
+    max_points, method = downsample_args()
+    from_dt, to_dt = window_args()
+    check_bucket_count(bucket, from_dt, to_dt)
+    top = parse_int_arg("top", default=50, min_val=1, max_val=1000)
 
-    # SQL Server 2022 supports DATETRUNC
-    bucket_unit = "hour" if bucket == "hour" else "day"
-    base_sql = f"""
-        SELECT 
-            DATETRUNC({bucket_unit}, Ts) AS BucketTs,
-            SUM(Throughput)              AS TotalThroughput
-        FROM dbo.Telemetry
-        WHERE Ts BETWEEN :f AND :t
-          {"AND MachineId = :m" if machine_id else ""}
-        GROUP BY DATETRUNC({bucket_unit}, Ts)
-        ORDER BY BucketTs
-    """
-
-    params = {"f": from_dt.isoformat(), "t": to_dt.isoformat()}
-    if machine_id:
-        params["m"] = machine_id
+    futures = {
+        "machines": in_pool(fetch_machines),
+        "kpis": in_pool(fetch_kpis, from_dt, to_dt),
+        "throughput": in_pool(fetch_throughput, bucket, from_dt, to_dt, machine_id,
+                              None, max_points, method),
+        "latestLogs": in_pool(fetch_latest_logs, top, machine_id),
+    }
+    return jsonify({name: f.result() for name, f in futures.items()})
+
+# --- reports: built by background jobs (report_jobs.py), cached by window + data watermark ---
+REPORT_WAIT_MAX = 120
+
+def report_format_arg(default="xlsx"):
+    fmt = (request.args.get("format") or default).lower()
+    if fmt not in FORMATS:
+        abort(400, f"Query param 'format' must be one of {', '.join(FORMATS)}")
+    return fmt
+
+def job_response(job, code=200):
+    body = job.to_dict()
+    body["statusUrl"] = f"/reports/jobs/{job.id}"
+    if job.status == "done":
+        body["downloadUrl"] = f"/reports/jobs/{job.id}/download"
+    return jsonify(body), code, {"Location": body["statusUrl"]}
+
+@app.post("/reports")
+@require_auth(roles=["Admin"])
+def submit_report():
+    fmt = report_format_arg()
+    job = report_jobs.submit(fmt, parse_iso_arg("from"), parse_iso_arg("to"))
+    return job_response(job, 200 if job.status == "done" else 202)
 
-    with engine.connect() as conn:
-        rows = conn.execute(text(base_sql), params).all()
-
-    series = [
-        {"ts": (r.BucketTs.isoformat() if hasattr(r.BucketTs, "isoformat") else str(r.BucketTs)),
-         "throughput": int(r.TotalThroughput or 0)}
-        for r in rows
-    ]
-    return jsonify({
-        "bucket": bucket,
-        "from": from_dt.isoformat(),
-        "to": to_dt.isoformat(),
-        "machineId": machine_id,
-        "points": series
-    })
+@app.get("/reports/jobs/<job_id>")
+@require_auth(roles=["Admin"])
+def report_status(job_id):
+    job = report_jobs.get(job_id)
+    if job is None:
+        abort(404)
+    # ?wait=N long-polls up to N seconds for the job to finish
+    wait = parse_int_arg("wait", default=0, min_val=0, max_val=REPORT_WAIT_MAX)
+    if wait:
+        job = report_jobs.wait(job, wait)
+    return job_response(job)
+
+@app.get("/reports/jobs/<job_id>/download")
+@require_auth(roles=["Admin"])
+def report_download(job_id):
+    job = report_jobs.get(job_id)
+    if job is None or job.status != "done" or not os.path.exists(job.path):
+        abort(404)
+    return send_file(job.path, as_attachment=True, download_name=os.path.basename(job.path))
 
 @app.get("/reports/latest")
 @require_auth(roles=["Admin"])
 def download_latest_report():
-    # Generate on-demand (simple & always fresh)
-    path = generate_kpi_report()
-    return send_file(path, as_attachment=True, download_name=path.split("/")[-1])
+    # kept for simple clients: submit (or reuse) the job and wait for it
+    job = report_jobs.wait(report_jobs.submit(report_format_arg(), parse_iso_arg("from"), parse_iso_arg("to")),
+                           REPORT_WAIT_MAX)
+    if job.status in ("queued", "running"):
+        return job_response(job, 202)
+    if job.status != "done":
+        abort(500)
+    return send_file(job.path, as_attachment=True, download_name=os.path.basename(job.path))
+
+# Prometheus text format: route latency, SQL statement timing, pool gauges (instrumentation.py)
+@app.get("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 @app.get("/health")
 def health():
@@ -229,6 +734,22 @@ def health():
         app.logger.exception("healthcheck_failed")
         return {"ok": False, "error": str(e)}, 500
 
+# called once per worker by the server (gunicorn.conf.py, asgi.py); started_at is a perf_counter()
+def worker_ready(started_at):
+    try:
+        warmed = warm_pool()
+    except Exception as e:
+        # the database may still be starting: connections are opened on demand instead
+        warmed = 0
+        app.logger.warning("DB pool warm-up failed: %s", e)
+    process["boot_seconds"] = time.perf_counter() - started_at
+    app.logger.info("worker_ready", extra={"extra": {
+        "pid": os.getpid(),
+        "boot_s": round(process["boot_seconds"], 3),
+        "rss_mb": round(rss_bytes() / 2**20, 1),
+        "pool_warm": warmed,
+    }})
+
 from flask_swagger_ui import get_swaggerui_blueprint
 
 @app.get("/openapi.json")
@@ -0,0 +1,296 @@
+# backend/asgi.py
+# ASGI front for the API, for many concurrent clients per process:
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+#   WEB_APP=asgi:app gunicorn         (gunicorn.conf.py; the image's default command)
+# The event loop holds the client connections; each request runs the Flask
+# app (same routes, payloads and caching as app.py) on a bounded thread pool,
+# so an idle or waiting client costs a socket, not a thread or a connection.
+# - API_THREADS requests run at once; up to API_QUEUE more wait for a thread,
+#   beyond that requests get 503 with Retry-After
+# - a response not started within REQUEST_TIMEOUT seconds gets 504; a client
+#   that disconnects first abandons its request. Either way the request's
+#   running statements are cancelled on the server (cursor.cancel) and its
+#   further statements fail at once, so the thread and the connection come back
+# - /live/events is served on the loop itself: an open stream holds no thread
+import asyncio, contextvars, io, json, os, sys, threading, time
+
+STARTED = time.perf_counter()
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from app import app as flask_app, worker_ready
+from instrumentation import Counter, Gauge, process
+from live import AsyncSubscriber, sse_stream_async, subscription_args
+
+API_THREADS = int(os.getenv("API_THREADS", "16"))
+API_QUEUE = int(os.getenv("API_QUEUE", "256"))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "30"))   # seconds to the response start
+
+executor = ThreadPoolExecutor(API_THREADS, thread_name_prefix="api")
+busy = 0   # executor calls queued or running (read and written on the loop only)
+
+dropped = Counter("fdd_asgi_dropped_requests_total",
+                  "Requests not answered by the app: overloaded (503), timeout (504), disconnect")
+Gauge("fdd_asgi_busy", "Requests running or queued for an API thread", lambda: busy)
+
+# --- cancellation ---
+class Abandoned(Exception):
+    """A statement started by a request that timed out or whose client went away."""
+
+current = contextvars.ContextVar("fdd_request", default=None)
+owners = {}   # DBAPI connection -> RequestState running statements on it
+
+class RequestState:
+    def __init__(self):
+        self.cancelled = False
+        self.cursors = []   # (DBAPI connection, cursor) of the statements run so far
+        self.lock = threading.Lock()
+
+    def track(self, dbapi_conn, cursor):
+        with self.lock:
+            if self.cancelled:
+                raise Abandoned("request abandoned")
+            self.cursors.append((dbapi_conn, cursor))
+            owners[dbapi_conn] = self
+
+    def release(self, dbapi_conn):
+        with self.lock:
+            self.cursors = [(c, cur) for c, cur in self.cursors if c is not dbapi_conn]
+
+    def cancel(self):
+        # under the lock: the connections cannot go back to the pool (and to another request) meanwhile
+        with self.lock:
+            self.cancelled = True
+            for dbapi_conn, cursor in self.cursors:
+                try:
+                    if hasattr(cursor, "cancel"):
+                        cursor.cancel()            # pyodbc: SQLCancel, safe from another thread
+                    else:
+                        dbapi_conn.interrupt()     # sqlite3 (bench stand-in)
+                except Exception:
+                    pass   # statement already finished
+            self.cursors = []
+
+# every engine: the home database and the other sites (sites.py)
+@event.listens_for(Engine, "before_cursor_execute")
+def _track(conn, cursor, statement, parameters, context, executemany):
+    state = current.get()
+    if state is not None:
+        state.track(conn.connection.dbapi_connection, cursor)
+
+@event.listens_for(Pool, "checkin")
+def _checkin(dbapi_conn, record):
+    state = owners.pop(dbapi_conn, None)
+    if state is not None:
+        state.release(dbapi_conn)
+
+def run(state, fn, *args):
+    """fn(*args) on the API pool, with `state` as the current request (also in dashboard_pool)."""
+    global busy
+
+    def call():
+        token = current.set(state)
+        try:
+            return fn(*args)
+        finally:
+            current.reset(token)
+
+    def done(_):
+        global busy
+        busy -= 1
+
+    busy += 1
+    future = asyncio.get_running_loop().run_in_executor(executor, call)
+    future.add_done_callback(done)
+    return future
+
+# --- WSGI bridge ---
+def wsgi_environ(scope, body: bytes) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    script_name, path = scope.get("root_path", ""), scope["path"]
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name.encode().decode("latin1"),
+        "PATH_INFO": path.encode().decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        key = name.decode("latin1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = "HTTP_" + key
+        value = value.decode("latin1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def start_app(environ):
+    """Run the Flask app to its first body chunk: (status, headers, body iterable, iterator, chunk)."""
+    if current.get().cancelled:
+        raise Abandoned("request abandoned")   # timed out while queued
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"], started["headers"] = status, headers
+
+    body = flask_app(environ, start_response)
+    chunks = iter(body)
+    first = next(chunks, None)
+    return int(started["status"].split()[0]), started["headers"], body, chunks, first
+
+def close_body(body):
+    if hasattr(body, "close"):
+        body.close()
+
+def close_when_done(state, future):
+    """Release what an abandoned start_app call holds once its thread returns."""
+    def done(f):
+        if not f.cancelled() and f.exception() is None:
+            run(state, close_body, f.result()[2])
+    future.add_done_callback(done)
+
+def encode_headers(headers):
+    return [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers]
+
+async def send_json(send, status, body, headers=()):
+    data = json.dumps(body).encode()
+    await send({"type": "http.response.start", "status": status, "headers": encode_headers(
+        [("Content-Type", "application/json"), ("Content-Length", str(len(data))), *headers])})
+    await send({"type": "http.response.body", "body": data})
+
+async def read_body(receive) -> bytes:
+    parts = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        parts.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(parts)
+
+async def wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+# --- handlers ---
+async def handle(scope, receive, send):
+    if busy >= API_THREADS + API_QUEUE:
+        dropped.inc(reason="overloaded")
+        await send_json(send, 503, {"error": "overloaded"}, [("Retry-After", "1")])
+        return
+    body = await read_body(receive)
+    if body is None:
+        return
+    state = RequestState()
+    gone = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        call = run(state, start_app, wsgi_environ(scope, body))
+        done, _ = await asyncio.wait({call, gone}, timeout=REQUEST_TIMEOUT,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        if call not in done:
+            state.cancel()
+            close_when_done(state, call)
+            if gone in done:
+                dropped.inc(reason="disconnect")
+            else:
+                dropped.inc(reason="timeout")
+                await send_json(send, 504, {"error": "timeout", "detail": f"No response within {REQUEST_TIMEOUT:g}s"})
+            return
+
+        # streamed bodies (stream=true exports, report downloads) may take longer than the timeout
+        status, headers, app_body, chunks, chunk = call.result()
+        await send({"type": "http.response.start", "status": status, "headers": encode_headers(headers)})
+        while chunk is not None:
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            pull = run(state, next, chunks, None)
+            done, _ = await asyncio.wait({pull, gone}, return_when=asyncio.FIRST_COMPLETED)
+            if pull not in done:
+                dropped.inc(reason="disconnect")
+                state.cancel()
+                pull.add_done_callback(lambda _: run(state, close_body, app_body))
+                return
+            chunk = pull.result()
+        await send({"type": "http.response.body", "body": b""})
+        await run(state, close_body, app_body)
+    finally:
+        gone.cancel()
+
+# text/event-stream without a thread per client (the same stream as app.live_events)
+async def live_events(scope, receive, send):
+    args = parse_qs(scope["query_string"].decode("latin1"))
+    headers = {k.decode("latin1").lower(): v.decode("latin1") for k, v in scope["headers"]}
+    try:
+        machine_ids, types, last_id = subscription_args(
+            args.get("machineId", []), args.get("type", []),
+            headers.get("last-event-id") or next(iter(args.get("lastEventId", [])), None))
+    except ValueError as e:
+        await send_json(send, 400, {"error": "bad_request", "detail": f"400 Bad Request: {e}"})
+        return
+
+    response_headers = [("Content-Type", "text/event-stream; charset=utf-8"),
+                        ("Cache-Control", "no-cache"), ("X-Accel-Buffering", "no")]
+    if "origin" in headers:   # same CORS answer as flask_cors gives the Flask routes
+        response_headers.append(("Access-Control-Allow-Origin", "*"))
+    await send({"type": "http.response.start", "status": 200, "headers": encode_headers(response_headers)})
+
+    state = RequestState()
+    sub = AsyncSubscriber(asyncio.get_running_loop(), machine_ids, types)
+    stream = sse_stream_async(sub, last_id, lambda fn, *args: run(state, fn, *args))
+    gone = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        while True:
+            step = asyncio.ensure_future(stream.__anext__())
+            done, _ = await asyncio.wait({step, gone}, return_when=asyncio.FIRST_COMPLETED)
+            if step not in done:
+                state.cancel()
+                step.cancel()
+                await asyncio.gather(step, return_exceptions=True)
+                return
+            try:
+                text = step.result()
+            except StopAsyncIteration:   # dropped as too slow: the client reconnects
+                break
+            await send({"type": "http.response.body", "body": text.encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        gone.cancel()
+        await stream.aclose()
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # under gunicorn, post_worker_init has already warmed the pool
+            if not process["boot_seconds"]:
+                await run(None, worker_ready, STARTED)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http":
+        if scope["path"] == "/live/events" and scope["method"] == "GET":
+            await live_events(scope, receive, send)
+        else:
+            await handle(scope, receive, send)
+    # websockets: none served
@@ -0,0 +1,159 @@
+# backend/cache.py
+# Response cache for dashboard reads. Entries are keyed on the normalized
+# request params plus the ETL data watermark (dbo.EtlWatermark, bumped in every
+# ingest transaction), so new data invalidates them without any explicit purge;
+# the TTL only bounds staleness for changes made outside the ETL.
+import json, os, threading, time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from db import engine
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+# default/explicit time windows snap to this many seconds (unless a bucket is coarser)
+CACHE_QUANTUM = int(os.getenv("CACHE_QUANTUM", "60"))
+# how often the watermark is re-read; bounds how late new data shows up
+WATERMARK_POLL = float(os.getenv("CACHE_WATERMARK_POLL", "2"))
+# optional shared cache for several API processes, e.g. redis://redis:6379/0 (needs `pip install redis`)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+class LRUStore:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit is None:
+                return None
+            expires, value = hit
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class RedisStore:
+    """Shared store: JSON values with SETEX expiry."""
+
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self.client.get("fdd:" + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl: float):
+        self.client.setex("fdd:" + key, max(1, int(ttl)), json.dumps(value))
+
+    def clear(self):
+        for key in self.client.scan_iter("fdd:*"):
+            self.client.delete(key)
+
+class Watermark:
+    """Latest dbo.EtlWatermark version (and UpdatedAt), re-read at most every `poll` seconds."""
+
+    def __init__(self, poll: float, source=None):
+        self.poll = poll
+        self.source = source   # engine to read it from (default: db.engine)
+        self.version = None
+        self.updated_at = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def current(self):
+        with self.lock:
+            if time.monotonic() - self.checked < self.poll:
+                return self.version
+            self.checked = time.monotonic()
+        try:
+            with (self.source or engine).connect() as conn:
+                row = conn.execute(
+                    text("SELECT Version, UpdatedAt FROM dbo.EtlWatermark WHERE Name = 'ingest'")
+                ).first()
+            version, updated_at = (row.Version, row.UpdatedAt) if row else (None, None)
+        except Exception:
+            # no watermark table yet (db/08_watermark.sql not applied): TTL only
+            version, updated_at = None, None
+        if isinstance(updated_at, str):   # drivers without a DATETIME2 type (bench stand-in)
+            updated_at = datetime.fromisoformat(updated_at)
+        with self.lock:
+            self.version = version
+            self.updated_at = updated_at
+        return version
+
+class ResponseCache:
+    """get_or_compute(): one computation per key at a time, concurrent callers wait for it."""
+
+    def __init__(self, store, ttl: float, watermark: Watermark, prefix: str = ""):
+        self.store = store
+        self.ttl = ttl
+        self.watermark = watermark
+        self.prefix = prefix   # caches sharing one store (sites.py)
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key: str, compute):
+        full_key = f"{self.prefix}{key}|wm={self.watermark.current()}"
+        value = self.store.get(full_key)
+        if value is not None:
+            return value
+
+        with self.lock:
+            done = self.inflight.get(full_key)
+            leader = done is None
+            if leader:
+                done = self.inflight[full_key] = threading.Event()
+        if not leader:
+            done.wait(timeout=30)
+            value = self.store.get(full_key)
+            if value is not None:
+                return value
+            return compute()  # leader failed or timed out
+
+        try:
+            value = compute()
+            self.store.set(full_key, value, self.ttl)
+            return value
+        finally:
+            with self.lock:
+                self.inflight.pop(full_key, None)
+            done.set()
+
+def make_key(name: str, **params) -> str:
+    return name + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+def _day_start(dt):
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def quantize_window(from_dt, to_dt, seconds: int):
+    """Widen [from, to] to `seconds` boundaries (counted from midnight, so hour/day align)."""
+    q = timedelta(seconds=max(1, seconds))
+    from_q = from_dt - (from_dt - _day_start(from_dt)) % q
+    rem = (to_dt - _day_start(to_dt)) % q
+    to_q = to_dt + (q - rem) if rem else to_dt
+    return from_q, to_q
+
+def make_store():
+    if CACHE_REDIS_URL:
+        return RedisStore(CACHE_REDIS_URL)
+    return LRUStore(CACHE_MAX_ENTRIES)
+
+response_cache = ResponseCache(make_store(), CACHE_TTL, Watermark(WATERMARK_POLL))
@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from instrumentation import TimedQueuePool, instrument_engine
 
 load_dotenv()
 
@@ -14,11 +15,44 @@ DB_PASS   = os.getenv("DB_PASS")
 # NOTE: Driver name must match what's installed (check ODBC Data Sources > Drivers)
 ODBC_DRIVER = os.getenv("ODBC_DRIVER", "ODBC Driver 18 for SQL Server")
 
-conn_str = (
-    f"mssql+pyodbc://{DB_USER}:{DB_PASS}@{DB_SERVER}/{DB_NAME}"
-    f"?driver={ODBC_DRIVER.replace(' ', '+')}"
-    f"&TrustServerCertificate=yes"
-)
+def odbc_url(server, name, user, password):
+    return (
+        f"mssql+pyodbc://{user}:{password}@{server}/{name}"
+        f"?driver={ODBC_DRIVER.replace(' ', '+')}"
+        f"&TrustServerCertificate=yes"
+    )
 
-# pool_pre_ping helps avoid stale connections if DB restarts
-engine = create_engine(conn_str, pool_pre_ping=True, future=True)
+conn_str = odbc_url(DB_SERVER, DB_NAME, DB_USER, DB_PASS)
+
+# Pool per process (each server worker has its own): size it to the worker's threads
+# plus DASHBOARD_WORKERS, or requests wait up to DB_POOL_TIMEOUT seconds for a connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))   # seconds; -1 keeps connections forever
+# connections opened at worker boot (gunicorn.conf.py), so first requests skip the login
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", str(DB_POOL_SIZE)))
+
+def make_engine(url, pool_gauges=True, **kwargs):
+    """Pooled, instrumented engine with the DB_POOL_* settings (kwargs override them)."""
+    # pool_pre_ping helps avoid stale connections if DB restarts
+    options = dict(pool_pre_ping=True, future=True, poolclass=TimedQueuePool,
+                   pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                   pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE)
+    eng = create_engine(url, **{**options, **kwargs})
+    # statement timing, slow-query log and pool gauges (GET /metrics)
+    instrument_engine(eng, pool_gauges)
+    return eng
+
+engine = make_engine(conn_str)
+
+def warm_pool(n=DB_POOL_WARM) -> int:
+    """Open up to n pool connections at once and return them idle; returns how many."""
+    conns = []
+    try:
+        for _ in range(min(n, engine.pool.size())):
+            conns.append(engine.connect())
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
@@ -0,0 +1,64 @@
+# backend/downsample.py
+# Shape-preserving downsampling for chart series, so the payload stays at
+# ~maxPoints whatever the range. Points are (x, y, ...) tuples with numeric x
+# (epoch seconds); extra fields ride along.
+
+def lttb(points, threshold: int):
+    """Largest-Triangle-Three-Buckets: keeps first/last point and, per bucket, the
+    point forming the largest triangle with the previous pick and the next bucket's mean."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    out = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # mean of the next bucket
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        span = points[start:end]
+        avg_x = sum(p[0] for p in span) / len(span)
+        avg_y = sum(p[1] for p in span) / len(span)
+
+        # pick from the current bucket
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        ax, ay = points[a][0], points[a][1]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            x, y = points[j][0], points[j][1]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(points[best])
+        a = best
+    out.append(points[-1])
+    return out
+
+def minmax(points, threshold: int):
+    """Keeps first/last point and the min and max of each bucket between them, in time
+    order: keeps spikes exactly. With an odd budget the last bucket keeps one point,
+    whichever of its min and max lies farther from the bucket mean."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    budget = threshold - 2
+    buckets = (budget + 1) // 2
+    size = (n - 2) / buckets
+    out = [points[0]]
+    for i in range(buckets):
+        span = points[int(i * size) + 1:int((i + 1) * size) + 1]
+        if not span:
+            continue
+        lo = min(span, key=lambda p: p[1])
+        hi = max(span, key=lambda p: p[1])
+        if lo is hi:
+            out.append(lo)
+        elif 2 * (i + 1) > budget:
+            mean = sum(p[1] for p in span) / len(span)
+            out.append(hi if hi[1] - mean >= mean - lo[1] else lo)
+        else:
+            out.extend((lo, hi) if lo[0] <= hi[0] else (hi, lo))
+    out.append(points[-1])
+    return out
+
+METHODS = {"lttb": lttb, "minmax": minmax}
@@ -0,0 +1,38 @@
+# backend/gunicorn.conf.py
+# Production server settings, read by gunicorn from the working directory:
+#   gunicorn                        (WEB_APP, default app:app)
+#   WEB_APP=asgi:app gunicorn       (uvicorn workers, see asgi.py)
+# Preforked workers, each with a thread pool (gthread: SSE streams and report
+# long-polls hold a thread each, not a whole worker). Workers import the app
+# themselves after the fork, so DB pools, caches and background threads are
+# per worker; heavy modules (NumPy, xlsxwriter) load on first use. At boot
+# every worker opens its DB pool and logs its boot time and RSS
+# ("worker_ready"); both are also on GET /metrics.
+import os, time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+# app:app (WSGI, app.py) or asgi:app (asgi.py); an app on the command line overrides it
+wsgi_app = os.getenv("WEB_APP") or "app:app"
+# asgi:app needs an ASGI worker (uvicorn-worker)
+worker_class = os.getenv("WEB_WORKER_CLASS",
+                         "uvicorn_worker.UvicornWorker" if wsgi_app.startswith("asgi:") else "gthread")
+threads = int(os.getenv("WEB_THREADS", "8"))
+# a worker silent for this long is restarted; requests themselves run on threads
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+# recycle workers after this many requests (0 = never), jittered so they do not restart together
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+# restart workers on code changes (development with the source mounted)
+reload = os.getenv("WEB_RELOAD", "").lower() in ("1", "true")
+# requests are logged by the app (logging_config.py)
+accesslog = None
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+def post_worker_init(worker):
+    from app import worker_ready
+    worker_ready(worker.forked_at)
@@ -0,0 +1,127 @@
+# backend/http_cache.py
+# HTTP-level caching for the JSON reads: weak ETags / Last-Modified derived from
+# the ETL data watermark (cache.py), so a client revalidating with
+# If-None-Match / If-Modified-Since gets a 304 before any query runs, and
+# gzip / brotli compression negotiated from Accept-Encoding. Compressed bodies
+# are kept per (ETag, encoding), so many screens polling the same view cost
+# one compression per data version.
+import gzip, hashlib, os, time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import Response, g, make_response, request
+from werkzeug.http import is_resource_modified
+from cache import CACHE_QUANTUM, LRUStore, response_cache
+import sites
+
+# validators also roll over this often, bounding staleness for changes made outside the ETL
+ETAG_MAX_AGE = int(os.getenv("ETAG_MAX_AGE", "300"))
+# bodies smaller than this are sent as they are
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))     # gzip 1-9
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))     # brotli 0-11
+COMPRESSIBLE = ("application/json", "text/plain", "text/csv",
+                # columnar formats (serialize.py)
+                "application/vnd.fdd.columns+json", "application/msgpack", "application/vnd.apache.arrow.stream")
+
+try:
+    import brotli
+except ImportError:   # optional: pip install brotli
+    brotli = None
+
+compressed_bodies = LRUStore(int(os.getenv("COMPRESS_CACHE_ENTRIES", "256")))
+
+# --- validators ---
+def data_version():
+    """(version, updated_at) of the data behind the request: the home watermark, or each site's for sites=."""
+    raw = request.args.get("sites")
+    if raw is not None:
+        try:
+            return sites.known_version(sites.select(raw))
+        except ValueError:
+            return None, None   # the view answers 400
+    wm = response_cache.watermark
+    return wm.current(), wm.updated_at
+
+def validators(windowed: bool):
+    """(etag, last_modified) for the current request, or (None, None) without a watermark."""
+    version, updated_at = data_version()
+    if version is None:
+        return None, None
+    # a window missing either end is the default "last 7 days" (window_args), which slides with
+    # the clock: new validators every CACHE_QUANTUM
+    period = (CACHE_QUANTUM if windowed and ("from" not in request.args or "to" not in request.args)
+              else ETAG_MAX_AGE)
+    slot = int(time.time() // period)
+    # Accept picks the body format (serialize.py), so it is part of the tag
+    h = hashlib.sha1(f"{request.path}?{sorted(request.args.items(multi=True))}"
+                     f"|{request.headers.get('Accept', '')}".encode())
+    etag = f"v{version}-{slot}-{h.hexdigest()[:16]}"
+    modified = datetime.fromtimestamp(slot * period, timezone.utc)
+    if updated_at is not None:
+        modified = max(modified, updated_at.replace(tzinfo=timezone.utc))
+    return etag, modified
+
+def conditional(windowed=False):
+    """Answer revalidations of an unchanged view with 304 (no query); tag fresh 200s.
+
+    windowed=True for views whose default time window ends "now".
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, modified = validators(windowed)
+            if etag is None:
+                return view(*args, **kwargs)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=modified):
+                resp = Response(status=304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                # partial multi-site answers (sites.py) stay untagged: the next request asks the missing sites again
+                if resp.status_code != 200 or g.get("sites_failed"):
+                    return resp
+            resp.set_etag(etag, weak=True)
+            resp.last_modified = modified
+            resp.vary.add("Accept")
+            # clients may store the body but must revalidate before using it
+            resp.cache_control.private = True
+            resp.cache_control.no_cache = True
+            return resp
+        return wrapper
+    return decorator
+
+# --- compression ---
+def choose_encoding():
+    accept = request.accept_encodings
+    options = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(options, key=lambda e: (accept[e], -options.index(e)))
+    return best if accept[best] > 0 else None
+
+def compress(resp):
+    """after_request hook: compress eligible bodies for clients that accept it."""
+    resp.vary.add("Accept-Encoding")
+    if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+            or "Content-Encoding" in resp.headers or resp.mimetype not in COMPRESSIBLE):
+        return resp
+    encoding = choose_encoding()
+    if encoding is None:
+        return resp
+    data = resp.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return resp
+
+    etag, _ = resp.get_etag()
+    key = f"{etag}|{encoding}" if etag else None
+    body = compressed_bodies.get(key) if key else None
+    if body is None:
+        if encoding == "br":
+            body = brotli.compress(data, quality=BROTLI_QUALITY)
+        else:
+            body = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+        if key:
+            compressed_bodies.set(key, body, ETAG_MAX_AGE)
+    resp.set_data(body)
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
+def init_http_cache(app):
+    app.after_request(compress)
@@ -0,0 +1,216 @@
+# backend/instrumentation.py
+# In-process metrics for the API: per-statement SQL timing (SQLAlchemy cursor
+# events), a slow-query log, connection-pool gauges and checkout wait, and
+# per-route latency histograms. Rendered in the Prometheus text format by
+# GET /metrics; per-request totals also go into the JSON request log
+# (logging_config.py). Counters are per process: scrape every worker.
+import logging, os, re, sys, threading, time
+from flask import g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+# statements at or above this many milliseconds are logged as slow_query
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+# latency buckets in seconds (Prometheus client defaults)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+log = logging.getLogger("db")
+registry = []   # every metric, in definition order
+
+# --- metric types ---
+class Metric:
+    def __init__(self, name: str, help_text: str, kind: str):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.values = {}   # label tuple -> value
+        self.lock = threading.Lock()
+        # a metric re-created under the same name (e.g. a re-instrumented engine) replaces the old one
+        registry[:] = [m for m in registry if m.name != name]
+        registry.append(self)
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self.lock:
+            items = list(self.values.items())
+        for labels, value in sorted(items):
+            yield from self.samples(labels, value)
+
+    def samples(self, labels, value):
+        yield f"{self.name}{fmt_labels(labels)} {fmt_value(value)}"
+
+class Counter(Metric):
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text, "counter")
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+class Gauge(Metric):
+    """Value read from `fn()` at scrape time."""
+
+    def __init__(self, name, help_text, fn):
+        super().__init__(name, help_text, "gauge")
+        self.fn = fn
+
+    def lines(self):
+        self.values = {(): self.fn()}
+        return super().lines()
+
+class Histogram(Metric):
+    def __init__(self, name, help_text, buckets=BUCKETS):
+        super().__init__(name, help_text, "histogram")
+        self.buckets = buckets
+
+    def observe(self, seconds: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                # per-bucket counts (non-cumulative), +Inf, sum
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            i = 0
+            while i < len(self.buckets) and seconds > self.buckets[i]:
+                i += 1
+            counts[i] += 1
+            counts[-1] += seconds
+
+    def samples(self, labels, counts):
+        total = 0
+        for le, c in zip(list(self.buckets) + ["+Inf"], counts):
+            total += c
+            yield f"{self.name}_bucket{fmt_labels(labels + (('le', str(le)),))} {total}"
+        yield f"{self.name}_sum{fmt_labels(labels)} {fmt_value(counts[-1])}"
+        yield f"{self.name}_count{fmt_labels(labels)} {total}"
+
+def fmt_labels(labels) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+def fmt_value(v) -> str:
+    return repr(float(v))
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for m in registry for line in m.lines()) + "\n"
+
+# --- process (one per server worker) ---
+process = {"boot_seconds": 0.0}   # set by the server at worker boot (gunicorn.conf.py)
+
+def rss_bytes() -> int:
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource   # no /proc: peak RSS (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+Gauge("fdd_process_resident_memory_bytes", "Resident memory of this worker", rss_bytes)
+Gauge("fdd_process_boot_seconds", "Worker boot time: fork to ready, incl. app import and pool warm-up",
+      lambda: process["boot_seconds"])
+
+# --- HTTP ---
+http_seconds = Histogram("fdd_http_request_duration_seconds", "Request latency by route")
+http_db_seconds = Histogram("fdd_http_request_db_seconds", "SQL time (statement execution) per request, by route")
+http_json_seconds = Histogram("fdd_http_request_json_seconds", "JSON encoding time per request, by route")
+
+def observe_request(route, method, status, seconds):
+    http_seconds.observe(seconds, route=route, method=method, status=str(status))
+    http_db_seconds.observe(g.get("db_s", 0.0), route=route)
+    http_json_seconds.observe(g.get("json_s", 0.0), route=route)
+
+def add_request_time(name: str, seconds: float):
+    """Accumulate a phase (db_s, json_s) on the current request, if there is one."""
+    if has_request_context():
+        setattr(g, name, g.get(name, 0.0) + seconds)
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that adds its encoding time to the request's json_s."""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            add_request_time("json_s", time.perf_counter() - start)
+
+# --- SQL ---
+db_seconds = Histogram("fdd_db_statement_duration_seconds", "Statement execution time by statement")
+db_errors = Counter("fdd_db_statement_errors_total", "Statements that raised, by statement")
+db_slow = Counter("fdd_db_slow_statements_total", "Statements at or above SLOW_QUERY_MS, by statement")
+pool_wait_seconds = Histogram("fdd_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+                              buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+pool_timeouts = Counter("fdd_db_pool_timeouts_total", "Checkouts that gave up waiting for a connection")
+
+_EXEC = re.compile(r"^\s*EXEC(?:UTE)?\s+(?:\[?dbo\]?\.)?\[?(\w+)", re.I)
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|MERGE)\s+(?:\[?dbo\]?\.)?\[?([#\w]+)", re.I)
+
+def statement_name(sql: str) -> str:
+    """Low-cardinality label for a statement: the proc name, or VERB table."""
+    m = _EXEC.match(sql)
+    if m:
+        return m.group(1)
+    verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "?"
+    m = _TABLE.search(sql)
+    return f"{verb} {m.group(1)}" if m else verb
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            pool_timeouts.inc()
+            raise
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - start)
+
+def instrument_engine(engine, pool_gauges=True):
+    """Attach statement timing (and the pool gauges, for one engine per process) to `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        name = statement_name(statement)
+        db_seconds.observe(seconds, statement=name)
+        add_request_time("db_s", seconds)
+        if has_request_context():
+            g.db_queries = g.get("db_queries", 0) + 1
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            db_slow.inc(statement=name)
+            log.warning("slow_query", extra={"extra": {
+                "request_id": g.get("request_id") if has_request_context() else None,
+                "statement": name,
+                "duration_s": round(seconds, 4),
+                "sql": " ".join(statement.split())[:500],
+                "executemany": executemany,
+            }})
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+        if starts:
+            starts.pop()
+        db_errors.inc(statement=statement_name(ctx.statement or ""))
+
+    pool = engine.pool
+    if pool_gauges and isinstance(pool, QueuePool):
+        Gauge("fdd_db_pool_size", "Configured pool size", pool.size)
+        Gauge("fdd_db_pool_checked_out", "Connections currently checked out", pool.checkedout)
+        Gauge("fdd_db_pool_checked_in", "Idle connections in the pool", pool.checkedin)
+        Gauge("fdd_db_pool_overflow", "Connections open beyond pool size (negative: not yet opened)", pool.overflow)
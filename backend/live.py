@@ -0,0 +1,254 @@
+# backend/live.py
+# Live event feed: one background watcher per API process reads new events and
+# fans them out to every subscriber (SSE connections), so DB load follows the
+# event rate, not the number of open dashboards.
+# Parallel ETL writers commit IDENTITY values out of order (Id 101 can be
+# visible before Id 100), so the watcher re-reads every Id above the high-water
+# mark it had LIVE_SETTLE seconds ago and skips the ones it already published.
+import asyncio, json, os, queue, threading, time
+from collections import deque
+from sqlalchemy import text
+from db import engine
+
+LIVE_POLL = float(os.getenv("LIVE_POLL", "0.5"))           # seconds between watcher reads
+LIVE_HEARTBEAT = float(os.getenv("LIVE_HEARTBEAT", "15"))  # keep-alive comment for idle streams
+LIVE_QUEUE = int(os.getenv("LIVE_QUEUE", "1000"))          # per-subscriber backlog before it is dropped
+LIVE_BATCH = 1000
+LIVE_REPLAY = 500                                          # max rows replayed on reconnect (Last-Event-ID)
+LIVE_SETTLE = float(os.getenv("LIVE_SETTLE", "10"))        # seconds a lower Id may still commit after a higher one
+# WSGI streams per worker (each holds a thread): by default all of WEB_THREADS but LIVE_RESERVE,
+# which stay free for ordinary requests
+LIVE_RESERVE = int(os.getenv("LIVE_RESERVE", "2"))
+LIVE_STREAMS = int(os.getenv("LIVE_STREAMS", str(max(1, int(os.getenv("WEB_THREADS", "8")) - LIVE_RESERVE))))
+
+# WSGI (app.py) streams only; asgi.py serves /live/events on its event loop without a thread each
+stream_slots = threading.BoundedSemaphore(LIVE_STREAMS)
+
+NEW_EVENTS_SQL = """
+    SELECT TOP ({n})
+        e.Id, e.MachineId, e.Ts, e.Type, e.Code, e.Message,
+        m.Name AS MachineName, m.Line AS Line,
+        e.Severity AS SeverityRank
+    FROM dbo.Events e
+    INNER JOIN dbo.Machines m ON m.Id = e.MachineId
+    WHERE e.Id > :hw
+    ORDER BY e.Id
+"""
+
+def event_dict(r):
+    return {
+        "id": r.Id,
+        "machineId": r.MachineId,
+        "timestamp": r.Ts.isoformat() if hasattr(r.Ts, "isoformat") else str(r.Ts),
+        "type": r.Type,
+        "code": r.Code,
+        "message": r.Message,
+        "machineName": r.MachineName,
+        "line": r.Line,
+        "severityRank": r.SeverityRank
+    }
+
+class Subscriber:
+    def __init__(self, machine_ids=None, types=None):
+        self.machine_ids = machine_ids
+        self.types = types
+        self.queue = queue.Queue(LIVE_QUEUE)
+        self.dropped = False
+
+    def wants(self, ev) -> bool:
+        return ((not self.machine_ids or ev["machineId"] in self.machine_ids)
+                and (not self.types or str(ev["type"]).upper() in self.types))
+
+    def put(self, ev) -> bool:
+        """Called on the watcher thread; False when the backlog is full."""
+        try:
+            self.queue.put_nowait(ev)
+            return True
+        except queue.Full:
+            return False
+
+class AsyncSubscriber(Subscriber):
+    """Subscriber read by a coroutine on `loop` (asgi.py): no thread waits for its events."""
+
+    def __init__(self, loop, machine_ids=None, types=None):
+        super().__init__(machine_ids, types)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def put(self, ev) -> bool:
+        if self.queue.qsize() >= LIVE_QUEUE:
+            return False
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, ev)
+            return True
+        except RuntimeError:   # loop closed
+            return False
+
+def subscription_args(machine_id_values, type_values, last_event_id):
+    """(machine_ids, types, last_id) from the /live/events query; ValueError carries the 400 detail."""
+    machine_ids, types = set(), set()
+    for raw in machine_id_values:
+        for part in raw.split(","):
+            try:
+                machine_ids.add(int(part))
+            except ValueError:
+                raise ValueError("Query param 'machineId' must be a comma-separated list of integers")
+    for raw in type_values:
+        types.update(t.strip().upper() for t in raw.split(",") if t.strip())
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise ValueError("Last-Event-ID must be an event id")
+    return machine_ids or None, types or None, last_id
+
+class EventFeed:
+    """Shared watcher thread, started with the first subscriber and idle without any."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.cursor = None        # every Id above this is re-read on each poll
+        self.high_water = None    # highest Id published
+        self.seen = set()         # published Ids above the cursor
+        self.marks = deque()      # (monotonic time, high_water): the cursor moves up to a mark once it has settled
+        self.thread = None
+
+    def subscribe(self, sub: Subscriber):
+        with self.lock:
+            self.subscribers.add(sub)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="live-events", daemon=True)
+                self.thread.start()
+
+    def unsubscribe(self, sub: Subscriber):
+        with self.lock:
+            self.subscribers.discard(sub)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    self.cursor = None
+                    return
+            try:
+                self._poll()
+            except Exception:
+                pass  # DB hiccup: keep the cursor and retry on the next tick
+            time.sleep(LIVE_POLL)
+
+    def _poll(self):
+        with engine.connect() as conn:
+            if self.cursor is None:
+                # start at "now": subscribers get what is new from here on
+                self.cursor = self.high_water = conn.execute(text("SELECT ISNULL(MAX(Id), 0) FROM dbo.Events")).scalar()
+                self.seen.clear()
+                self.marks.clear()
+                return
+            after = self.cursor
+            while True:
+                rows = conn.execute(text(NEW_EVENTS_SQL.format(n=LIVE_BATCH)), {"hw": after}).all()
+                new = [r for r in rows if r.Id not in self.seen]
+                if new:
+                    self.seen.update(r.Id for r in new)
+                    self.high_water = max(self.high_water, new[-1].Id)
+                    self._publish([event_dict(r) for r in new])
+                if len(rows) < LIVE_BATCH:
+                    break
+                after = rows[-1].Id
+        # an Id below a high-water mark LIVE_SETTLE seconds old is not re-read again
+        now = time.monotonic()
+        self.marks.append((now, self.high_water))
+        while self.marks and now - self.marks[0][0] >= LIVE_SETTLE:
+            self.cursor = self.marks.popleft()[1]
+        self.seen = {i for i in self.seen if i > self.cursor}
+
+    def _publish(self, events):
+        with self.lock:
+            subs = list(self.subscribers)
+        for sub in subs:
+            for ev in events:
+                if not sub.wants(ev):
+                    continue
+                if not sub.put(ev):
+                    # too slow to keep up: drop it, the client reconnects with Last-Event-ID
+                    sub.dropped = True
+                    self.unsubscribe(sub)
+                    break
+
+def replay(after_id: int, sub: Subscriber):
+    """Rows after a client's Last-Event-ID, so a reconnect does not lose events.
+
+    None when more than LIVE_REPLAY rows were missed: the client resyncs instead.
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(NEW_EVENTS_SQL.format(n=LIVE_REPLAY)), {"hw": after_id}).all()
+    if len(rows) == LIVE_REPLAY:
+        return None
+    return [ev for ev in map(event_dict, rows) if sub.wants(ev)]
+
+def sse_event(ev, last_id) -> str:
+    # `id:` is the highest Id sent so far: a late (lower) Id must not move Last-Event-ID back
+    return f"id: {last_id}\nevent: log\ndata: {json.dumps(ev)}\n\n"
+
+# too many missed events to replay: the client reloads its view (e.g. /sp/latest-logs), then keeps listening
+SSE_RESET = f"event: reset\ndata: {json.dumps({'reason': 'replay_truncated', 'maxReplay': LIVE_REPLAY})}\n\n"
+
+def sse_stream(sub: Subscriber, last_event_id=None):
+    """text/event-stream body: `id:` is the highest event Id sent, `data:` the same JSON as /sp/latest-logs rows.
+
+    An `event: reset` means events were missed and the client should reload.
+    """
+    feed.subscribe(sub)
+    try:
+        yield f"retry: {int(LIVE_POLL * 2000)}\n\n"
+        last, replayed = last_event_id or 0, set()
+        if last_event_id is not None:
+            events = replay(last_event_id, sub)
+            if events is None:
+                yield SSE_RESET
+            for ev in events or ():
+                replayed.add(ev["id"])
+                last = max(last, ev["id"])
+                yield sse_event(ev, last)
+        while not sub.dropped:
+            try:
+                ev = sub.queue.get(timeout=LIVE_HEARTBEAT)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if ev["id"] in replayed:
+                continue  # already sent by the replay
+            last = max(last, ev["id"])
+            yield sse_event(ev, last)
+    finally:
+        feed.unsubscribe(sub)
+
+async def sse_stream_async(sub: AsyncSubscriber, last_event_id, run_blocking):
+    """sse_stream for asgi.py; `run_blocking(fn, *args)` runs the replay query off the loop."""
+    feed.subscribe(sub)
+    try:
+        yield f"retry: {int(LIVE_POLL * 2000)}\n\n"
+        last, replayed = last_event_id or 0, set()
+        if last_event_id is not None:
+            events = await run_blocking(replay, last_event_id, sub)
+            if events is None:
+                yield SSE_RESET
+            for ev in events or ():
+                replayed.add(ev["id"])
+                last = max(last, ev["id"])
+                yield sse_event(ev, last)
+        while not sub.dropped:
+            try:
+                ev = await asyncio.wait_for(sub.queue.get(), LIVE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if ev["id"] in replayed:
+                continue
+            last = max(last, ev["id"])
+            yield sse_event(ev, last)
+    finally:
+        feed.unsubscribe(sub)
+
+feed = EventFeed()
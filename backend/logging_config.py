@@ -1,5 +1,6 @@
 import json, logging, sys, time, uuid
 from flask import request, g
+from instrumentation import observe_request
 
 class JsonFormatter(logging.Formatter):
     def format(self, record):
@@ -18,15 +19,23 @@ def init_json_logging(app):
     handler.setFormatter(JsonFormatter())
     app.logger.handlers = [handler]
     app.logger.setLevel(logging.INFO)
+    # slow_query records from instrumentation.py
+    db_logger = logging.getLogger("db")
+    db_logger.handlers = [handler]
+    db_logger.setLevel(logging.INFO)
+    db_logger.propagate = False
 
     @app.before_request
     def _start_timer():
-        g._start = time.time()
+        g._start = time.perf_counter()
         g.request_id = str(uuid.uuid4())
 
     @app.after_request
     def _log(response):
-        duration = round(time.time() - g.get("_start", time.time()), 4)
+        duration = time.perf_counter() - g.get("_start", time.perf_counter())
+        # url_rule is the route template (/logs/<int:machine_id>), so labels stay bounded
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        observe_request(route, request.method, response.status_code, duration)
         app.logger.info(
             "request",
             extra={
@@ -35,7 +44,10 @@ def init_json_logging(app):
                     "method": request.method,
                     "path": request.path,
                     "status": response.status_code,
-                    "duration_s": duration,
+                    "duration_s": round(duration, 4),
+                    "db_s": round(g.get("db_s", 0.0), 4),
+                    "db_queries": g.get("db_queries", 0),
+                    "json_s": round(g.get("json_s", 0.0), 4),
                     "ip": request.remote_addr,
                 }
             },
@@ -0,0 +1,197 @@
+# backend/report_jobs.py
+# Report jobs: reports are built on a small background pool instead of inside
+# the request. A job is identified by (format, window, data watermark): asking
+# again for the same report reuses the running job or the finished file, and
+# the file name carries the key, so finished reports survive a restart.
+# Job state lives next to the files (REPORTS_DIR/jobs/<id>.json, the id a hash
+# of the key), so any gunicorn worker answers status and download for a job
+# another worker runs. Two workers submitting the same new report at the same
+# moment may both build it; the files are identical and the last rename wins.
+import hashlib, json, os, re, socket, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from cache import quantize_window, response_cache
+from reports import EXTENSIONS, REPORTS_DIR, default_window, generate_kpi_report
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+# report windows snap to this many seconds, so repeated clicks share a file
+REPORT_QUANTUM = int(os.getenv("REPORT_QUANTUM", "3600"))
+# retention: files older than this, or beyond the newest REPORT_MAX_FILES, are deleted
+REPORT_RETENTION_HOURS = float(os.getenv("REPORT_RETENTION_HOURS", "24"))
+REPORT_MAX_FILES = int(os.getenv("REPORT_MAX_FILES", "50"))
+# a queued/running job not updated for this long (its worker died) is built again
+REPORT_JOB_TIMEOUT = float(os.getenv("REPORT_JOB_TIMEOUT", "3600"))
+REPORT_POLL = 0.5   # seconds between state reads while waiting on another worker's job
+
+JOBS_DIR = os.path.join(REPORTS_DIR, "jobs")
+os.makedirs(JOBS_DIR, exist_ok=True)
+HOST = socket.gethostname()
+_JOB_ID = re.compile(r"^[0-9a-f]{20}$")
+
+class Job:
+    def __init__(self, job_id, fmt, from_dt, to_dt, path, status="queued", error=None,
+                 created=None, finished=None, host=HOST, pid=None, updated=None):
+        self.id = job_id
+        self.fmt = fmt
+        self.from_dt = from_dt
+        self.to_dt = to_dt
+        self.path = path
+        self.status = status          # queued | running | done | failed
+        self.error = error
+        self.created = created or time.time()
+        self.finished = finished
+        self.host = host              # worker running it
+        self.pid = pid or os.getpid()
+        self.updated = updated or self.created
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "format": self.fmt,
+            "from": self.from_dt.isoformat(),
+            "to": self.to_dt.isoformat(),
+            "error": self.error,
+            "file": os.path.basename(self.path) if self.status == "done" else None,
+        }
+
+    def state(self) -> dict:
+        return {**self.to_dict(), "path": os.path.basename(self.path), "created": self.created,
+                "finished": self.finished, "host": self.host, "pid": self.pid, "updated": self.updated}
+
+    @classmethod
+    def from_state(cls, s: dict) -> "Job":
+        return cls(s["id"], s["format"], datetime.fromisoformat(s["from"]), datetime.fromisoformat(s["to"]),
+                   os.path.join(REPORTS_DIR, s["path"]), s["status"], s["error"], s["created"],
+                   s["finished"], s["host"], s["pid"], s["updated"])
+
+    def abandoned(self) -> bool:
+        """Queued or running on a worker that is gone."""
+        if self.status not in ("queued", "running"):
+            return False
+        if self.host == HOST:
+            try:
+                os.kill(self.pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return time.time() - self.updated > REPORT_JOB_TIMEOUT
+
+def state_path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+class ReportJobs:
+    def __init__(self, workers: int):
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="reports")
+        self.events = {}   # id -> threading.Event, for jobs running in this process
+        self.lock = threading.Lock()
+
+    def submit(self, fmt="xlsx", from_dt=None, to_dt=None) -> Job:
+        from_dt, to_dt = quantize_window(*default_window(from_dt, to_dt), REPORT_QUANTUM)
+        wm = response_cache.watermark.current()
+        key = (fmt, from_dt.isoformat(), to_dt.isoformat(), wm)
+        job_id = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        name = "kpi_report_{}_{}_wm{}.{}".format(
+            from_dt.strftime("%Y%m%d%H%M"), to_dt.strftime("%Y%m%d%H%M"),
+            "na" if wm is None else wm, EXTENSIONS[fmt])
+        path = os.path.join(REPORTS_DIR, name)
+
+        with self.lock:
+            job = self.get(job_id)
+            if job and not job.abandoned() and (job.status in ("queued", "running")
+                                                or (job.status == "done" and os.path.exists(job.path))):
+                return job
+            job = Job(job_id, fmt, from_dt, to_dt, path)
+            if os.path.exists(path):
+                # built by an earlier process for the same window and data
+                job.status, job.finished = "done", time.time()
+                self.save(job)
+                return job
+            self.events[job_id] = threading.Event()
+            self.save(job)
+        self.pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str):
+        if not _JOB_ID.match(job_id):
+            return None
+        try:
+            with open(state_path(job_id), encoding="utf-8") as f:
+                return Job.from_state(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None   # unknown id, pruned, or not a job id
+
+    def wait(self, job: Job, seconds: float) -> Job:
+        """Up to `seconds` for the job to finish, wherever it runs; its latest state."""
+        deadline = time.monotonic() + seconds
+        event = self.events.get(job.id)
+        if event is not None:
+            event.wait(seconds)
+        while job.status in ("queued", "running") and not job.abandoned() and time.monotonic() < deadline:
+            time.sleep(min(REPORT_POLL, max(0.0, deadline - time.monotonic())))
+            job = self.get(job.id) or job
+        return self.get(job.id) or job
+
+    def save(self, job: Job):
+        # atomic: readers in other workers never see a half-written state file
+        job.updated = time.time()
+        fd, tmp = tempfile.mkstemp(dir=JOBS_DIR, prefix=f"{job.id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(job.state(), f)
+            os.replace(tmp, state_path(job.id))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _run(self, job: Job):
+        job.status = "running"
+        self.save(job)
+        try:
+            generate_kpi_report(job.from_dt, job.to_dt, fmt=job.fmt, path=job.path)
+            job.status = "done"
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            self.save(job)
+            with self.lock:
+                event = self.events.pop(job.id, None)
+            if event is not None:
+                event.set()
+            self.prune()
+
+    def prune(self):
+        """Apply the retention policy to REPORTS_DIR and forget jobs whose files are gone."""
+        cutoff = time.time() - REPORT_RETENTION_HOURS * 3600
+        files = []
+        for name in os.listdir(REPORTS_DIR):
+            fp = os.path.join(REPORTS_DIR, name)
+            if not (name.startswith("kpi_report_") and os.path.isfile(fp)):
+                continue
+            if name.endswith(".tmp"):
+                # a build whose worker died before renaming it
+                if os.path.getmtime(fp) < time.time() - REPORT_JOB_TIMEOUT:
+                    self._remove(fp)
+                continue
+            files.append((os.path.getmtime(fp), fp))
+        files.sort(reverse=True)
+        jobs = [job for job in map(self.get, (n[:-5] for n in os.listdir(JOBS_DIR) if n.endswith(".json"))) if job]
+        active = {j.path for j in jobs if j.status in ("queued", "running") and not j.abandoned()}
+        for i, (mtime, fp) in enumerate(files):
+            if fp in active or (mtime >= cutoff and i < REPORT_MAX_FILES):
+                continue
+            self._remove(fp)
+        for job in jobs:
+            if (job.status in ("done", "failed") or job.abandoned()) and (job.finished or job.updated) < cutoff:
+                self._remove(state_path(job.id))
+
+    @staticmethod
+    def _remove(fp):
+        try:
+            os.remove(fp)
+        except OSError:
+            pass   # already removed by another worker
+
+report_jobs = ReportJobs(REPORT_WORKERS)
@@ -1,73 +1,181 @@
-import os, io
+import csv, io, os, tempfile, zipfile
 from datetime import datetime, timedelta, timezone
-import pandas as pd
 from sqlalchemy import text
+import analytics
 from db import engine
+# xlsxwriter and telemetry_stats (NumPy) are imported by the report jobs that use them,
+# so API workers that never build a report do not load them
 
 REPORTS_DIR = os.path.join(os.path.dirname(__file__), "..", "reports")
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
-def generate_kpi_report(from_dt=None, to_dt=None):
+FORMATS = ("xlsx", "csv", "parquet")
+
+# rows fetched per round trip while streaming a sheet
+FETCH_ROWS = 5000
+
+# --- sheets: (name, columns, arrow types, row generator) ---
+def kpi_rows(conn, from_dt, to_dt):
+    if analytics.enabled():
+        result = analytics.rows(analytics.kpi_summary(from_dt, to_dt))
+    else:
+        result = conn.execution_options(yield_per=FETCH_ROWS).execute(
+            text("EXEC dbo.sp_MachineKpiSummary @From=:f, @To=:t"),
+            {"f": from_dt.isoformat(), "t": to_dt.isoformat()}
+        )
+    for r in result:
+        yield (r.MachineId, r.Name, r.Line, int(r.TotalThroughput or 0), int(r.ErrorCount or 0))
+
+def series_rows(conn, from_dt, to_dt):
+    if analytics.enabled():
+        result = analytics.rows(analytics.throughput_series(from_dt, to_dt, "hour"))
+    else:
+        result = conn.execution_options(yield_per=FETCH_ROWS).execute(
+            text("EXEC dbo.sp_ThroughputSeries @From=:f, @To=:t, @Bucket='hour'"),
+            {"f": from_dt.isoformat(), "t": to_dt.isoformat()}
+        )
+    for r in result:
+        yield (r.BucketTs, int(r.TotalThroughput or 0))
+
+def error_rows(conn, from_dt, to_dt):
+    # Recent errors (via proc)
+    result = conn.execute(text("EXEC dbo.sp_GetLatestLogs @Top=:t, @MachineId=NULL"), {"t": 500})
+    for r in result:
+        if str(r.Type).upper() == "ERROR":
+            yield (r.Ts, r.MachineId, r.MachineName, r.Type, r.Code, r.Message)
+
+def stats_rows(conn, from_dt, to_dt):
+    # per-machine temperature/vibration stats (telemetry_stats.py), one vectorized pass
+    from telemetry_stats import METRICS, clean, compute, epoch_ms, load_frame
+    frame = load_frame(conn, from_dt).window(epoch_ms(from_dt), epoch_ms(to_dt))
+    machines, stats, _, _ = compute(frame)
+    for i, mid in enumerate(machines):
+        row = [int(mid)]
+        for metric in METRICS:
+            s = stats[metric]
+            row += [int(s["count"][i])] + [clean(s[k][i]) for k in ("mean", "std", "p95", "max")]
+            row.append(int(s["anomalies"][i]))
+        yield tuple(row)
+
+STATS_COLUMNS = ["MachineId"] + [f"{p}{c}" for p in ("Temp", "Vib")
+                                 for c in ("Samples", "Mean", "Std", "P95", "Max", "Anomalies")]
+
+SHEETS = [
+    ("KPI Summary", ["MachineId", "Name", "Line", "TotalThroughput", "ErrorCount"],
+     ["int64", "string", "string", "int64", "int64"], kpi_rows),
+    ("Throughput (hourly)", ["Ts", "Throughput"],
+     ["timestamp", "int64"], series_rows),
+    ("Recent Errors", ["Ts", "MachineId", "MachineName", "Type", "Code", "Message"],
+     ["timestamp", "int64", "string", "string", "string", "string"], error_rows),
+    ("Telemetry Stats", STATS_COLUMNS,
+     ["int64"] + ["int64", "float64", "float64", "float64", "float64", "int64"] * 2, stats_rows),
+]
+
+def default_window(from_dt=None, to_dt=None):
     # default last 7 days UTC
     if to_dt is None:
         to_dt = datetime.now(timezone.utc)
     if from_dt is None:
         from_dt = to_dt - timedelta(days=7)
+    return from_dt, to_dt
 
+# --- writers: rows go straight from the cursor into the file ---
+def write_xlsx(path, from_dt, to_dt):
+    import xlsxwriter
+    # constant_memory: each row is flushed to disk once the next one starts
+    wb = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "remove_timezone": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
     with engine.connect() as conn:
-        # KPIs (via proc)
-        kpi_rows = conn.execute(
-            text("EXEC dbo.sp_MachineKpiSummary @From=:f, @To=:t"),
-            {"f": from_dt.isoformat(), "t": to_dt.isoformat()}
-        ).all()
-        kpis = pd.DataFrame([{
-            "MachineId": r.MachineId,
-            "Name": r.Name,
-            "Line": r.Line,
-            "TotalThroughput": int(r.TotalThroughput or 0),
-            "ErrorCount": int(r.ErrorCount or 0),
-        } for r in kpi_rows])
-
-        # Recent errors (via proc)
-        err_rows = conn.execute(text("EXEC dbo.sp_GetLatestLogs @Top=:t, @MachineId=NULL"), {"t": 500}).all()
-        errors = pd.DataFrame([{
-            "Ts": r.Ts, "MachineId": r.MachineId, "MachineName": r.MachineName,
-            "Type": r.Type, "Code": r.Code, "Message": r.Message
-        } for r in err_rows if str(r.Type).upper() == "ERROR"])
-
-        # Throughput series (hourly)
-        series_rows = conn.execute(text("""
-            SELECT DATETRUNC(hour, Ts) AS BucketTs, SUM(Throughput) AS TotalThroughput
-            FROM dbo.Telemetry
-            WHERE Ts BETWEEN :f AND :t
-            GROUP BY DATETRUNC(hour, Ts)
-            ORDER BY BucketTs
-        """), {"f": from_dt.isoformat(), "t": to_dt.isoformat()}).all()
-        series = pd.DataFrame([{"Ts": r.BucketTs, "Throughput": int(r.TotalThroughput or 0)} for r in series_rows])
-
-    # Build workbook in memory, then save
-    ts = to_dt.strftime("%Y%m%d_%H%M%S")
-    path = os.path.join(REPORTS_DIR, f"kpi_report_{ts}.xlsx")
-
-    with pd.ExcelWriter(path, engine="xlsxwriter", datetime_format="yyyy-mm-dd hh:mm:ss") as xw:
-        if not kpis.empty:   kpis.to_excel(xw, index=False, sheet_name="KPI Summary")
-        if not series.empty: series.to_excel(xw, index=False, sheet_name="Throughput (hourly)")
-        if not errors.empty: errors.to_excel(xw, index=False, sheet_name="Recent Errors")
-
-        # Simple formatting
-        for sheet in xw.book.worksheets():
-            sheet.autofilter(0, 0, sheet.dim_rowmax, sheet.dim_colmax)
-            sheet.set_column(0, sheet.dim_colmax, 20)
-
-        # Add a quick chart (optional)
-        if not series.empty:
-            chart = xw.book.add_chart({"type": "line"})
-            chart.add_series({
-                "name": "Throughput",
-                "categories": ["Throughput (hourly)", 1, 0, len(series), 0],
-                "values":     ["Throughput (hourly)", 1, 1, len(series), 1],
-            })
-            chart.set_title({"name": "Throughput Over Time"})
-            xw.book.get_worksheet_by_name("Throughput (hourly)").insert_chart("D2", chart, {"x_scale": 1.2, "y_scale": 1.2})
+        for name, columns, _, rows in SHEETS:
+            sheet = wb.add_worksheet(name)
+            sheet.write_row(0, 0, columns)
+            n = 0
+            for n, row in enumerate(rows(conn, from_dt, to_dt), start=1):
+                sheet.write_row(n, 0, row)
+
+            # Simple formatting
+            sheet.autofilter(0, 0, n, len(columns) - 1)
+            sheet.set_column(0, len(columns) - 1, 20)
+
+            # Add a quick chart
+            if name == "Throughput (hourly)" and n:
+                chart = wb.add_chart({"type": "line"})
+                chart.add_series({
+                    "name": "Throughput",
+                    "categories": [name, 1, 0, n, 0],
+                    "values":     [name, 1, 1, n, 1],
+                })
+                chart.set_title({"name": "Throughput Over Time"})
+                sheet.insert_chart("D2", chart, {"x_scale": 1.2, "y_scale": 1.2})
+    wb.close()
+
+def member_name(sheet: str, ext: str) -> str:
+    return sheet.lower().replace(" (", "_").replace(")", "").replace(" ", "_") + "." + ext
+
+def write_csv(path, from_dt, to_dt):
+    # one CSV per sheet, in a zip
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf, engine.connect() as conn:
+        for name, columns, _, rows in SHEETS:
+            with zf.open(member_name(name, "csv"), "w") as raw:
+                out = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+                w = csv.writer(out)
+                w.writerow(columns)
+                for row in rows(conn, from_dt, to_dt):
+                    w.writerow(row)
+                out.flush()
+                out.detach()
+
+def write_parquet(path, from_dt, to_dt):
+    # one Parquet file per sheet, in a zip; written in row groups of FETCH_ROWS
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("parquet output requires pyarrow (pip install pyarrow)")
+    types = {"int64": pa.int64(), "string": pa.string(), "float64": pa.float64(), "timestamp": pa.timestamp("us")}
+
+    def flush(writer, schema, buf):
+        cols = list(zip(*buf))
+        writer.write_batch(pa.record_batch(
+            [pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema))
+
+    with tempfile.TemporaryDirectory(dir=REPORTS_DIR) as tmp, \
+            zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf, engine.connect() as conn:
+        for name, columns, kinds, rows in SHEETS:
+            schema = pa.schema([(c, types[k]) for c, k in zip(columns, kinds)])
+            part = os.path.join(tmp, member_name(name, "parquet"))
+            with pq.ParquetWriter(part, schema) as writer:
+                buf = []
+                for row in rows(conn, from_dt, to_dt):
+                    buf.append(tuple(v.replace(tzinfo=None) if isinstance(v, datetime) else v for v in row))
+                    if len(buf) >= FETCH_ROWS:
+                        flush(writer, schema, buf)
+                        buf = []
+                if buf:
+                    flush(writer, schema, buf)
+            zf.write(part, os.path.basename(part))
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+EXTENSIONS = {"xlsx": "xlsx", "csv": "csv.zip", "parquet": "parquet.zip"}
+
+def generate_kpi_report(from_dt=None, to_dt=None, fmt="xlsx", path=None):
+    """Write the KPI report for [from_dt, to_dt] and return its path (atomic: tmp file, then rename).
 
+    The tmp file is unique per call, so workers building the same report do not share one.
+    """
+    from_dt, to_dt = default_window(from_dt, to_dt)
+    if path is None:
+        ts = to_dt.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(REPORTS_DIR, f"kpi_report_{ts}.{EXTENSIONS[fmt]}")
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        WRITERS[fmt](tmp, from_dt, to_dt)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
     return path
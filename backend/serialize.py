@@ -0,0 +1,121 @@
+# backend/serialize.py
+# Column-oriented encodings for the tabular reads, chosen with ?format= or Accept:
+#   json     (default) list of objects with ISO timestamps, unchanged
+#   columns  {..., "count": n, "columns": {field: [...]}} with epoch-ms timestamps,
+#            encoded with orjson when installed (pip install orjson)
+#   arrow    Arrow IPC stream of the same columns (requires pyarrow)
+#   msgpack  the columns object as MessagePack (pip install msgpack)
+# Tables from a query are built by transposing the cursor's row tuples, so no
+# dict is made per row.
+import json, time
+from datetime import datetime, timedelta, timezone
+from flask import Response, abort, request
+from instrumentation import add_request_time
+
+FORMATS = {
+    "json": "application/json",
+    "columns": "application/vnd.fdd.columns+json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "msgpack": "application/msgpack",
+}
+# other media types clients send for the same formats
+ACCEPT_ALIASES = {"application/x-msgpack": "msgpack", "application/vnd.apache.arrow.file": "arrow"}
+
+try:
+    import orjson
+except ImportError:   # optional: the stdlib encoder gives the same bytes, slower
+    orjson = None
+
+_EPOCH = datetime(1970, 1, 1)
+_MS = timedelta(milliseconds=1)
+
+def epoch_ms(ts):
+    """Epoch milliseconds of a timestamp (naive = UTC; ISO strings accepted); None stays None."""
+    if ts is None:
+        return None
+    if isinstance(ts, str):   # cached bodies, drivers without a DATETIME2 type
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH) // _MS
+
+def response_format() -> str:
+    """The requested format: ?format= wins over Accept; json when nothing else matches."""
+    fmt = request.args.get("format")
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt not in FORMATS:
+            abort(400, f"Query param 'format' must be one of {', '.join(FORMATS)}")
+        return fmt
+    best = request.accept_mimetypes.best_match(list(FORMATS.values()) + list(ACCEPT_ALIASES),
+                                               default=FORMATS["json"])
+    return ACCEPT_ALIASES.get(best) or next(f for f, m in FORMATS.items() if m == best)
+
+class Table:
+    """Named columns of equal length; `timestamps` name the epoch-ms columns, `meta` rides along."""
+
+    def __init__(self, columns: dict, timestamps=(), meta=None):
+        self.columns = columns
+        self.timestamps = set(timestamps)
+        self.meta = meta or {}
+
+    @classmethod
+    def from_result(cls, keys, rows, fields, meta=None):
+        """fields: (name, result column, is_timestamp); rows: the cursor's row tuples."""
+        keys = list(keys)
+        transposed = list(zip(*rows)) or [()] * len(keys)
+        columns = {}
+        for name, column, is_ts in fields:
+            values = transposed[keys.index(column)]
+            columns[name] = [epoch_ms(v) for v in values] if is_ts else list(values)
+        return cls(columns, [n for n, _, is_ts in fields if is_ts], meta)
+
+    @classmethod
+    def from_records(cls, records, names, timestamps=(), meta=None):
+        """The same from already-built dicts (cached bodies)."""
+        columns = {n: [epoch_ms(r[n]) if n in timestamps else r[n] for r in records] for n in names}
+        return cls(columns, timestamps, meta)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def body(self) -> dict:
+        return {**self.meta, "count": len(self), "columns": self.columns}
+
+# --- encoders ---
+def to_columns_json(table: Table) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(table.body())
+    return json.dumps(table.body(), separators=(",", ":")).encode()
+
+def to_msgpack(table: Table) -> bytes:
+    try:
+        import msgpack
+    except ImportError:
+        abort(406, "format=msgpack needs msgpack on the server (pip install msgpack)")
+    return msgpack.packb(table.body(), use_bin_type=True)
+
+def to_arrow(table: Table) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        abort(406, "format=arrow needs pyarrow on the server (pip install pyarrow)")
+    fields, arrays = [], []
+    for name, values in table.columns.items():
+        arr = pa.array(values, type=pa.timestamp("ms", tz="UTC") if name in table.timestamps else None)
+        fields.append(pa.field(name, arr.type))
+        arrays.append(arr)
+    # meta (bucket, window, ...) travels as JSON values in the schema metadata
+    schema = pa.schema(fields, metadata={k: json.dumps(v) for k, v in table.meta.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return sink.getvalue().to_pybytes()
+
+ENCODERS = {"columns": to_columns_json, "msgpack": to_msgpack, "arrow": to_arrow}
+
+def table_response(table: Table, fmt: str) -> Response:
+    start = time.perf_counter()
+    data = ENCODERS[fmt](table)
+    add_request_time("json_s", time.perf_counter() - start)
+    return Response(data, mimetype=FORMATS[fmt])
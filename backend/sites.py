@@ -0,0 +1,138 @@
+# backend/sites.py
+# Site registry for reads across plants: one FactoryDB per plant, one pooled
+# engine per site, each with its own response cache keyed on that site's ETL
+# watermark. The home site is the database in DB_* (db.py), named SITE_ID;
+# SITES lists the others, each from SITE_<ID>_URL (any SQLAlchemy URL) or
+# SITE_<ID>_SERVER / SITE_<ID>_DB, logging in as SITE_<ID>_USER / SITE_<ID>_PASS
+# (default: DB_USER / DB_PASS):
+#   SITES=izmir,berlin  SITE_IZMIR_SERVER=sql-izmir  SITE_BERLIN_SERVER=sql-berlin
+# fan_out() runs one read per selected site at once. A site that fails or does
+# not answer within SITE_TIMEOUT seconds is left out and reported; the others
+# still answer. Machines are "<site>:<id>" in multi-site responses.
+import contextvars, logging, math, os, re, time
+from concurrent.futures import ThreadPoolExecutor, wait
+from sqlalchemy import event
+import db
+from cache import CACHE_TTL, WATERMARK_POLL, ResponseCache, Watermark, response_cache
+from instrumentation import Counter
+
+SITE_ID = os.getenv("SITE_ID", "local").lower()
+SITES = os.getenv("SITES", "")
+SITE_TIMEOUT = float(os.getenv("SITE_TIMEOUT", "10"))   # seconds per site and read
+SITE_WORKERS = int(os.getenv("SITE_WORKERS", "8"))
+
+log = logging.getLogger("db")
+site_failures = Counter("fdd_site_failures_total", "Site reads left out of a multi-site answer")
+site_pool = ThreadPoolExecutor(SITE_WORKERS, thread_name_prefix="site")
+_SITE_ID = re.compile(r"^[a-z0-9_-]+$")
+
+class Site:
+    def __init__(self, site_id, name, engine, cache, home=False):
+        self.id = site_id
+        self.name = name
+        self.engine = engine
+        self.cache = cache
+        self.home = home
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "home": self.home}
+
+registry = {}   # site id -> Site, home first
+
+def add(site_id, engine, name=None) -> Site:
+    """Register another site's database (bench/standin.py adds SQLite sites this way)."""
+    site_id = site_id.strip().lower()
+    if not _SITE_ID.match(site_id):
+        raise ValueError(f"site id {site_id!r}: use lowercase letters, digits, '-' and '_'")
+    cache = ResponseCache(response_cache.store, CACHE_TTL, Watermark(WATERMARK_POLL, engine),
+                          prefix=f"site={site_id}|")
+    registry[site_id] = Site(site_id, name or site_id, engine, cache)
+    return registry[site_id]
+
+def site_engine(site_id):
+    """Engine for SITES entry `site_id`, from its SITE_<ID>_* settings."""
+    env = lambda key, default=None: os.getenv(f"SITE_{site_id.upper().replace('-', '_')}_{key}", default)
+    url = env("URL")
+    if url is None:
+        if env("SERVER") is None:
+            raise RuntimeError(f"site {site_id}: set SITE_{site_id.upper()}_URL or SITE_{site_id.upper()}_SERVER")
+        url = db.odbc_url(env("SERVER"), env("DB", db.DB_NAME), env("USER", db.DB_USER), env("PASS", db.DB_PASS))
+    options = {"pool_timeout": SITE_TIMEOUT}
+    if url.startswith("mssql+pyodbc"):
+        options["connect_args"] = {"timeout": math.ceil(SITE_TIMEOUT)}   # login timeout
+    engine = db.make_engine(url, pool_gauges=False, **options)
+
+    @event.listens_for(engine, "connect")
+    def _query_timeout(dbapi_conn, record):
+        # pyodbc: statements are cancelled after this long, so a read the fan-out gave up on stops too
+        if hasattr(dbapi_conn, "timeout"):
+            dbapi_conn.timeout = math.ceil(SITE_TIMEOUT)
+
+    return engine
+
+registry[SITE_ID] = Site(SITE_ID, os.getenv("SITE_NAME", SITE_ID), db.engine, response_cache, home=True)
+for _id in filter(None, (s.strip().lower() for s in SITES.split(","))):
+    if _id != SITE_ID:
+        add(_id, site_engine(_id), os.getenv(f"SITE_{_id.upper().replace('-', '_')}_NAME"))
+
+# --- selection and ids ---
+def select(raw: str):
+    """Sites named by a sites= value ("all" or comma-separated ids), in registry order."""
+    if raw.strip().lower() == "all":
+        return list(registry.values())
+    ids = {s.strip().lower() for s in raw.split(",") if s.strip()}
+    if not ids:
+        raise ValueError("Query param 'sites' must be 'all' or a comma-separated list of site ids")
+    unknown = sorted(ids - set(registry))
+    if unknown:
+        raise ValueError(f"Unknown site(s) {', '.join(unknown)}; known: {', '.join(registry)}")
+    return [site for site_id, site in registry.items() if site_id in ids]
+
+def qualify(site_id, machine_id) -> str:
+    return f"{site_id}:{machine_id}"
+
+def split_id(raw: str):
+    """("izmir", 3) from "izmir:3"; ValueError otherwise."""
+    site_id, sep, machine_id = raw.strip().partition(":")
+    if not sep:
+        raise ValueError(raw)
+    return site_id.lower(), int(machine_id)
+
+# --- fan-out ---
+def fan_out(selected, fn):
+    """fn(site) for every selected site at once: ({site id: result}, {site id: "timeout" | "error"})."""
+    # in the caller's context, so asgi.py can cancel an abandoned request's site queries
+    futures = {site.id: site_pool.submit(contextvars.copy_context().run, fn, site) for site in selected}
+    done, _ = wait(futures.values(), timeout=SITE_TIMEOUT)
+    results, failed = {}, {}
+    for site_id, future in futures.items():
+        if future not in done:
+            failed[site_id] = "timeout"
+        elif future.exception() is not None:
+            failed[site_id] = "error"
+            log.warning("site_read_failed", extra={"extra": {"site": site_id, "error": str(future.exception())}})
+        else:
+            results[site_id] = future.result()
+    for site_id, reason in failed.items():
+        site_failures.inc(site=site_id, reason=reason)
+    return results, failed
+
+def known_version(selected):
+    """(version, updated_at) over the selected sites' watermarks, or (None, None) until each is known.
+
+    Other sites' watermarks are refreshed in the background, so revalidating
+    (http_cache.py) never waits on a slow site.
+    """
+    versions, updated = [], []
+    for site in selected:
+        wm = site.cache.watermark
+        if site.home:
+            wm.current()
+        elif time.monotonic() - wm.checked >= wm.poll:
+            site_pool.submit(wm.current)
+        if wm.version is None:
+            return None, None
+        versions.append(f"{site.id}.{wm.version}")
+        if wm.updated_at is not None:
+            updated.append(wm.updated_at)
+    return "-".join(versions), max(updated, default=None)
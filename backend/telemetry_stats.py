@@ -0,0 +1,361 @@
+# backend/telemetry_stats.py
+# Temperature/vibration statistics over dbo.Telemetry, computed with NumPy over
+# all machines at once: rows are held as columns sorted by (machine, ts), and
+# per-machine aggregates, percentiles and trailing rolling mean/std (with z-score
+# anomaly flags) come from cumulative sums and group offsets, not Python loops.
+# The loaded columns are kept between requests; a refresh only fetches the
+# newest rows (by Id), an earlier window only the rows before the loaded ones.
+import os, threading, time
+from collections import deque
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import text
+from db import engine
+from downsample import lttb
+
+METRICS = ("temperature", "vibration")
+PERCENTILES = (50, 95, 99)
+
+# trailing samples per machine behind each rolling mean/std
+STATS_WINDOW = int(os.getenv("STATS_WINDOW", "60"))
+# |z| at or above this flags an anomaly
+STATS_Z = float(os.getenv("STATS_Z", "3"))
+# longest window the API accepts; bounds the memory held by the loaded columns
+STATS_MAX_DAYS = int(os.getenv("STATS_MAX_DAYS", "93"))
+# a window starting more than this many days after the cached frame trims it (frees the older rows)
+STATS_REUSE_DAYS = float(os.getenv("STATS_REUSE_DAYS", "1"))
+# parallel ETL writers commit Ids out of order: a refresh re-reads the Ids above
+# the highest one seen this many seconds ago
+STATS_SETTLE = float(os.getenv("STATS_SETTLE", "10"))
+
+FETCH_ROWS = 50000
+
+# Ts as epoch milliseconds, so no datetime objects are built per row
+LOAD_SQL = """
+SELECT Id, MachineId, DATEDIFF_BIG(MILLISECOND, '1970-01-01', Ts) AS TsMs, Temperature, Vibration
+FROM dbo.Telemetry
+WHERE Ts >= :f {extra}
+"""
+
+def sort_by(primary, secondary):
+    """Permutation ordering rows by (primary, secondary). Rows arrive in Id order, so
+    secondary (ts) is usually already ascending within each primary (machine): one
+    stable radix pass on the int primary, and the full two-pass sort only if not."""
+    order = np.argsort(primary, kind="stable")
+    p, s = primary[order], secondary[order]
+    if np.all((p[1:] != p[:-1]) | (s[1:] >= s[:-1])):
+        return order
+    order = np.argsort(secondary, kind="stable")
+    return order[np.argsort(primary[order], kind="stable")]
+
+def epoch_ms(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+def ms_iso(ms) -> str:
+    return datetime.fromtimestamp(int(ms) / 1000, timezone.utc).replace(tzinfo=None).isoformat()
+
+# --- columns ---
+class Frame:
+    """Telemetry columns sorted by (machine, ts)."""
+
+    def __init__(self, ids, machine, ts, temperature, vibration):
+        order = sort_by(machine, ts)
+        self.ids = ids[order]
+        self.machine = machine[order]
+        self.ts = ts[order]
+        self.values = {"temperature": temperature[order], "vibration": vibration[order]}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.int64),
+                   np.empty(0), np.empty(0))
+
+    def concat(self, other: "Frame") -> "Frame":
+        if not len(other):
+            return self
+        return Frame(np.concatenate((self.ids, other.ids)), np.concatenate((self.machine, other.machine)),
+                     np.concatenate((self.ts, other.ts)),
+                     np.concatenate((self.values["temperature"], other.values["temperature"])),
+                     np.concatenate((self.values["vibration"], other.values["vibration"])))
+
+    def select(self, mask) -> "Frame":
+        out = Frame.__new__(Frame)
+        out.ids, out.machine, out.ts = self.ids[mask], self.machine[mask], self.ts[mask]
+        out.values = {m: v[mask] for m, v in self.values.items()}
+        return out
+
+    def window(self, from_ms, to_ms, machine_ids=None) -> "Frame":
+        mask = (self.ts >= from_ms) & (self.ts < to_ms)
+        if machine_ids:
+            mask &= np.isin(self.machine, machine_ids)
+        return self.select(mask)
+
+def load_frame(conn, from_dt, after_id=None, before_dt=None) -> Frame:
+    """All telemetry with Ts >= from_dt (and Id > after_id, Ts < before_dt), fetched in FETCH_ROWS partitions."""
+    extra, params = "", {"f": from_dt.isoformat()}
+    if after_id is not None:
+        extra, params["a"] = extra + " AND Id > :a", int(after_id)
+    if before_dt is not None:
+        extra, params["b"] = extra + " AND Ts < :b", before_dt.isoformat()
+    result = conn.execution_options(yield_per=FETCH_ROWS).execute(text(LOAD_SQL.format(extra=extra)), params)
+    parts = []
+    for rows in result.partitions():
+        ids, machine, ts, temperature, vibration = zip(*rows)
+        # None (NULL reading) becomes NaN
+        parts.append((np.array(ids, np.int64), np.array(machine, np.int32), np.array(ts, np.int64),
+                      np.array(temperature, np.float64), np.array(vibration, np.float64)))
+    if not parts:
+        return Frame.empty()
+    return Frame(*(np.concatenate(cols) for cols in zip(*parts)))
+
+# --- vectorized statistics ---
+def groups(machine):
+    """(machine ids, start offset per group, group index per row) of a machine-sorted column."""
+    if not len(machine):
+        return machine[:0], np.empty(0, np.int64), np.empty(0, np.int64)
+    starts = np.flatnonzero(np.r_[True, machine[1:] != machine[:-1]])
+    gid = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(machine)]))
+    return machine[starts], starts, gid
+
+def group_stats(values, gid, n_groups):
+    """count/mean/std/min/max and PERCENTILES per group, NaNs ignored."""
+    valid = ~np.isnan(values)
+    v, g = values[valid], gid[valid]
+    count = np.bincount(g, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(g, weights=v, minlength=n_groups) / count
+        dev = v - mean[g]
+        std = np.sqrt(np.bincount(g, weights=dev * dev, minlength=n_groups) / (count - 1))
+
+    # sort values within each group once (groups are contiguous, and an in-place
+    # np.sort per slice is far cheaper than an argsort); min/max/percentiles are
+    # then offsets into it
+    first = np.r_[0, np.cumsum(count)[:-1]]
+    sv = v.copy()
+    for a, c in zip(first, count):
+        sv[a:a + c].sort()
+    last = np.maximum(count - 1, 0)
+    has = count > 0
+    out = {
+        "count": count,
+        "mean": mean,
+        "std": np.where(count > 1, std, np.nan),
+        "min": np.where(has, sv[np.minimum(first, len(sv) - 1)] if len(sv) else np.nan, np.nan),
+        "max": np.where(has, sv[np.minimum(first + last, len(sv) - 1)] if len(sv) else np.nan, np.nan),
+    }
+    for q in PERCENTILES:
+        # linear interpolation, as np.percentile's default
+        pos = last * (q / 100.0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        frac = pos - lo
+        if len(sv):
+            a = sv[np.minimum(first + lo, len(sv) - 1)]
+            b = sv[np.minimum(first + hi, len(sv) - 1)]
+            out[f"p{q}"] = np.where(has, a + (b - a) * frac, np.nan)
+        else:
+            out[f"p{q}"] = np.full(n_groups, np.nan)
+    return out
+
+def rolling(values, starts, gid, window: int):
+    """Mean/std over the `window` rows before each row (same machine, NULLs skipped),
+    and the row's z-score against them."""
+    n = len(values)
+    valid = ~np.isnan(values)
+    # center per machine so the running sums stay small (no cancellation in var)
+    counts = np.bincount(gid, weights=valid, minlength=len(starts))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        center = np.bincount(gid, weights=np.where(valid, values, 0.0), minlength=len(starts)) / counts
+    center = np.nan_to_num(center)[gid]
+    x = np.where(valid, values - center, 0.0)
+    cs = np.r_[0.0, np.cumsum(x)]
+    cs2 = np.r_[0.0, np.cumsum(x * x)]
+    cn = np.r_[0, np.cumsum(valid)]
+
+    idx = np.arange(n)
+    lo = np.maximum(starts[gid], idx - window)
+    cnt = cn[idx] - cn[lo]
+    s = cs[idx] - cs[lo]
+    s2 = cs2[idx] - cs2[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / cnt
+        var = np.maximum(s2 - s * mean, 0.0) / (cnt - 1)
+        # no z-score until half the window has been seen
+        std = np.where(cnt >= max(2, window // 2), np.sqrt(var), np.nan)
+        z = (x - mean) / std
+    z[~valid | ~(std > 0)] = np.nan
+    return mean + center, std, z
+
+def compute(frame: Frame, window: int = STATS_WINDOW, z_limit: float = STATS_Z):
+    """Per-machine stats and anomaly rows for a machine-sorted frame.
+
+    Returns (machine ids, {metric: group stats + "anomalies" count},
+    {metric: (row indexes, z) of the anomalies}, {metric: (rolling mean, std, z)}).
+    """
+    machines, starts, gid = groups(frame.machine)
+    stats, anomalies, rolls = {}, {}, {}
+    for metric in METRICS:
+        values = frame.values[metric]
+        stats[metric] = group_stats(values, gid, len(machines))
+        mean, std, z = rolling(values, starts, gid, window)
+        rows = np.flatnonzero(np.abs(np.nan_to_num(z)) >= z_limit)
+        stats[metric]["anomalies"] = np.bincount(gid[rows], minlength=len(machines))
+        anomalies[metric] = (rows, z[rows])
+        rolls[metric] = (mean, std, z)
+    return machines, stats, anomalies, rolls
+
+# --- incrementally refreshed frame ---
+class TelemetryStore:
+    """Keeps the telemetry since some `from` in memory and tops it up with new rows.
+
+    A top-up re-reads the Ids above the highest one seen STATS_SETTLE seconds ago
+    and skips the rows already held. A window starting before the frame loads
+    only the rows before it; one starting well after it trims the frame. The
+    DB reads run outside the store lock, so requests are not queued behind one
+    another's load. Rows changed or deleted in place (not through the ETL) are
+    not picked up, and neither are rows still uncommitted at the first load.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.from_dt = None
+        self.max_id = None
+        self.cursor = None                      # top-ups read the Ids above this
+        self.recent = np.empty(0, np.int64)     # held Ids above the cursor
+        self.marks = deque()                    # (monotonic time, max_id): the cursor moves up once settled
+        self.lock = threading.Lock()            # guards the fields above; never held across a query
+        self.load_lock = threading.Lock()       # one first load or backfill at a time
+
+    def get(self, from_dt) -> Frame:
+        with self.lock:
+            held_from = self.from_dt
+        if held_from is None or from_dt < held_from:
+            self._extend(from_dt)
+        elif (from_dt - held_from).total_seconds() > STATS_REUSE_DAYS * 86400:
+            self._trim(from_dt)
+        self._top_up()
+        with self.lock:
+            return self.frame
+
+    def _extend(self, from_dt):
+        """Load the rows from from_dt up to the held frame (all of them the first time)."""
+        with self.load_lock:
+            with self.lock:
+                held_from = self.from_dt
+            if held_from is not None and held_from <= from_dt:
+                return   # loaded by another request meanwhile
+            with engine.connect() as conn:
+                new = load_frame(conn, from_dt, before_dt=held_from)
+            with self.lock:
+                if self.frame is None:
+                    self.frame = new
+                    self.max_id = self.cursor = int(new.ids.max()) if len(new) else 0
+                else:
+                    # Ids above the cursor may also come through a concurrent top-up
+                    new = new.select(~np.isin(new.ids, self.recent))
+                    self.frame = self.frame.concat(new)
+                    self._hold(new)
+                self.from_dt = from_dt
+
+    def _trim(self, from_dt):
+        if not self.load_lock.acquire(blocking=False):
+            return   # a load is running; trim on a later request
+        try:
+            with self.lock:
+                if self.from_dt < from_dt:
+                    self.frame = self.frame.select(self.frame.ts >= epoch_ms(from_dt))
+                    self.from_dt = from_dt
+        finally:
+            self.load_lock.release()
+
+    def _top_up(self):
+        with self.lock:
+            from_dt, cursor = self.from_dt, self.cursor
+        with engine.connect() as conn:
+            new = load_frame(conn, from_dt, after_id=cursor)
+        with self.lock:
+            # the cursor may have moved on meanwhile: Ids at or below it are held already
+            new = new.select((new.ids > self.cursor) & ~np.isin(new.ids, self.recent)
+                             & (new.ts >= epoch_ms(self.from_dt)))
+            self.frame = self.frame.concat(new)
+            self._hold(new)
+            now = time.monotonic()
+            self.marks.append((now, self.max_id))
+            while self.marks and now - self.marks[0][0] >= STATS_SETTLE:
+                self.cursor = max(self.cursor, self.marks.popleft()[1])
+            self.recent = self.recent[self.recent > self.cursor]
+
+    def _hold(self, new: Frame):
+        if len(new):
+            self.recent = np.concatenate((self.recent, new.ids[new.ids > self.cursor]))
+            self.max_id = max(self.max_id, int(new.ids.max()))
+
+store = TelemetryStore()
+
+def clean(x):
+    x = float(x)
+    return None if np.isnan(x) else round(x, 4)
+
+def telemetry_stats(from_dt, to_dt, machine_ids=None, window=STATS_WINDOW, z_limit=STATS_Z,
+                    limit=100, rolling_points=None, frame=None):
+    """JSON-ready stats for [from_dt, to_dt): one entry per machine, the `limit` strongest
+    anomalies and, for a single machine, the rolling series (downsampled to rolling_points)."""
+    if frame is None:
+        frame = store.get(from_dt)
+    frame = frame.window(epoch_ms(from_dt), epoch_ms(to_dt), machine_ids)
+    machines, stats, anomalies, rolls = compute(frame, window, z_limit)
+
+    body = {
+        "from": from_dt.isoformat(),
+        "to": to_dt.isoformat(),
+        "window": window,
+        "z": z_limit,
+        "samples": len(frame),
+        "machines": [],
+        "anomalies": [],
+    }
+    for i, mid in enumerate(machines):
+        entry = {"machineId": int(mid), "samples": 0}
+        for metric in METRICS:
+            s = stats[metric]
+            entry["samples"] = max(entry["samples"], int(s["count"][i]))
+            entry[metric] = {k: (int(s[k][i]) if k in ("count", "anomalies") else clean(s[k][i])) for k in s}
+        body["machines"].append(entry)
+
+    found = []
+    for metric in METRICS:
+        rows, z = anomalies[metric]
+        mean, std, _ = rolls[metric]
+        # strongest first; argpartition keeps this O(n) for large anomaly sets
+        if len(rows) > limit:
+            keep = np.argpartition(-np.abs(z), limit - 1)[:limit]
+            rows, z = rows[keep], z[keep]
+        for r, zr in zip(rows, z):
+            found.append({
+                "machineId": int(frame.machine[r]),
+                "ts": ms_iso(frame.ts[r]),
+                "metric": metric,
+                "value": clean(frame.values[metric][r]),
+                "mean": clean(mean[r]),
+                "std": clean(std[r]),
+                "z": clean(zr),
+            })
+    found.sort(key=lambda a: -abs(a["z"]))
+    body["anomalies"] = found[:limit]
+
+    if rolling_points and len(machines) == 1:
+        series = {}
+        for metric in METRICS:
+            mean, std, z = rolls[metric]
+            values = frame.values[metric]
+            pts = [(int(t), float(v), float(m), float(s), float(zz))
+                   for t, v, m, s, zz in zip(frame.ts, values, mean, std, z) if not np.isnan(v)]
+            series[metric] = [{"ts": ms_iso(t), "value": clean(v), "mean": clean(m), "std": clean(s), "z": clean(zz)}
+                              for t, v, m, s, zz in lttb(pts, rolling_points)]
+        body["rolling"] = series
+    return body
@@ -0,0 +1,97 @@
+# bench/etl_bench.py
+# ETL throughput benchmark: runs etl/ingest_logs.py unchanged (same parsing,
+# dedupe, state and chunked writes) against the SQLite stand-in and reports
+# rows/s and peak RSS. Data comes from --data or is generated first with the
+# same options as bench/generate.py.
+#
+#   python bench/etl_bench.py --machines 200 --days 2 --interval 30 --workers 1
+#   python bench/etl_bench.py --data .bench/data --db .bench/standin.sqlite3 --keep-db
+import argparse, os, shutil, sys, tempfile, time
+from pathlib import Path
+
+from sqlalchemy import text
+
+import generate
+from results import peak_rss_mb, record
+from standin import ROOT, make_engine
+
+def count_rows(engine) -> dict:
+    with engine.connect() as conn:
+        return {t: conn.execute(text(f"SELECT COUNT(*) FROM dbo.{t}")).scalar() for t in ("Events", "Telemetry")}
+
+def run(data_dir: Path, db_path: Path, workers: int, batch_size: int) -> dict:
+    state_dir = Path(tempfile.mkdtemp(prefix="etl_state_", dir=db_path.parent))
+    # ingest_logs reads its config at import time
+    os.environ.update(DATA_DIR=str(data_dir), STATE_DIR=str(state_dir))
+    os.environ.setdefault("ODBC_DRIVER", "ODBC Driver 18 for SQL Server")
+    sys.path.insert(0, str(ROOT / "etl"))
+    import ingest_logs
+
+    engine = make_engine(db_path)
+    # worker processes are forked and inherit the swapped engine
+    ingest_logs.engine = engine
+    before = count_rows(engine)
+    argv = ["--workers", str(workers), "--batch-size", str(batch_size)]
+
+    started = time.perf_counter()
+    try:
+        ingest_logs.main(argv)
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError(f"ETL exited with {e.code}")
+    elapsed = time.perf_counter() - started
+
+    after = count_rows(engine)
+    shutil.rmtree(state_dir, ignore_errors=True)
+    rows = {t: after[t] - before[t] for t in after}
+    total = sum(rows.values())
+    input_mb = sum(fp.stat().st_size for fp in data_dir.iterdir() if fp.is_file()) / 1e6
+    return {
+        "rows": total,
+        "events": rows["Events"],
+        "telemetry": rows["Telemetry"],
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(total / elapsed, 1) if elapsed else None,
+        "input_mb": round(input_mb, 2),
+        "mb_per_s": round(input_mb / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_workers_mb": peak_rss_mb(children=True) if workers > 1 else None,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ETL throughput benchmark on the SQLite stand-in")
+    ap.add_argument("--data", help="input directory; generated into a temp dir when omitted")
+    ap.add_argument("--db", default=None, help="stand-in database (default: a fresh temp file)")
+    ap.add_argument("--keep-db", action="store_true", help="keep the database, e.g. to serve it to bench/load.py")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--batch-size", type=int, default=5000)
+    generate.add_args(ap)
+    args = ap.parse_args(argv)
+
+    work = Path(tempfile.mkdtemp(prefix="etl_bench_", dir=ROOT / ".bench" if (ROOT / ".bench").exists() else None))
+    try:
+        data_dir = Path(args.data).resolve() if args.data else work / "data"
+        if not args.data:
+            totals = generate.generate_from_args(args, data_dir)
+            print(f"[BENCH] generated {totals['telemetry']} telemetry + {totals['events']} events rows")
+        db_path = Path(args.db).resolve() if args.db else work / "standin.sqlite3"
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        metrics = run(data_dir, db_path, args.workers, args.batch_size)
+        params = {"workers": args.workers, "batch_size": args.batch_size, "data": args.data}
+        if not args.data:
+            params.update(machines=args.machines, days=args.days, interval=args.interval,
+                          events_per_machine=args.events_per_machine, seed=args.seed)
+        record("etl", params, metrics)
+        print(f"[BENCH] etl: {metrics['rows']} rows in {metrics['seconds']}s = {metrics['rows_per_s']:,.0f} rows/s, "
+              f"{metrics['mb_per_s']} MB/s, peak RSS {metrics['peak_rss_mb']} MB")
+        if args.keep_db or args.db:
+            print(f"[BENCH] database: {db_path}")
+    finally:
+        if not args.keep_db and not args.db:
+            shutil.rmtree(work, ignore_errors=True)
+        elif not args.data:
+            shutil.rmtree(work / "data", ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
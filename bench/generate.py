@@ -0,0 +1,138 @@
+# bench/generate.py
+# Deterministic synthetic factory data in the ETL's input formats: one
+# events_<day>.csv and one telemetry_<day>.jsonl (or .json array) per day.
+# Every file is derived from (seed, day, kind) only, so the same arguments
+# always give byte-identical files and a single day can be regenerated alone.
+# Telemetry is written as it is produced and events are held one day at a
+# time, so memory does not grow with the number of days.
+#
+#   python bench/generate.py --out .bench/data --machines 1000 --days 30 --interval 1
+import argparse, json, math, random, time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+EVENT_TYPES = [("START", 0.3), ("STOP", 0.3), ("MAINT", 0.1), ("ERROR", 0.3)]
+ERRORS = [
+    ("E42", "Motor vibration detected"), ("E55", "Jammed carton detected"),
+    ("E77", "Sensor misalignment"), ("E88", "Coolant low"), ("E99", "Overheating detected"),
+]
+MESSAGES = {"START": "Line started", "STOP": "Operator stop for inspection", "MAINT": "Scheduled maintenance"}
+
+def machine_name(i: int) -> str:
+    return f"Machine {i:05d}"
+
+def machine_profile(seed: int, i: int):
+    """Stable per-machine baseline: (temperature, vibration, throughput)."""
+    r = random.Random(f"{seed}:machine:{i}")
+    return r.uniform(40, 70), r.uniform(0.5, 2.5), r.randint(80, 240)
+
+def iso(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def telemetry_day(seed, day: datetime, machines: int, interval: int, anomaly_rate: float):
+    """(name, ts, temperature, vibration, throughput) in time order, all machines per tick."""
+    r = random.Random(f"{seed}:telemetry:{day:%Y-%m-%d}")
+    profiles = [machine_profile(seed, i) for i in range(1, machines + 1)]
+    names = [machine_name(i) for i in range(1, machines + 1)]
+    for s in range(0, 86400, interval):
+        ts = iso(day + timedelta(seconds=s))
+        # daily cycle shared by all machines, plus per-reading noise
+        cycle = math.sin(2 * math.pi * s / 86400)
+        for name, (temp, vib, thr) in zip(names, profiles):
+            t = temp + 5 * cycle + r.gauss(0, 1)
+            v = vib + 0.1 * cycle + r.gauss(0, 0.05)
+            if r.random() < anomaly_rate:
+                t += r.uniform(15, 30)
+                v *= 2
+            yield name, ts, round(t, 2), round(v, 3), max(0, int(thr * (1 + 0.2 * cycle) + r.gauss(0, 5)))
+
+def events_day(seed, day: datetime, machines: int, per_machine: int):
+    """(name, type, code, message, ts), sorted by ts."""
+    r = random.Random(f"{seed}:events:{day:%Y-%m-%d}")
+    kinds, weights = zip(*EVENT_TYPES)
+    rows = []
+    for i in range(1, machines + 1):
+        for _ in range(per_machine):
+            typ = r.choices(kinds, weights)[0]
+            code, msg = r.choice(ERRORS) if typ == "ERROR" else (None, MESSAGES[typ])
+            rows.append((iso(day + timedelta(seconds=r.randrange(86400))), machine_name(i), typ, code, msg))
+    rows.sort()
+    for ts, name, typ, code, msg in rows:
+        yield name, typ, code, msg, ts
+
+def csv_field(v) -> str:
+    if v is None:
+        return ""
+    v = str(v)
+    return '"' + v.replace('"', '""') + '"' if any(c in v for c in ',"\n') else v
+
+def write_events(fp: Path, rows) -> int:
+    n = 0
+    with fp.open("w", encoding="utf-8", newline="") as f:
+        f.write("MachineName,Type,Code,Message,Ts\n")
+        for n, row in enumerate(rows, start=1):
+            f.write(",".join(csv_field(v) for v in row) + "\n")
+    return n
+
+def write_telemetry(fp: Path, rows, as_array: bool) -> int:
+    n = 0
+    with fp.open("w", encoding="utf-8") as f:
+        if as_array:
+            f.write("[\n")
+        for n, (name, ts, t, v, thr) in enumerate(rows, start=1):
+            item = json.dumps({"MachineName": name, "Ts": ts, "Temperature": t, "Vibration": v, "Throughput": thr})
+            if as_array:
+                f.write((",\n  " if n > 1 else "  ") + item)
+            else:
+                f.write(item + "\n")
+        if as_array:
+            f.write("\n]\n")
+    return n
+
+def generate(out: Path, machines: int, days: int, interval: int, events_per_machine: int,
+             start: datetime, seed: int = 42, anomaly_rate: float = 0.0005, telemetry_format: str = "jsonl"):
+    """Write the files; returns {"events": rows, "telemetry": rows, "files": n}."""
+    out.mkdir(parents=True, exist_ok=True)
+    totals = {"events": 0, "telemetry": 0, "files": 0}
+    for d in range(days):
+        day = start + timedelta(days=d)
+        totals["events"] += write_events(out / f"events_{day:%Y-%m-%d}.csv",
+                                         events_day(seed, day, machines, events_per_machine))
+        ext = "json" if telemetry_format == "json" else "jsonl"
+        totals["telemetry"] += write_telemetry(out / f"telemetry_{day:%Y-%m-%d}.{ext}",
+                                               telemetry_day(seed, day, machines, interval, anomaly_rate),
+                                               as_array=ext == "json")
+        totals["files"] += 2
+    return totals
+
+def add_args(ap):
+    ap.add_argument("--machines", type=int, default=100)
+    ap.add_argument("--days", type=int, default=1)
+    ap.add_argument("--interval", type=int, default=60, help="seconds between telemetry samples per machine")
+    ap.add_argument("--events-per-machine", type=int, default=20, help="events per machine per day")
+    ap.add_argument("--start", default="2025-08-01", help="first day (UTC)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--anomaly-rate", type=float, default=0.0005, help="share of telemetry readings with a spike")
+    ap.add_argument("--telemetry-format", choices=["jsonl", "json"], default="jsonl")
+
+def generate_from_args(args, out: Path):
+    start = datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc)
+    return generate(out, args.machines, args.days, args.interval, args.events_per_machine, start,
+                    args.seed, args.anomaly_rate, args.telemetry_format)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate deterministic events CSV / telemetry JSON for benchmarks")
+    ap.add_argument("--out", default=".bench/data", help="output directory (ETL DATA_DIR)")
+    add_args(ap)
+    args = ap.parse_args(argv)
+    if args.interval < 1 or 86400 % args.interval:
+        ap.error("--interval must divide 86400")
+    started = time.perf_counter()
+    totals = generate_from_args(args, Path(args.out))
+    elapsed = time.perf_counter() - started
+    rows = totals["events"] + totals["telemetry"]
+    print(f"[BENCH] {totals['telemetry']} telemetry + {totals['events']} events rows in {totals['files']} files "
+          f"-> {args.out} in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# bench/load.py
+# HTTP load driver: hits each endpoint with N concurrent keep-alive clients
+# for a fixed time (or request count) and reports p50/p95/p99 latency,
+# requests/s and errors per endpoint. Targets a running API (--base-url) or
+# starts one on the SQLite stand-in in a subprocess (--standin), so the
+# driver and the server do not share a GIL.
+#
+#   python bench/load.py --standin .bench/standin.sqlite3 --concurrency 8 --duration 10
+#   python bench/load.py --base-url http://localhost:5000 --endpoint /dashboard --requests 500
+import argparse, http.client, os, subprocess, sys, threading, time
+from urllib.parse import urlsplit
+
+from results import percentile, record
+from standin import ROOT
+
+# window matching bench/generate.py's default --start
+WINDOW = "from=2025-08-01T00:00:00Z&to=2025-08-08T00:00:00Z"
+ENDPOINTS = [
+    "/machines",
+    f"/sp/kpis?{WINDOW}",
+    f"/metrics/throughput?bucket=hour&{WINDOW}",
+    f"/metrics/throughput?bucket=hour&machineIds=all&maxPoints=200&{WINDOW}",
+    f"/metrics/telemetry-stats?{WINDOW}&limit=20",
+    "/sp/latest-logs?top=50",
+    f"/events/search?type=ERROR&q=coolant&{WINDOW}",
+    "/logs/1?limit=100",
+    f"/dashboard?bucket=hour&maxPoints=500&{WINDOW}",
+]
+
+def worker(base, path, deadline, budget, latencies, errors, lock):
+    parts = urlsplit(base)
+    cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = cls(parts.hostname, parts.port, timeout=60)
+    prefix = parts.path.rstrip("/")
+    mine, bad = [], 0
+    while time.perf_counter() < deadline:
+        with lock:
+            if budget[0] == 0:
+                break
+            budget[0] -= 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", prefix + path, headers={"Accept-Encoding": "identity"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 400:
+                bad += 1
+        except (OSError, http.client.HTTPException):
+            bad += 1
+            conn.close()
+        mine.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        latencies.extend(mine)
+        errors[0] += bad
+
+def hit(base, path, concurrency, duration, requests):
+    """Latency summary (ms) of `path` under `concurrency` clients."""
+    latencies, errors, lock = [], [0], threading.Lock()
+    budget = [requests if requests else -1]   # -1: unlimited, stop on the deadline
+    deadline = time.perf_counter() + (duration if not requests else 1e9)
+    threads = [threading.Thread(target=worker, args=(base, path, deadline, budget, latencies, errors, lock))
+               for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    ms = lambda q: round(percentile(latencies, q) * 1000, 2)
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(50),
+        "p95_ms": ms(95),
+        "p99_ms": ms(99),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+def wait_ready(base, proc, timeout=60):
+    parts = urlsplit(base)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"stand-in server exited with {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request("GET", "/machines")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("stand-in server did not come up")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTTP load driver: p50/p95/p99 per endpoint")
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="running API, e.g. http://localhost:5000")
+    target.add_argument("--standin", help="serve this stand-in database (bench/standin.py) for the run")
+    ap.add_argument("--port", type=int, default=5055, help="port for --standin")
+    ap.add_argument("--workers", type=int, default=0,
+                    help="with --standin: gunicorn workers (backend/gunicorn.conf.py); 0 = dev server")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=10, help="seconds per endpoint")
+    ap.add_argument("--requests", type=int, default=0, help="requests per endpoint instead of --duration")
+    ap.add_argument("--warmup", type=int, default=5, help="untimed requests per endpoint first")
+    ap.add_argument("--endpoint", action="append", help="path to hit (repeatable; default: a standard set)")
+    args = ap.parse_args(argv)
+
+    server = None
+    base = args.base_url
+    if args.standin:
+        base = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen([sys.executable, str(ROOT / "bench" / "standin.py"), "serve",
+                                   "--db", args.standin, "--port", str(args.port),
+                                   "--workers", str(args.workers)],
+                                  stdout=subprocess.DEVNULL, env={**os.environ, "FLASK_DEBUG": "0"})
+    try:
+        if server:
+            wait_ready(base, server)
+        endpoints = args.endpoint or ENDPOINTS
+        results = {}
+        print(f"{'endpoint':<72} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for path in endpoints:
+            if args.warmup:
+                hit(base, path, 1, 1e9, args.warmup)
+            r = results[path] = hit(base, path, args.concurrency, args.duration, args.requests)
+            print(f"{path[:72]:<72} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8} "
+                  f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+        params = {"target": "standin" if args.standin else base, "standin": args.standin, "workers": args.workers,
+                  "concurrency": args.concurrency, "duration": args.duration, "requests": args.requests}
+        record("load", params, results)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()
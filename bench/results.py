@@ -0,0 +1,78 @@
+# bench/results.py
+# Result records shared by the benchmarks: one JSON line per run in
+# .bench/results.jsonl, tagged with the git commit and host, so runs of
+# different commits on the same machine can be compared:
+#
+#   python bench/results.py [--bench etl|load] [--last 10]
+import argparse, json, os, platform, resource, subprocess, sys, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = Path(os.getenv("BENCH_RESULTS", ROOT / ".bench" / "results.jsonl"))
+
+def git_rev() -> str:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, timeout=10).stdout.strip()
+        return rev + ("+dirty" if dirty else "") if rev else "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Peak resident set size of this process (or of its finished children), in MB."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def percentile(sorted_values, q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+def record(bench: str, params: dict, metrics: dict) -> dict:
+    """Append one run to RESULTS and return it."""
+    row = {
+        "bench": bench,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_rev(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "params": params,
+        "metrics": metrics,
+    }
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    with RESULTS.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(row) + "\n")
+    return row
+
+def summary(row) -> str:
+    m = row["metrics"]
+    if row["bench"] == "etl":
+        return f"{m['rows']} rows, {m['rows_per_s']:,.0f} rows/s, peak RSS {m['peak_rss_mb']} MB"
+    # load: per endpoint p50/p95/p99
+    return "; ".join(f"{path} {r['p50_ms']}/{r['p95_ms']}/{r['p99_ms']} ms"
+                     for path, r in m.items())
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="List recorded benchmark runs")
+    ap.add_argument("--bench", choices=["etl", "load"])
+    ap.add_argument("--last", type=int, default=10)
+    args = ap.parse_args(argv)
+    if not RESULTS.exists():
+        print(f"[BENCH] no results yet ({RESULTS})")
+        return
+    with RESULTS.open(encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    rows = [r for r in rows if not args.bench or r["bench"] == args.bench][-args.last:]
+    for r in rows:
+        print(f"{r['time']}  {r['commit']:<14} {r['bench']:<5} {json.dumps(r['params'], sort_keys=True)}")
+        print(f"    {summary(r)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# bench/standin.py
+# SQLite stand-in for FactoryDB, so the ETL and the API can be benchmarked
+# without SQL Server and results compared across commits on one machine.
+# The schema is attached as "dbo" (dbo.Events etc. resolve unchanged). The
+# T-SQL the app sends is translated per statement: TOP -> LIMIT, a few
+# functions, and the stored procedures the API calls are emulated by
+# equivalent SQLite queries. Numbers are only comparable with each other
+# (same stand-in, same data), not with SQL Server.
+#
+#   python bench/standin.py init  --db .bench/standin.sqlite3
+#   python bench/standin.py serve --db .bench/standin.sqlite3 --port 5055 [--workers 4]
+#   ... serve --db .bench/izmir.sqlite3 --site berlin=.bench/berlin.sqlite3   (several sites, ?sites=all)
+import argparse, logging, os, re, sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# dbo.Events.Severity (db/11_event_search.sql)
+SEVERITY = "CASE upper(Type) WHEN 'ERROR' THEN 3 WHEN 'MAINT' THEN 2 WHEN 'STOP' THEN 1 ELSE 0 END"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS dbo.Machines (
+  Id INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT NOT NULL, Line TEXT NOT NULL DEFAULT 'LineA',
+  Status TEXT NOT NULL, InstalledAt TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')));
+CREATE TABLE IF NOT EXISTS dbo.Events (
+  Id INTEGER PRIMARY KEY AUTOINCREMENT, MachineId INT NOT NULL, Ts TEXT NOT NULL,
+  Type TEXT NOT NULL, Code TEXT, Message TEXT, Severity INT GENERATED ALWAYS AS ({SEVERITY}) VIRTUAL);
+CREATE TABLE IF NOT EXISTS dbo.Telemetry (
+  Id INTEGER PRIMARY KEY AUTOINCREMENT, MachineId INT NOT NULL, Ts TEXT NOT NULL,
+  Temperature REAL, Vibration REAL, Throughput INT);
+CREATE TABLE IF NOT EXISTS dbo.EtlWatermark (Name TEXT PRIMARY KEY, Version INT NOT NULL, UpdatedAt TEXT);
+CREATE TABLE IF NOT EXISTS dbo.Users (Username TEXT PRIMARY KEY, PasswordHash TEXT NOT NULL, Role TEXT NOT NULL);
+CREATE UNIQUE INDEX IF NOT EXISTS dbo.UX_Machines_Name ON Machines(Name);
+CREATE INDEX IF NOT EXISTS dbo.IX_Events_Machine_Ts ON Events(MachineId, Ts);
+CREATE INDEX IF NOT EXISTS dbo.IX_Events_Ts ON Events(Ts);
+CREATE INDEX IF NOT EXISTS dbo.IX_Telemetry_Machine_Ts ON Telemetry(MachineId, Ts);
+CREATE INDEX IF NOT EXISTS dbo.IX_Telemetry_Ts ON Telemetry(Ts);
+INSERT OR IGNORE INTO dbo.EtlWatermark (Name, Version) VALUES ('ingest', 0);
+"""
+
+# --- stored procedures, as SQLite queries over the same tables ---
+LATEST_LOGS = """
+    SELECT e.Id, e.MachineId, e.Ts, e.Type, e.Code, e.Message,
+           m.Name AS MachineName, m.Line AS Line, e.Severity AS SeverityRank
+    FROM dbo.Events e JOIN dbo.Machines m ON m.Id = e.MachineId
+    WHERE (:MachineId IS NULL OR e.MachineId = :MachineId)
+    ORDER BY e.Ts DESC LIMIT :Top
+"""
+
+def in_list(column, param):
+    return f"(:{param} IS NULL OR ',' || :{param} || ',' LIKE '%,' || {column} || ',%')"
+
+def search_events(params):
+    # text is always a substring match here (no full-text index)
+    sql = f"""
+        SELECT e.Id, e.MachineId, e.Ts, e.Type, e.Code, e.Message,
+               m.Name AS MachineName, m.Line AS Line, e.Severity AS SeverityRank
+        FROM dbo.Events e JOIN dbo.Machines m ON m.Id = e.MachineId
+        WHERE datetime(e.Ts) >= datetime(:From) AND datetime(e.Ts) < datetime(:To)
+          AND (:BeforeTs IS NULL OR datetime(e.Ts) < datetime(:BeforeTs)
+               OR (datetime(e.Ts) = datetime(:BeforeTs) AND e.Id < :BeforeId))
+          AND {in_list("e.MachineId", "MachineIds")} AND {in_list("m.Line", "Lines")}
+          AND {in_list("e.Type", "Types")} AND {in_list("e.Code", "Codes")}
+          AND (:MinSeverity IS NULL OR e.Severity >= :MinSeverity)
+          AND (:Text IS NULL OR instr(lower(e.Message), lower(:Text)) > 0)
+        ORDER BY e.Ts DESC, e.Id DESC LIMIT :Top
+    """
+    defaults = dict.fromkeys(("MachineIds", "Lines", "Types", "Codes", "MinSeverity", "Text", "BeforeTs", "BeforeId"))
+    return sql, {**defaults, "Top": 100, **params}
+
+KPI_SUMMARY = """
+    SELECT m.Id AS MachineId, m.Name, m.Line,
+           (SELECT SUM(t.Throughput) FROM dbo.Telemetry t WHERE t.MachineId = m.Id
+              AND datetime(t.Ts) >= datetime(:From) AND datetime(t.Ts) < datetime(:To)) AS TotalThroughput,
+           (SELECT COUNT(*) FROM dbo.Events e WHERE e.MachineId = m.Id AND e.Type = 'ERROR'
+              AND datetime(e.Ts) >= datetime(:From) AND datetime(e.Ts) < datetime(:To)) AS ErrorCount
+    FROM dbo.Machines m ORDER BY m.Id
+"""
+
+SERIES_WIDTH = {"1m": 60, "5m": 300, "15m": 900, "hour": 3600, "day": 86400}
+
+def throughput_series(params):
+    bucket = params.get("Bucket") or "hour"
+    if bucket == "week":
+        # Monday of the ISO week
+        expr = "date(t.Ts, 'weekday 0', '-6 days')"
+    else:
+        w = SERIES_WIDTH[bucket]
+        expr = f"datetime((CAST(strftime('%s', t.Ts) AS INTEGER) / {w}) * {w}, 'unixepoch')"
+    sql = f"""
+        SELECT CASE WHEN :PerMachine = 1 THEN t.MachineId END AS MachineId,
+               {expr} AS BucketTs, SUM(t.Throughput) AS TotalThroughput
+        FROM dbo.Telemetry t
+        WHERE datetime(t.Ts) >= datetime(:From) AND datetime(t.Ts) < datetime(:To)
+          AND (:MachineId IS NULL OR t.MachineId = :MachineId)
+          AND (:MachineIds IS NULL OR ',' || :MachineIds || ',' LIKE '%,' || t.MachineId || ',%')
+        GROUP BY 1, 2 ORDER BY 1, 2
+    """
+    return sql, {"PerMachine": 0, "MachineId": None, "MachineIds": None, **params}
+
+PROCS = {
+    "sp_GetLatestLogs": lambda p: (LATEST_LOGS, {"Top": 50, "MachineId": None, **p}),
+    "sp_MachineKpiSummary": lambda p: (KPI_SUMMARY, p),
+    "sp_ThroughputSeries": throughput_series,
+    "sp_SearchEvents": search_events,
+}
+
+# --- T-SQL -> SQLite ---
+_EXEC = re.compile(r"^\s*EXEC\s+(?:dbo\.)?(\w+)\s*(.*?);?\s*$", re.I | re.S)
+_ARG = re.compile(r"@(\w+)\s*=\s*(:\w+|NULL|'[^']*'|-?\d+)", re.I)
+_TOP = re.compile(r"\bSELECT\s+TOP\s*\(([^)]+)\)", re.I)
+REPLACEMENTS = [
+    (re.compile(r"DATEDIFF_BIG\(\s*MILLISECOND\s*,\s*'1970-01-01'\s*,\s*(\w+)\s*\)", re.I),
+     r"CAST(ROUND((julianday(\1) - 2440587.5) * 86400000) AS INTEGER)"),
+    (re.compile(r"\bISNULL\(", re.I), "IFNULL("),
+    (re.compile(r"\bSYSUTCDATETIME\(\)", re.I), "strftime('%Y-%m-%dT%H:%M:%f', 'now')"),
+]
+
+def translate(sql: str, params: dict):
+    """(sqlite sql, params) for one T-SQL text statement."""
+    m = _EXEC.match(sql)
+    if m:
+        proc = PROCS.get(m.group(1))
+        if proc is None:
+            raise NotImplementedError(f"stand-in has no emulation for {m.group(1)}")
+        args = {}
+        for name, value in _ARG.findall(m.group(2)):
+            if value.startswith(":"):
+                args[name] = params.get(value[1:])
+            elif value.upper() == "NULL":
+                args[name] = None
+            else:
+                args[name] = value.strip("'") if value.startswith("'") else int(value)
+        return proc(args)
+
+    top = _TOP.search(sql)
+    if top:
+        sql = sql[:top.start()] + "SELECT" + sql[top.end():]
+        sql = sql.rstrip().rstrip(";") + f" LIMIT {top.group(1)}"
+    for pattern, repl in REPLACEMENTS:
+        sql = pattern.sub(repl, sql)
+    return sql, params
+
+def make_engine(path, poolclass=QueuePool):
+    """SQLAlchemy engine on the stand-in file; the schema is created if missing."""
+    path = str(Path(path).resolve())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # the URL names no file (it is attached below), so the pool must be given:
+    # the default for "sqlite://" would be one shared in-memory connection per thread
+    engine = create_engine("sqlite://", poolclass=poolclass, pool_size=10, max_overflow=20,
+                           connect_args={"timeout": 30, "check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, record):
+        dbapi_conn.execute(f"ATTACH DATABASE '{path}' AS dbo")
+        dbapi_conn.execute("PRAGMA dbo.journal_mode=WAL")
+        dbapi_conn.execute("PRAGMA dbo.synchronous=NORMAL")
+
+    @event.listens_for(engine, "before_execute", retval=True)
+    def _translate(conn, clause, multiparams, params, execution_options):
+        if isinstance(clause, TextClause) and not multiparams:
+            sql, params = translate(clause.text, dict(params or {}))
+            clause = text(sql)
+        elif isinstance(clause, TextClause):
+            clause = text(translate(clause.text, {})[0])
+        return clause, multiparams, params
+
+    with engine.begin() as conn:
+        dbapi_conn = conn.connection.driver_connection
+        dbapi_conn.executescript(SCHEMA)
+        # stand-ins created before db/11_event_search.sql
+        if "Severity" not in {r[1] for r in dbapi_conn.execute("PRAGMA dbo.table_xinfo(Events)")}:
+            dbapi_conn.execute(f"ALTER TABLE dbo.Events ADD COLUMN Severity INT GENERATED ALWAYS AS ({SEVERITY}) VIRTUAL")
+    return engine
+
+def use_for_backend(path, site_dbs=None):
+    """Point the backend (backend/db.py) at the stand-in; call before importing app.
+
+    site_dbs: {site id: stand-in file} registered as further sites (backend/sites.py).
+    """
+    sys.path.insert(0, str(ROOT / "backend"))
+    import db
+    from instrumentation import TimedQueuePool, instrument_engine
+    db.engine = make_engine(path, poolclass=TimedQueuePool)
+    instrument_engine(db.engine)
+    if site_dbs:
+        import sites
+        for site_id, site_path in site_dbs.items():
+            engine = make_engine(site_path, poolclass=TimedQueuePool)
+            instrument_engine(engine, pool_gauges=False)
+            sites.add(site_id, engine)
+    return db.engine
+
+def serve(path, host, port, workers=0, site_dbs=None):
+    if workers:
+        return serve_gunicorn(path, host, port, workers, site_dbs)
+    use_for_backend(path, site_dbs)
+    # per-request access lines would cost more than some of the requests
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    from werkzeug.serving import run_simple
+    from app import app
+    run_simple(host, port, app, threaded=True)
+
+def serve_gunicorn(path, host, port, workers, site_dbs=None):
+    # the production server (backend/gunicorn.conf.py) with `workers` workers on the stand-in
+    from gunicorn.app.base import Application
+
+    class StandinServer(Application):
+        def load_config(self):
+            self.load_config_from_file(str(ROOT / "backend" / "gunicorn.conf.py"))
+            self.cfg.set("bind", [f"{host}:{port}"])
+            self.cfg.set("workers", workers)
+
+        def load(self):
+            # in each worker, after the fork: its own engine on the stand-in
+            use_for_backend(path, site_dbs)
+            from app import app
+            return app
+
+    StandinServer().run()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="SQLite stand-in database for benchmarks")
+    ap.add_argument("command", choices=["init", "serve"])
+    ap.add_argument("--db", default=".bench/standin.sqlite3", help="stand-in database file")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--workers", type=int, default=0,
+                    help="serve with gunicorn and this many workers (default: single-process dev server)")
+    ap.add_argument("--site", action="append", default=[], metavar="ID=FILE",
+                    help="serve another stand-in file as site ID (?sites=...); repeatable")
+    args = ap.parse_args(argv)
+    site_dbs = dict(s.split("=", 1) for s in args.site)
+    if args.command == "init":
+        for path in [args.db, *site_dbs.values()]:
+            make_engine(path).dispose()
+            print(f"[BENCH] stand-in ready: {path}")
+    else:
+        serve(args.db, args.host, args.port, args.workers, site_dbs)
+
+if __name__ == "__main__":
+    main()
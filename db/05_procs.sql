@@ -28,37 +28,4 @@ BEGIN
 END;
 GO
 
--- KPI summary: throughput & error counts per machine over a time window
-IF OBJECT_ID('dbo.sp_MachineKpiSummary','P') IS NOT NULL DROP PROCEDURE dbo.sp_MachineKpiSummary;
-GO
-CREATE PROCEDURE dbo.sp_MachineKpiSummary
-    @From DATETIME2,
-    @To   DATETIME2
-AS
-BEGIN
-    SET NOCOUNT ON;
-
-    ;WITH ThroughputAgg AS (
-        SELECT MachineId, SUM(Throughput) AS TotalThroughput
-        FROM dbo.Telemetry
-        WHERE Ts BETWEEN @From AND @To
-        GROUP BY MachineId
-    ),
-    ErrorAgg AS (
-        SELECT MachineId, COUNT(*) AS ErrorCount
-        FROM dbo.Events
-        WHERE Type = 'ERROR' AND Ts BETWEEN @From AND @To
-        GROUP BY MachineId
-    )
-    SELECT
-        m.Id AS MachineId,
-        m.Name,
-        m.Line,
-        ISNULL(t.TotalThroughput, 0) AS TotalThroughput,
-        ISNULL(e.ErrorCount, 0)      AS ErrorCount
-    FROM dbo.Machines m
-    LEFT JOIN ThroughputAgg t ON t.MachineId = m.Id
-    LEFT JOIN ErrorAgg e      ON e.MachineId = m.Id
-    ORDER BY m.Id;
-END;
-GO
+-- KPI summary (sp_MachineKpiSummary) and throughput series are served from rollups: see 07_rollups.sql
@@ -0,0 +1,42 @@
+USE FactoryDB;
+GO
+
+/* -------------------------------------------
+   Natural keys for ingested rows (safe to re-run on an existing DB)
+   - IGNORE_DUP_KEY: a duplicate in a bulk INSERT is dropped with a warning
+     instead of failing the whole batch; the ETL dedupe index (etl/dedupe.py)
+     filters most duplicates before they are sent, these keys catch the rest
+   ------------------------------------------- */
+
+-- Remove duplicates that were ingested before the keys existed (keep lowest Id)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_Events_NaturalKey' AND object_id = OBJECT_ID('dbo.Events'))
+BEGIN
+    ;WITH d AS (
+        SELECT Id, ROW_NUMBER() OVER (PARTITION BY MachineId, Ts, Type, Code, Message ORDER BY Id) AS rn
+        FROM dbo.Events
+    )
+    DELETE FROM d WHERE rn > 1;
+
+    CREATE UNIQUE INDEX UX_Events_NaturalKey
+        ON dbo.Events(MachineId, Ts, Type, Code, Message)
+        WITH (IGNORE_DUP_KEY = ON);
+END;
+GO
+
+-- Telemetry: one sample per machine and timestamp; replaces IX_Telemetry_Machine_Ts
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_Telemetry_Machine_Ts' AND object_id = OBJECT_ID('dbo.Telemetry'))
+BEGIN
+    ;WITH d AS (
+        SELECT Id, ROW_NUMBER() OVER (PARTITION BY MachineId, Ts ORDER BY Id) AS rn
+        FROM dbo.Telemetry
+    )
+    DELETE FROM d WHERE rn > 1;
+
+    CREATE UNIQUE INDEX UX_Telemetry_Machine_Ts
+        ON dbo.Telemetry(MachineId, Ts)
+        WITH (IGNORE_DUP_KEY = ON);
+
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Telemetry_Machine_Ts' AND object_id = OBJECT_ID('dbo.Telemetry'))
+        DROP INDEX IX_Telemetry_Machine_Ts ON dbo.Telemetry;
+END;
+GO
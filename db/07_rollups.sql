@@ -0,0 +1,466 @@
+USE FactoryDB;
+GO
+
+/* -------------------------------------------
+   Hourly / daily rollups per machine (safe to re-run on an existing DB)
+   - Telemetry: sample count + sum/count/min/max of throughput, temperature, vibration
+   - Events: event and error counts
+   - Maintained by the ETL staging procs below; dashboards read full buckets from
+     here and raw rows only for the partial buckets at the edges of a window
+   ------------------------------------------- */
+
+IF OBJECT_ID('dbo.MachineHourly','U') IS NULL
+CREATE TABLE dbo.MachineHourly (
+  MachineId INT NOT NULL,
+  BucketTs DATETIME2 NOT NULL,        -- DATETRUNC(hour, Ts)
+  Samples INT NOT NULL DEFAULT 0,
+  ThroughputSum BIGINT NOT NULL DEFAULT 0,
+  ThroughputCount INT NOT NULL DEFAULT 0,
+  ThroughputMin INT NULL,
+  ThroughputMax INT NULL,
+  TemperatureSum FLOAT NOT NULL DEFAULT 0,
+  TemperatureCount INT NOT NULL DEFAULT 0,
+  TemperatureMin FLOAT NULL,
+  TemperatureMax FLOAT NULL,
+  VibrationSum FLOAT NOT NULL DEFAULT 0,
+  VibrationCount INT NOT NULL DEFAULT 0,
+  VibrationMin FLOAT NULL,
+  VibrationMax FLOAT NULL,
+  EventCount INT NOT NULL DEFAULT 0,
+  ErrorCount INT NOT NULL DEFAULT 0,
+  CONSTRAINT PK_MachineHourly PRIMARY KEY (MachineId, BucketTs)
+);
+
+IF OBJECT_ID('dbo.MachineDaily','U') IS NULL
+CREATE TABLE dbo.MachineDaily (
+  MachineId INT NOT NULL,
+  BucketTs DATETIME2 NOT NULL,        -- DATETRUNC(day, Ts)
+  Samples INT NOT NULL DEFAULT 0,
+  ThroughputSum BIGINT NOT NULL DEFAULT 0,
+  ThroughputCount INT NOT NULL DEFAULT 0,
+  ThroughputMin INT NULL,
+  ThroughputMax INT NULL,
+  TemperatureSum FLOAT NOT NULL DEFAULT 0,
+  TemperatureCount INT NOT NULL DEFAULT 0,
+  TemperatureMin FLOAT NULL,
+  TemperatureMax FLOAT NULL,
+  VibrationSum FLOAT NOT NULL DEFAULT 0,
+  VibrationCount INT NOT NULL DEFAULT 0,
+  VibrationMin FLOAT NULL,
+  VibrationMax FLOAT NULL,
+  EventCount INT NOT NULL DEFAULT 0,
+  ErrorCount INT NOT NULL DEFAULT 0,
+  CONSTRAINT PK_MachineDaily PRIMARY KEY (MachineId, BucketTs)
+);
+GO
+
+/* -------------------------------------------
+   fn_MachineWindow: everything in [@From, @To] as a mix of
+   raw rows (partial hours at the edges), hourly rows and (@UseDaily = 1) daily rows.
+   Each output row is "BucketTs + aggregates"; callers GROUP BY what they need.
+   Hour buckets must use @UseDaily = 0 (a daily row spans 24 hours).
+   ------------------------------------------- */
+IF OBJECT_ID('dbo.fn_MachineWindow','IF') IS NOT NULL DROP FUNCTION dbo.fn_MachineWindow;
+GO
+CREATE FUNCTION dbo.fn_MachineWindow (@From DATETIME2, @To DATETIME2, @UseDaily BIT)
+RETURNS TABLE
+AS
+RETURN
+WITH h AS (
+    -- full hours are [hs, he); raw covers [@From, hs) and [max(he, @From), @To]
+    SELECT
+        CASE WHEN DATETRUNC(hour, @From) < @From THEN DATEADD(HOUR, 1, DATETRUNC(hour, @From)) ELSE @From END AS hs0,
+        DATETRUNC(hour, @To) AS he
+),
+h2 AS (
+    -- window inside a single hour: no full hours, raw covers everything
+    SELECT CASE WHEN he > hs0 THEN hs0 ELSE he END AS hs, he FROM h
+),
+d AS (
+    SELECT hs, he,
+        CASE WHEN DATETRUNC(day, hs) < hs THEN DATEADD(DAY, 1, DATETRUNC(day, hs)) ELSE hs END AS ds0,
+        DATETRUNC(day, he) AS de0
+    FROM h2
+),
+b AS (
+    -- full days are [ds, de); empty (ds = de = he) unless requested and present
+    SELECT hs, he,
+        CASE WHEN @UseDaily = 1 AND de0 > ds0 THEN ds0 ELSE he END AS ds,
+        CASE WHEN @UseDaily = 1 AND de0 > ds0 THEN de0 ELSE he END AS de
+    FROM d
+),
+raw_tel AS (
+    SELECT t.MachineId, t.Ts, t.Throughput, t.Temperature, t.Vibration
+    FROM dbo.Telemetry t CROSS JOIN b
+    WHERE t.Ts >= @From AND t.Ts < b.hs
+    UNION ALL
+    SELECT t.MachineId, t.Ts, t.Throughput, t.Temperature, t.Vibration
+    FROM dbo.Telemetry t CROSS JOIN b
+    WHERE t.Ts >= b.he AND t.Ts >= @From AND t.Ts <= @To
+),
+raw_evt AS (
+    SELECT e.MachineId, e.Ts, e.Type
+    FROM dbo.Events e CROSS JOIN b
+    WHERE e.Ts >= @From AND e.Ts < b.hs
+    UNION ALL
+    SELECT e.MachineId, e.Ts, e.Type
+    FROM dbo.Events e CROSS JOIN b
+    WHERE e.Ts >= b.he AND e.Ts >= @From AND e.Ts <= @To
+)
+SELECT MachineId, Ts AS BucketTs,
+       1 AS Samples,
+       CAST(ISNULL(Throughput, 0) AS BIGINT) AS ThroughputSum,
+       CASE WHEN Throughput IS NULL THEN 0 ELSE 1 END AS ThroughputCount,
+       Throughput AS ThroughputMin, Throughput AS ThroughputMax,
+       ISNULL(Temperature, 0) AS TemperatureSum,
+       CASE WHEN Temperature IS NULL THEN 0 ELSE 1 END AS TemperatureCount,
+       Temperature AS TemperatureMin, Temperature AS TemperatureMax,
+       ISNULL(Vibration, 0) AS VibrationSum,
+       CASE WHEN Vibration IS NULL THEN 0 ELSE 1 END AS VibrationCount,
+       Vibration AS VibrationMin, Vibration AS VibrationMax,
+       0 AS EventCount, 0 AS ErrorCount
+FROM raw_tel
+UNION ALL
+SELECT MachineId, Ts,
+       0, CAST(0 AS BIGINT), 0, NULL, NULL, 0, 0, NULL, NULL, 0, 0, NULL, NULL,
+       1, CASE WHEN Type = 'ERROR' THEN 1 ELSE 0 END
+FROM raw_evt
+UNION ALL
+SELECT r.MachineId, r.BucketTs, r.Samples,
+       r.ThroughputSum, r.ThroughputCount, r.ThroughputMin, r.ThroughputMax,
+       r.TemperatureSum, r.TemperatureCount, r.TemperatureMin, r.TemperatureMax,
+       r.VibrationSum, r.VibrationCount, r.VibrationMin, r.VibrationMax,
+       r.EventCount, r.ErrorCount
+FROM dbo.MachineHourly r CROSS JOIN b
+WHERE r.BucketTs >= b.hs AND r.BucketTs < b.ds
+UNION ALL
+SELECT r.MachineId, r.BucketTs, r.Samples,
+       r.ThroughputSum, r.ThroughputCount, r.ThroughputMin, r.ThroughputMax,
+       r.TemperatureSum, r.TemperatureCount, r.TemperatureMin, r.TemperatureMax,
+       r.VibrationSum, r.VibrationCount, r.VibrationMin, r.VibrationMax,
+       r.EventCount, r.ErrorCount
+FROM dbo.MachineHourly r CROSS JOIN b
+WHERE r.BucketTs >= b.de AND r.BucketTs < b.he
+UNION ALL
+SELECT r.MachineId, r.BucketTs, r.Samples,
+       r.ThroughputSum, r.ThroughputCount, r.ThroughputMin, r.ThroughputMax,
+       r.TemperatureSum, r.TemperatureCount, r.TemperatureMin, r.TemperatureMax,
+       r.VibrationSum, r.VibrationCount, r.VibrationMin, r.VibrationMax,
+       r.EventCount, r.ErrorCount
+FROM dbo.MachineDaily r CROSS JOIN b
+WHERE r.BucketTs >= b.ds AND r.BucketTs < b.de;
+GO
+
+/* -------------------------------------------
+   sp_ApplyRollupDelta: add the hourly aggregates in #RollupDelta
+   (same columns as dbo.MachineHourly) to the hourly and daily rollups
+   ------------------------------------------- */
+IF OBJECT_ID('dbo.sp_ApplyRollupDelta','P') IS NOT NULL DROP PROCEDURE dbo.sp_ApplyRollupDelta;
+GO
+CREATE PROCEDURE dbo.sp_ApplyRollupDelta
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    MERGE dbo.MachineHourly WITH (HOLDLOCK) AS r
+    USING #RollupDelta AS n
+       ON r.MachineId = n.MachineId AND r.BucketTs = n.BucketTs
+    WHEN MATCHED THEN UPDATE SET
+        Samples          = r.Samples + n.Samples,
+        ThroughputSum    = r.ThroughputSum + n.ThroughputSum,
+        ThroughputCount  = r.ThroughputCount + n.ThroughputCount,
+        ThroughputMin    = CASE WHEN r.ThroughputMin IS NULL OR n.ThroughputMin < r.ThroughputMin THEN n.ThroughputMin ELSE r.ThroughputMin END,
+        ThroughputMax    = CASE WHEN r.ThroughputMax IS NULL OR n.ThroughputMax > r.ThroughputMax THEN n.ThroughputMax ELSE r.ThroughputMax END,
+        TemperatureSum   = r.TemperatureSum + n.TemperatureSum,
+        TemperatureCount = r.TemperatureCount + n.TemperatureCount,
+        TemperatureMin   = CASE WHEN r.TemperatureMin IS NULL OR n.TemperatureMin < r.TemperatureMin THEN n.TemperatureMin ELSE r.TemperatureMin END,
+        TemperatureMax   = CASE WHEN r.TemperatureMax IS NULL OR n.TemperatureMax > r.TemperatureMax THEN n.TemperatureMax ELSE r.TemperatureMax END,
+        VibrationSum     = r.VibrationSum + n.VibrationSum,
+        VibrationCount   = r.VibrationCount + n.VibrationCount,
+        VibrationMin     = CASE WHEN r.VibrationMin IS NULL OR n.VibrationMin < r.VibrationMin THEN n.VibrationMin ELSE r.VibrationMin END,
+        VibrationMax     = CASE WHEN r.VibrationMax IS NULL OR n.VibrationMax > r.VibrationMax THEN n.VibrationMax ELSE r.VibrationMax END,
+        EventCount       = r.EventCount + n.EventCount,
+        ErrorCount       = r.ErrorCount + n.ErrorCount
+    WHEN NOT MATCHED THEN INSERT
+        (MachineId, BucketTs, Samples, ThroughputSum, ThroughputCount, ThroughputMin, ThroughputMax,
+         TemperatureSum, TemperatureCount, TemperatureMin, TemperatureMax,
+         VibrationSum, VibrationCount, VibrationMin, VibrationMax, EventCount, ErrorCount)
+    VALUES
+        (n.MachineId, n.BucketTs, n.Samples, n.ThroughputSum, n.ThroughputCount, n.ThroughputMin, n.ThroughputMax,
+         n.TemperatureSum, n.TemperatureCount, n.TemperatureMin, n.TemperatureMax,
+         n.VibrationSum, n.VibrationCount, n.VibrationMin, n.VibrationMax, n.EventCount, n.ErrorCount);
+
+    MERGE dbo.MachineDaily WITH (HOLDLOCK) AS r
+    USING (
+        SELECT MachineId, DATETRUNC(day, BucketTs) AS BucketTs,
+               SUM(Samples) AS Samples,
+               SUM(ThroughputSum) AS ThroughputSum, SUM(ThroughputCount) AS ThroughputCount,
+               MIN(ThroughputMin) AS ThroughputMin, MAX(ThroughputMax) AS ThroughputMax,
+               SUM(TemperatureSum) AS TemperatureSum, SUM(TemperatureCount) AS TemperatureCount,
+               MIN(TemperatureMin) AS TemperatureMin, MAX(TemperatureMax) AS TemperatureMax,
+               SUM(VibrationSum) AS VibrationSum, SUM(VibrationCount) AS VibrationCount,
+               MIN(VibrationMin) AS VibrationMin, MAX(VibrationMax) AS VibrationMax,
+               SUM(EventCount) AS EventCount, SUM(ErrorCount) AS ErrorCount
+        FROM #RollupDelta
+        GROUP BY MachineId, DATETRUNC(day, BucketTs)
+    ) AS n
+       ON r.MachineId = n.MachineId AND r.BucketTs = n.BucketTs
+    WHEN MATCHED THEN UPDATE SET
+        Samples          = r.Samples + n.Samples,
+        ThroughputSum    = r.ThroughputSum + n.ThroughputSum,
+        ThroughputCount  = r.ThroughputCount + n.ThroughputCount,
+        ThroughputMin    = CASE WHEN r.ThroughputMin IS NULL OR n.ThroughputMin < r.ThroughputMin THEN n.ThroughputMin ELSE r.ThroughputMin END,
+        ThroughputMax    = CASE WHEN r.ThroughputMax IS NULL OR n.ThroughputMax > r.ThroughputMax THEN n.ThroughputMax ELSE r.ThroughputMax END,
+        TemperatureSum   = r.TemperatureSum + n.TemperatureSum,
+        TemperatureCount = r.TemperatureCount + n.TemperatureCount,
+        TemperatureMin   = CASE WHEN r.TemperatureMin IS NULL OR n.TemperatureMin < r.TemperatureMin THEN n.TemperatureMin ELSE r.TemperatureMin END,
+        TemperatureMax   = CASE WHEN r.TemperatureMax IS NULL OR n.TemperatureMax > r.TemperatureMax THEN n.TemperatureMax ELSE r.TemperatureMax END,
+        VibrationSum     = r.VibrationSum + n.VibrationSum,
+        VibrationCount   = r.VibrationCount + n.VibrationCount,
+        VibrationMin     = CASE WHEN r.VibrationMin IS NULL OR n.VibrationMin < r.VibrationMin THEN n.VibrationMin ELSE r.VibrationMin END,
+        VibrationMax     = CASE WHEN r.VibrationMax IS NULL OR n.VibrationMax > r.VibrationMax THEN n.VibrationMax ELSE r.VibrationMax END,
+        EventCount       = r.EventCount + n.EventCount,
+        ErrorCount       = r.ErrorCount + n.ErrorCount
+    WHEN NOT MATCHED THEN INSERT
+        (MachineId, BucketTs, Samples, ThroughputSum, ThroughputCount, ThroughputMin, ThroughputMax,
+         TemperatureSum, TemperatureCount, TemperatureMin, TemperatureMax,
+         VibrationSum, VibrationCount, VibrationMin, VibrationMax, EventCount, ErrorCount)
+    VALUES
+        (n.MachineId, n.BucketTs, n.Samples, n.ThroughputSum, n.ThroughputCount, n.ThroughputMin, n.ThroughputMax,
+         n.TemperatureSum, n.TemperatureCount, n.TemperatureMin, n.TemperatureMax,
+         n.VibrationSum, n.VibrationCount, n.VibrationMin, n.VibrationMax, n.EventCount, n.ErrorCount);
+END;
+GO
+
+/* -------------------------------------------
+   ETL staging loads: the ETL bulk-inserts a chunk into #TelemetryStage /
+   #EventsStage, then these procs move the new rows into the tables and add
+   exactly the rows that were inserted to the rollups, in the same transaction
+   - Result: the Seq (position in the chunk) of every stage row that was
+     inserted, so the ETL copies only those rows to Parquet
+   ------------------------------------------- */
+IF OBJECT_ID('dbo.sp_IngestTelemetryStage','P') IS NOT NULL DROP PROCEDURE dbo.sp_IngestTelemetryStage;
+GO
+CREATE PROCEDURE dbo.sp_IngestTelemetryStage
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    CREATE TABLE #New (Id BIGINT, MachineId INT, Ts DATETIME2, Temperature FLOAT, Vibration FLOAT, Throughput INT);
+
+    INSERT INTO dbo.Telemetry (MachineId, Ts, Temperature, Vibration, Throughput)
+    OUTPUT INSERTED.Id, INSERTED.MachineId, INSERTED.Ts, INSERTED.Temperature, INSERTED.Vibration, INSERTED.Throughput INTO #New
+    SELECT s.MachineId, s.Ts, s.Temperature, s.Vibration, s.Throughput
+    FROM #TelemetryStage s
+    WHERE NOT EXISTS (SELECT 1 FROM dbo.Telemetry t WHERE t.MachineId = s.MachineId AND t.Ts = s.Ts);
+
+    SELECT MachineId, DATETRUNC(hour, Ts) AS BucketTs,
+           COUNT(*) AS Samples,
+           ISNULL(SUM(CAST(Throughput AS BIGINT)), 0) AS ThroughputSum, COUNT(Throughput) AS ThroughputCount,
+           MIN(Throughput) AS ThroughputMin, MAX(Throughput) AS ThroughputMax,
+           ISNULL(SUM(Temperature), 0) AS TemperatureSum, COUNT(Temperature) AS TemperatureCount,
+           MIN(Temperature) AS TemperatureMin, MAX(Temperature) AS TemperatureMax,
+           ISNULL(SUM(Vibration), 0) AS VibrationSum, COUNT(Vibration) AS VibrationCount,
+           MIN(Vibration) AS VibrationMin, MAX(Vibration) AS VibrationMax,
+           0 AS EventCount, 0 AS ErrorCount
+    INTO #RollupDelta
+    FROM #New
+    GROUP BY MachineId, DATETRUNC(hour, Ts);
+
+    EXEC dbo.sp_ApplyRollupDelta;
+
+    -- a row repeated within the chunk was inserted once (IGNORE_DUP_KEY): report its first copy
+    SELECT MIN(s.Seq) AS Seq
+    FROM #New n
+    INNER JOIN #TelemetryStage s ON s.MachineId = n.MachineId AND s.Ts = n.Ts
+    WHERE EXISTS (SELECT s.Temperature, s.Vibration, s.Throughput
+                  INTERSECT SELECT n.Temperature, n.Vibration, n.Throughput)
+    GROUP BY n.Id
+    ORDER BY Seq;
+END;
+GO
+
+IF OBJECT_ID('dbo.sp_IngestEventsStage','P') IS NOT NULL DROP PROCEDURE dbo.sp_IngestEventsStage;
+GO
+CREATE PROCEDURE dbo.sp_IngestEventsStage
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    CREATE TABLE #New (Id BIGINT, MachineId INT, Ts DATETIME2, Type NVARCHAR(16), Code NVARCHAR(32), Message NVARCHAR(200));
+
+    -- INTERSECT compares NULL Code/Message as equal, like UX_Events_NaturalKey
+    INSERT INTO dbo.Events (MachineId, Ts, Type, Code, Message)
+    OUTPUT INSERTED.Id, INSERTED.MachineId, INSERTED.Ts, INSERTED.Type, INSERTED.Code, INSERTED.Message INTO #New
+    SELECT s.MachineId, s.Ts, s.Type, s.Code, s.Message
+    FROM #EventsStage s
+    WHERE NOT EXISTS (
+        SELECT s.MachineId, s.Ts, s.Type, s.Code, s.Message
+        INTERSECT
+        SELECT e.MachineId, e.Ts, e.Type, e.Code, e.Message
+        FROM dbo.Events e WHERE e.MachineId = s.MachineId AND e.Ts = s.Ts
+    );
+
+    SELECT MachineId, DATETRUNC(hour, Ts) AS BucketTs,
+           0 AS Samples,
+           CAST(0 AS BIGINT) AS ThroughputSum, 0 AS ThroughputCount,
+           CAST(NULL AS INT) AS ThroughputMin, CAST(NULL AS INT) AS ThroughputMax,
+           CAST(0 AS FLOAT) AS TemperatureSum, 0 AS TemperatureCount,
+           CAST(NULL AS FLOAT) AS TemperatureMin, CAST(NULL AS FLOAT) AS TemperatureMax,
+           CAST(0 AS FLOAT) AS VibrationSum, 0 AS VibrationCount,
+           CAST(NULL AS FLOAT) AS VibrationMin, CAST(NULL AS FLOAT) AS VibrationMax,
+           COUNT(*) AS EventCount, SUM(CASE WHEN Type = 'ERROR' THEN 1 ELSE 0 END) AS ErrorCount
+    INTO #RollupDelta
+    FROM #New
+    GROUP BY MachineId, DATETRUNC(hour, Ts);
+
+    EXEC dbo.sp_ApplyRollupDelta;
+
+    SELECT MIN(s.Seq) AS Seq
+    FROM #New n
+    INNER JOIN #EventsStage s ON s.MachineId = n.MachineId AND s.Ts = n.Ts
+    WHERE EXISTS (SELECT s.Type, s.Code, s.Message INTERSECT SELECT n.Type, n.Code, n.Message)
+    GROUP BY n.Id
+    ORDER BY Seq;
+END;
+GO
+
+/* -------------------------------------------
+   sp_RebuildRollups: recompute the rollups of the days [@From, @To) from raw data
+   (initial backfill, or after rows were changed outside the ETL)
+   - Default @From is the oldest day that still has raw rows, and never an
+     archived day (10_lifecycle.sql): the rollups are the only full copy of
+     those, and raw rows still there are late arrivals the ETL has already
+     added to them. Pass @From explicitly to rebuild a restored day.
+     Default @To: no upper bound
+   ------------------------------------------- */
+IF OBJECT_ID('dbo.sp_RebuildRollups','P') IS NOT NULL DROP PROCEDURE dbo.sp_RebuildRollups;
+GO
+CREATE PROCEDURE dbo.sp_RebuildRollups
+    @From DATETIME2 = NULL,
+    @To   DATETIME2 = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @From IS NULL
+    BEGIN
+        SELECT @From = MIN(Ts) FROM (
+            SELECT MIN(Ts) AS Ts FROM dbo.Telemetry
+            UNION ALL
+            SELECT MIN(Ts) FROM dbo.Events
+        ) x;
+        IF @From IS NULL
+            RETURN;  -- no raw data
+        -- start after the newest archived day (ArchivedDays exists once 10_lifecycle.sql ran)
+        IF OBJECT_ID('dbo.ArchivedDays','U') IS NOT NULL
+            SELECT @From = CASE WHEN MAX(Day) IS NOT NULL AND @From < DATEADD(DAY, 1, CAST(MAX(Day) AS DATETIME2))
+                                THEN DATEADD(DAY, 1, CAST(MAX(Day) AS DATETIME2)) ELSE @From END
+            FROM dbo.ArchivedDays;
+    END
+    -- whole days only: daily rows are rebuilt from the hourly delta
+    SET @From = DATETRUNC(day, @From);
+    SET @To = CASE WHEN @To IS NULL THEN '9999-12-31' ELSE DATETRUNC(day, @To) END;
+
+    SELECT MachineId, BucketTs,
+           SUM(Samples) AS Samples,
+           SUM(ThroughputSum) AS ThroughputSum, SUM(ThroughputCount) AS ThroughputCount,
+           MIN(ThroughputMin) AS ThroughputMin, MAX(ThroughputMax) AS ThroughputMax,
+           SUM(TemperatureSum) AS TemperatureSum, SUM(TemperatureCount) AS TemperatureCount,
+           MIN(TemperatureMin) AS TemperatureMin, MAX(TemperatureMax) AS TemperatureMax,
+           SUM(VibrationSum) AS VibrationSum, SUM(VibrationCount) AS VibrationCount,
+           MIN(VibrationMin) AS VibrationMin, MAX(VibrationMax) AS VibrationMax,
+           SUM(EventCount) AS EventCount, SUM(ErrorCount) AS ErrorCount
+    INTO #RollupDelta
+    FROM (
+        SELECT MachineId, DATETRUNC(hour, Ts) AS BucketTs,
+               COUNT(*) AS Samples,
+               ISNULL(SUM(CAST(Throughput AS BIGINT)), 0) AS ThroughputSum, COUNT(Throughput) AS ThroughputCount,
+               MIN(Throughput) AS ThroughputMin, MAX(Throughput) AS ThroughputMax,
+               ISNULL(SUM(Temperature), 0) AS TemperatureSum, COUNT(Temperature) AS TemperatureCount,
+               MIN(Temperature) AS TemperatureMin, MAX(Temperature) AS TemperatureMax,
+               ISNULL(SUM(Vibration), 0) AS VibrationSum, COUNT(Vibration) AS VibrationCount,
+               MIN(Vibration) AS VibrationMin, MAX(Vibration) AS VibrationMax,
+               0 AS EventCount, 0 AS ErrorCount
+        FROM dbo.Telemetry
+        WHERE Ts >= @From AND Ts < @To
+        GROUP BY MachineId, DATETRUNC(hour, Ts)
+        UNION ALL
+        SELECT MachineId, DATETRUNC(hour, Ts),
+               0, CAST(0 AS BIGINT), 0, NULL, NULL, CAST(0 AS FLOAT), 0, NULL, NULL, CAST(0 AS FLOAT), 0, NULL, NULL,
+               COUNT(*), SUM(CASE WHEN Type = 'ERROR' THEN 1 ELSE 0 END)
+        FROM dbo.Events
+        WHERE Ts >= @From AND Ts < @To
+        GROUP BY MachineId, DATETRUNC(hour, Ts)
+    ) x
+    GROUP BY MachineId, BucketTs;
+
+    BEGIN TRAN;
+        DELETE FROM dbo.MachineHourly WHERE BucketTs >= @From AND BucketTs < @To;
+        DELETE FROM dbo.MachineDaily WHERE BucketTs >= @From AND BucketTs < @To;
+        EXEC dbo.sp_ApplyRollupDelta;
+    COMMIT;
+END;
+GO
+
+/* -------------------------------------------
+   Dashboard reads served from rollups
+   ------------------------------------------- */
+
+-- KPI summary: throughput & error counts per machine over a time window
+IF OBJECT_ID('dbo.sp_MachineKpiSummary','P') IS NOT NULL DROP PROCEDURE dbo.sp_MachineKpiSummary;
+GO
+CREATE PROCEDURE dbo.sp_MachineKpiSummary
+    @From DATETIME2,
+    @To   DATETIME2
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    ;WITH Agg AS (
+        SELECT MachineId, SUM(ThroughputSum) AS TotalThroughput, SUM(ErrorCount) AS ErrorCount
+        FROM dbo.fn_MachineWindow(@From, @To, 1)
+        GROUP BY MachineId
+    )
+    SELECT
+        m.Id AS MachineId,
+        m.Name,
+        m.Line,
+        ISNULL(a.TotalThroughput, 0) AS TotalThroughput,
+        ISNULL(a.ErrorCount, 0)      AS ErrorCount
+    FROM dbo.Machines m
+    LEFT JOIN Agg a ON a.MachineId = m.Id
+    ORDER BY m.Id;
+END;
+GO
+
+-- Throughput series by hour or day (optionally one machine); extended in 09_throughput_buckets.sql
+IF OBJECT_ID('dbo.sp_ThroughputSeries','P') IS NOT NULL DROP PROCEDURE dbo.sp_ThroughputSeries;
+GO
+CREATE PROCEDURE dbo.sp_ThroughputSeries
+    @From DATETIME2,
+    @To   DATETIME2,
+    @Bucket NVARCHAR(8) = 'hour',
+    @MachineId INT = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @Bucket = 'day'
+        SELECT DATETRUNC(day, BucketTs) AS BucketTs, SUM(ThroughputSum) AS TotalThroughput
+        FROM dbo.fn_MachineWindow(@From, @To, 1)
+        WHERE (@MachineId IS NULL OR MachineId = @MachineId) AND Samples > 0
+        GROUP BY DATETRUNC(day, BucketTs)
+        ORDER BY BucketTs;
+    ELSE
+        SELECT DATETRUNC(hour, BucketTs) AS BucketTs, SUM(ThroughputSum) AS TotalThroughput
+        FROM dbo.fn_MachineWindow(@From, @To, 0)
+        WHERE (@MachineId IS NULL OR MachineId = @MachineId) AND Samples > 0
+        GROUP BY DATETRUNC(hour, BucketTs)
+        ORDER BY BucketTs;
+END;
+GO
+
+-- Initial backfill (seed data and anything ingested before the rollups existed)
+EXEC dbo.sp_RebuildRollups;
+GO
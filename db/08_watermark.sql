@@ -0,0 +1,20 @@
+USE FactoryDB;
+GO
+
+/* -------------------------------------------
+   Data watermark (safe to re-run on an existing DB)
+   - The ETL bumps Version in every transaction that inserts rows
+   - The API keys its response cache on it (backend/cache.py), so new data
+     invalidates cached dashboard reads; UpdatedAt = time of the last ingest
+   ------------------------------------------- */
+
+IF OBJECT_ID('dbo.EtlWatermark','U') IS NULL
+BEGIN
+    CREATE TABLE dbo.EtlWatermark (
+      Name NVARCHAR(32) NOT NULL PRIMARY KEY,
+      Version BIGINT NOT NULL DEFAULT 0,
+      UpdatedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+    );
+    INSERT INTO dbo.EtlWatermark (Name) VALUES ('ingest');
+END;
+GO
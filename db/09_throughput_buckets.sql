@@ -0,0 +1,72 @@
+USE FactoryDB;
+GO
+
+/* -------------------------------------------
+   sp_ThroughputSeries v2 (replaces the version in 07_rollups.sql; safe to re-run)
+   - @Bucket: 1m | 5m | 15m (raw telemetry, DATE_BUCKET) or hour | day | week (rollups)
+   - @MachineIds: optional comma-separated filter (in addition to @MachineId)
+   - @PerMachine = 1: one series per machine in a single query (MachineId, BucketTs, ...);
+     otherwise MachineId is NULL and the series is summed over the selected machines
+   ------------------------------------------- */
+IF OBJECT_ID('dbo.sp_ThroughputSeries','P') IS NOT NULL DROP PROCEDURE dbo.sp_ThroughputSeries;
+GO
+CREATE PROCEDURE dbo.sp_ThroughputSeries
+    @From DATETIME2,
+    @To   DATETIME2,
+    @Bucket NVARCHAR(8) = 'hour',
+    @MachineId INT = NULL,
+    @MachineIds NVARCHAR(MAX) = NULL,
+    @PerMachine BIT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Ids TABLE (Id INT PRIMARY KEY);
+    IF @MachineId IS NOT NULL
+        INSERT INTO @Ids VALUES (@MachineId);
+    IF @MachineIds IS NOT NULL
+        INSERT INTO @Ids
+        SELECT DISTINCT TRY_CAST(value AS INT) FROM STRING_SPLIT(@MachineIds, ',')
+        WHERE TRY_CAST(value AS INT) IS NOT NULL
+          AND TRY_CAST(value AS INT) NOT IN (SELECT Id FROM @Ids);
+    DECLARE @All BIT = CASE WHEN EXISTS (SELECT 1 FROM @Ids) THEN 0 ELSE 1 END;
+
+    IF @Bucket IN ('1m', '5m', '15m')
+    BEGIN
+        -- sub-hour buckets are finer than the rollups: aggregate raw rows
+        DECLARE @Minutes INT = CASE @Bucket WHEN '1m' THEN 1 WHEN '5m' THEN 5 ELSE 15 END;
+        SELECT CASE WHEN @PerMachine = 1 THEN t.MachineId END AS MachineId,
+               DATE_BUCKET(minute, @Minutes, t.Ts) AS BucketTs,
+               SUM(CAST(t.Throughput AS BIGINT)) AS TotalThroughput
+        FROM dbo.Telemetry t
+        WHERE t.Ts BETWEEN @From AND @To
+          AND (@All = 1 OR t.MachineId IN (SELECT Id FROM @Ids))
+        GROUP BY CASE WHEN @PerMachine = 1 THEN t.MachineId END, DATE_BUCKET(minute, @Minutes, t.Ts)
+        ORDER BY MachineId, BucketTs;
+    END
+    ELSE IF @Bucket = 'week'
+        SELECT CASE WHEN @PerMachine = 1 THEN w.MachineId END AS MachineId,
+               DATETRUNC(iso_week, w.BucketTs) AS BucketTs,
+               SUM(w.ThroughputSum) AS TotalThroughput
+        FROM dbo.fn_MachineWindow(@From, @To, 1) w
+        WHERE w.Samples > 0 AND (@All = 1 OR w.MachineId IN (SELECT Id FROM @Ids))
+        GROUP BY CASE WHEN @PerMachine = 1 THEN w.MachineId END, DATETRUNC(iso_week, w.BucketTs)
+        ORDER BY MachineId, BucketTs;
+    ELSE IF @Bucket = 'day'
+        SELECT CASE WHEN @PerMachine = 1 THEN w.MachineId END AS MachineId,
+               DATETRUNC(day, w.BucketTs) AS BucketTs,
+               SUM(w.ThroughputSum) AS TotalThroughput
+        FROM dbo.fn_MachineWindow(@From, @To, 1) w
+        WHERE w.Samples > 0 AND (@All = 1 OR w.MachineId IN (SELECT Id FROM @Ids))
+        GROUP BY CASE WHEN @PerMachine = 1 THEN w.MachineId END, DATETRUNC(day, w.BucketTs)
+        ORDER BY MachineId, BucketTs;
+    ELSE
+        SELECT CASE WHEN @PerMachine = 1 THEN w.MachineId END AS MachineId,
+               DATETRUNC(hour, w.BucketTs) AS BucketTs,
+               SUM(w.ThroughputSum) AS TotalThroughput
+        FROM dbo.fn_MachineWindow(@From, @To, 0) w
+        WHERE w.Samples > 0 AND (@All = 1 OR w.MachineId IN (SELECT Id FROM @Ids))
+        GROUP BY CASE WHEN @PerMachine = 1 THEN w.MachineId END, DATETRUNC(hour, w.BucketTs)
+        ORDER BY MachineId, BucketTs;
+END;
+GO
@@ -0,0 +1,182 @@
+USE FactoryDB;
+GO
+
+/* -------------------------------------------
+   Data lifecycle (safe to re-run on an existing DB)
+   - dbo.Telemetry is partitioned by UTC day (pf_TelemetryDay, RANGE RIGHT) and
+     clustered on (MachineId, Ts), page-compressed: a time range reads only its
+     days, and a whole day is removed with a metadata-only partition truncate.
+     Every index is aligned with the partitions (the PK becomes (Id, Ts))
+   - dbo.Events stays one table: it is far smaller, and /logs pages need one
+     ordered index across days; IX_Events_Ts serves the day deletes
+   - etl/lifecycle.py runs daily: days older than RAW_RETENTION_DAYS are written
+     to compressed archive files, then sp_DropRawDay recomputes their rollups
+     and removes the raw rows. Those days are then served from MachineHourly /
+     MachineDaily only (hour/day/week buckets, KPIs); sub-hour buckets and
+     telemetry stats need raw rows and cover the retained days
+   ------------------------------------------- */
+
+-- one boundary per day from the oldest telemetry; sp_EnsureTelemetryPartitions adds the rest
+IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pf_TelemetryDay')
+BEGIN
+    DECLARE @First DATETIME2 = DATETRUNC(day, ISNULL((SELECT MIN(Ts) FROM dbo.Telemetry), SYSUTCDATETIME()));
+    DECLARE @sql NVARCHAR(MAX) = N'CREATE PARTITION FUNCTION pf_TelemetryDay (DATETIME2) AS RANGE RIGHT FOR VALUES ('''
+        + CONVERT(NVARCHAR(30), @First, 126) + N''');';
+    EXEC sp_executesql @sql;
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'ps_TelemetryDay')
+    CREATE PARTITION SCHEME ps_TelemetryDay AS PARTITION pf_TelemetryDay ALL TO ([PRIMARY]);
+GO
+
+-- Partitions of dbo.Telemetry: [RangeFrom, RangeTo), NULL = unbounded; Rows is approximate
+CREATE OR ALTER VIEW dbo.vw_TelemetryPartitions
+AS
+SELECT p.partition_number AS PartitionNumber,
+       CAST(lo.value AS DATETIME2) AS RangeFrom,
+       CAST(hi.value AS DATETIME2) AS RangeTo,
+       p.rows AS Rows
+FROM sys.partitions p
+JOIN sys.indexes i ON i.object_id = p.object_id AND i.index_id = p.index_id
+JOIN sys.partition_schemes s ON s.data_space_id = i.data_space_id
+LEFT JOIN sys.partition_range_values lo ON lo.function_id = s.function_id AND lo.boundary_id = p.partition_number - 1
+LEFT JOIN sys.partition_range_values hi ON hi.function_id = s.function_id AND hi.boundary_id = p.partition_number
+WHERE p.object_id = OBJECT_ID('dbo.Telemetry') AND p.index_id = 1;
+GO
+
+/* -------------------------------------------
+   sp_EnsureTelemetryPartitions: day boundaries up to @Through. Run ahead of
+   time (the job keeps LIFECYCLE_AHEAD_DAYS): splitting an empty partition is
+   metadata-only, splitting one that already holds rows moves them
+   ------------------------------------------- */
+CREATE OR ALTER PROCEDURE dbo.sp_EnsureTelemetryPartitions
+    @Through DATETIME2
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Next DATETIME2 = (
+        SELECT DATEADD(DAY, 1, MAX(CAST(rv.value AS DATETIME2)))
+        FROM sys.partition_range_values rv
+        JOIN sys.partition_functions f ON f.function_id = rv.function_id
+        WHERE f.name = 'pf_TelemetryDay'
+    );
+    WHILE @Next <= @Through
+    BEGIN
+        ALTER PARTITION SCHEME ps_TelemetryDay NEXT USED [PRIMARY];
+        ALTER PARTITION FUNCTION pf_TelemetryDay() SPLIT RANGE (@Next);
+        SET @Next = DATEADD(DAY, 1, @Next);
+    END;
+END;
+GO
+
+DECLARE @Ahead DATETIME2 = DATEADD(DAY, 7, DATETRUNC(day, SYSUTCDATETIME()));
+EXEC dbo.sp_EnsureTelemetryPartitions @Through = @Ahead;
+GO
+
+-- Move dbo.Telemetry onto the partition scheme (one rebuild; the existing
+-- UX_Telemetry_Machine_Ts from 06_dedupe_keys.sql becomes the clustered index)
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes i JOIN sys.partition_schemes s ON s.data_space_id = i.data_space_id
+    WHERE i.object_id = OBJECT_ID('dbo.Telemetry') AND i.index_id = 1
+)
+BEGIN
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_Telemetry_Machine_Ts' AND object_id = OBJECT_ID('dbo.Telemetry'))
+        DROP INDEX UX_Telemetry_Machine_Ts ON dbo.Telemetry;
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Telemetry_Machine_Ts' AND object_id = OBJECT_ID('dbo.Telemetry'))
+        DROP INDEX IX_Telemetry_Machine_Ts ON dbo.Telemetry;
+
+    DECLARE @pk SYSNAME = (
+        SELECT name FROM sys.key_constraints WHERE parent_object_id = OBJECT_ID('dbo.Telemetry') AND type = 'PK'
+    );
+    IF @pk IS NOT NULL
+    BEGIN
+        DECLARE @sql NVARCHAR(MAX) = N'ALTER TABLE dbo.Telemetry DROP CONSTRAINT ' + QUOTENAME(@pk) + N';';
+        EXEC sp_executesql @sql;
+    END;
+
+    CREATE UNIQUE CLUSTERED INDEX UX_Telemetry_Machine_Ts
+        ON dbo.Telemetry (MachineId, Ts)
+        WITH (IGNORE_DUP_KEY = ON, DATA_COMPRESSION = PAGE)
+        ON ps_TelemetryDay (Ts);
+
+    ALTER TABLE dbo.Telemetry ADD CONSTRAINT PK_Telemetry
+        PRIMARY KEY NONCLUSTERED (Id, Ts)
+        WITH (DATA_COMPRESSION = PAGE)
+        ON ps_TelemetryDay (Ts);
+
+    -- lock escalation stops at the partition, so a day being dropped does not block ingest of today
+    ALTER TABLE dbo.Telemetry SET (LOCK_ESCALATION = AUTO);
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Events_Ts' AND object_id = OBJECT_ID('dbo.Events'))
+    CREATE INDEX IX_Events_Ts ON dbo.Events (Ts);
+GO
+
+-- One row per archived day (a day archived again for late rows adds to it)
+IF OBJECT_ID('dbo.ArchivedDays','U') IS NULL
+CREATE TABLE dbo.ArchivedDays (
+  Day DATE NOT NULL PRIMARY KEY,
+  TelemetryRows BIGINT NOT NULL DEFAULT 0,
+  EventRows BIGINT NOT NULL DEFAULT 0,
+  ArchivedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+);
+GO
+
+/* -------------------------------------------
+   sp_DropRawDay: remove one day of raw telemetry and events after the job has
+   archived it. @TelemetryRows / @EventRows are the counts it wrote: rows that
+   arrived since make the check fail, and the job archives the day again on
+   its next run. The day's rollups are left as they are: the staging procs
+   (07_rollups.sql) added every row to them as it was ingested, late rows
+   included, and recomputing them from what is left in raw would drop the
+   rows archived on earlier runs
+   ------------------------------------------- */
+CREATE OR ALTER PROCEDURE dbo.sp_DropRawDay
+    @Day DATETIME2,
+    @TelemetryRows BIGINT,
+    @EventRows BIGINT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    SET @Day = DATETRUNC(day, @Day);
+    DECLARE @Next DATETIME2 = DATEADD(DAY, 1, @Day);
+
+    BEGIN TRAN;
+        -- UPDLOCK/HOLDLOCK keep the day unchanged until the commit
+        IF (SELECT COUNT_BIG(*) FROM dbo.Telemetry WITH (UPDLOCK, HOLDLOCK) WHERE Ts >= @Day AND Ts < @Next) <> @TelemetryRows
+           OR (SELECT COUNT_BIG(*) FROM dbo.Events WITH (UPDLOCK, HOLDLOCK) WHERE Ts >= @Day AND Ts < @Next) <> @EventRows
+            THROW 50010, 'Rows changed since the day was archived; it will be archived again on the next run', 1;
+
+        DECLARE @p INT = $PARTITION.pf_TelemetryDay(@Day);
+        IF EXISTS (SELECT 1 FROM dbo.vw_TelemetryPartitions WHERE PartitionNumber = @p AND RangeFrom = @Day AND RangeTo = @Next)
+        BEGIN
+            -- the day is exactly one partition: truncate it and drop its boundary (both metadata-only)
+            DECLARE @sql NVARCHAR(200) = N'TRUNCATE TABLE dbo.Telemetry WITH (PARTITIONS (' + CAST(@p AS NVARCHAR(10)) + N'));';
+            EXEC sp_executesql @sql;
+            ALTER PARTITION FUNCTION pf_TelemetryDay() MERGE RANGE (@Day);
+        END
+        ELSE
+            -- late rows in a partition spanning several days (e.g. before the first boundary)
+            DELETE FROM dbo.Telemetry WHERE Ts >= @Day AND Ts < @Next;
+
+        DELETE FROM dbo.Events WHERE Ts >= @Day AND Ts < @Next;
+
+        MERGE dbo.ArchivedDays AS a
+        USING (SELECT CAST(@Day AS DATE) AS Day) AS n ON a.Day = n.Day
+        WHEN MATCHED THEN UPDATE SET
+            TelemetryRows = a.TelemetryRows + @TelemetryRows,
+            EventRows = a.EventRows + @EventRows,
+            ArchivedAt = SYSUTCDATETIME()
+        WHEN NOT MATCHED THEN INSERT (Day, TelemetryRows, EventRows) VALUES (n.Day, @TelemetryRows, @EventRows);
+
+        -- cached reads of the day change (sub-hour buckets, stats)
+        UPDATE dbo.EtlWatermark SET Version = Version + 1, UpdatedAt = SYSUTCDATETIME()
+        WHERE Name = 'ingest';
+    COMMIT;
+END;
+GO
@@ -0,0 +1,193 @@
+USE FactoryDB;
+GO
+-- indexes on computed columns and filtered indexes need QUOTED_IDENTIFIER ON in every
+-- session and module that writes dbo.Events (sqlcmd defaults to OFF: run with -I)
+SET QUOTED_IDENTIFIER ON;
+GO
+
+/* -------------------------------------------
+   Event search (safe to re-run on an existing DB)
+   - dbo.Events.Severity: persisted rank of Type (same mapping as
+     dbo.NormalizeSeverity), so reads no longer call a scalar UDF per row,
+     which kept their plans serial
+   - covering indexes for the search filters: time range (IX_Events_Ts),
+     machines (IX_Events_Machine_Ts), severity, and a filtered index on Code
+   - full-text index on Message where Full-Text Search is installed;
+     sp_SearchEvents falls back to LIKE without it
+   ------------------------------------------- */
+
+IF COL_LENGTH('dbo.Events', 'Severity') IS NULL
+    -- one pass over the table to persist the value (size-of-data on large tables)
+    ALTER TABLE dbo.Events ADD Severity AS CAST(
+        CASE UPPER(Type) WHEN 'ERROR' THEN 3 WHEN 'MAINT' THEN 2 WHEN 'STOP' THEN 1 ELSE 0 END
+        AS TINYINT) PERSISTED NOT NULL;
+GO
+
+-- Procs created by sqlcmd without -I keep QUOTED_IDENTIFIER OFF and would fail to write
+-- dbo.Events once the indexes below exist: re-create those that reference it with ON
+DECLARE @id INT, @def NVARCHAR(MAX), @at INT;
+DECLARE mods CURSOR LOCAL FAST_FORWARD FOR
+    SELECT DISTINCT m.object_id
+    FROM sys.sql_modules m
+    JOIN sys.sql_expression_dependencies d ON d.referencing_id = m.object_id
+    WHERE m.uses_quoted_identifier = 0
+      AND OBJECTPROPERTY(m.object_id, 'IsProcedure') = 1
+      AND d.referenced_id = OBJECT_ID('dbo.Events');
+OPEN mods;
+FETCH NEXT FROM mods INTO @id;
+WHILE @@FETCH_STATUS = 0
+BEGIN
+    SET @def = OBJECT_DEFINITION(@id);
+    SET @at = PATINDEX(N'%CREATE PROC%', @def);
+    IF @at > 0
+        SET @def = STUFF(@def, @at, LEN(N'CREATE'), N'CREATE OR ALTER');
+    EXEC sp_executesql @def;
+    FETCH NEXT FROM mods INTO @id;
+END;
+CLOSE mods;
+DEALLOCATE mods;
+GO
+
+-- Time range: every search is bounded by Ts; (Ts, Id) order serves the keyset pages
+IF NOT EXISTS (
+    SELECT 1 FROM sys.index_columns ic JOIN sys.indexes i ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+    WHERE i.object_id = OBJECT_ID('dbo.Events') AND i.name = 'IX_Events_Ts' AND ic.is_included_column = 1
+)
+    CREATE INDEX IX_Events_Ts ON dbo.Events (Ts)
+        INCLUDE (MachineId, Type, Code, Severity)
+        WITH (DROP_EXISTING = ON);
+GO
+
+-- Machine sets (and /logs pages): same key as before, now covering the filter columns
+IF NOT EXISTS (
+    SELECT 1 FROM sys.index_columns ic JOIN sys.indexes i ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+    WHERE i.object_id = OBJECT_ID('dbo.Events') AND i.name = 'IX_Events_Machine_Ts' AND ic.is_included_column = 1
+)
+    CREATE INDEX IX_Events_Machine_Ts ON dbo.Events (MachineId, Ts)
+        INCLUDE (Type, Code, Severity)
+        WITH (DROP_EXISTING = ON);
+GO
+
+-- "all errors last month": a seek on the few high-severity rows
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Events_Severity_Ts' AND object_id = OBJECT_ID('dbo.Events'))
+    CREATE INDEX IX_Events_Severity_Ts ON dbo.Events (Severity, Ts)
+        INCLUDE (MachineId, Type, Code);
+GO
+
+-- "every E42 last month": most events (START/STOP) have no code and stay out of the index
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Events_Code_Ts' AND object_id = OBJECT_ID('dbo.Events'))
+    CREATE INDEX IX_Events_Code_Ts ON dbo.Events (Code, Ts)
+        INCLUDE (MachineId, Type, Severity)
+        WHERE Code IS NOT NULL;
+GO
+
+-- Full-text index on Message (Full-Text Search is an optional SQL Server feature)
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+   AND NOT EXISTS (SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('dbo.Events'))
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'ftFactory')
+        CREATE FULLTEXT CATALOG ftFactory;
+    -- the key index is the primary key on Id (system-named)
+    DECLARE @pk SYSNAME = (
+        SELECT name FROM sys.key_constraints WHERE parent_object_id = OBJECT_ID('dbo.Events') AND type = 'PK'
+    );
+    DECLARE @sql NVARCHAR(MAX) = N'CREATE FULLTEXT INDEX ON dbo.Events (Message) KEY INDEX ' + QUOTENAME(@pk)
+        + N' ON ftFactory WITH (CHANGE_TRACKING = AUTO);';
+    EXEC sp_executesql @sql;
+END;
+GO
+
+-- sp_GetLatestLogs reads the persisted rank instead of calling the UDF per row
+CREATE OR ALTER PROCEDURE dbo.sp_GetLatestLogs
+    @Top INT = 50,
+    @MachineId INT = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    SELECT TOP (@Top)
+        e.Id,
+        e.MachineId,
+        e.Ts,
+        e.Type,
+        e.Code,
+        e.Message,
+        m.Name AS MachineName,
+        m.Line  AS Line,
+        e.Severity AS SeverityRank
+    FROM dbo.Events e
+    INNER JOIN dbo.Machines m ON m.Id = e.MachineId
+    WHERE (@MachineId IS NULL OR e.MachineId = @MachineId)
+    ORDER BY e.Ts DESC;
+END;
+GO
+
+/* -------------------------------------------
+   sp_SearchEvents: events in [@From, @To), newest first, keyset-paginated on
+   (Ts, Id) like /logs. Every other filter is optional (NULL = any):
+   - @MachineIds, @Lines, @Types, @Codes: comma-separated lists
+   - @MinSeverity: Severity >= (0 START .. 3 ERROR)
+   - @Text: words in Message; with the full-text index every word must match
+     as a prefix (CONTAINS), otherwise the text is matched as a substring (LIKE)
+   OPTION (RECOMPILE) compiles each call for its actual filters, so the
+   optimizer picks the time, machine, severity or code index per search
+   ------------------------------------------- */
+CREATE OR ALTER PROCEDURE dbo.sp_SearchEvents
+    @From DATETIME2,
+    @To   DATETIME2,
+    @MachineIds NVARCHAR(MAX) = NULL,
+    @Lines NVARCHAR(MAX) = NULL,
+    @Types NVARCHAR(MAX) = NULL,
+    @Codes NVARCHAR(MAX) = NULL,
+    @MinSeverity TINYINT = NULL,
+    @Text NVARCHAR(200) = NULL,
+    @Top INT = 100,
+    @BeforeTs DATETIME2 = NULL,
+    @BeforeId INT = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Ft NVARCHAR(1000) = NULL, @Like NVARCHAR(300) = NULL, @TextFilter NVARCHAR(100) = N'';
+    IF NULLIF(LTRIM(@Text), N'') IS NOT NULL
+    BEGIN
+        IF OBJECTPROPERTY(OBJECT_ID('dbo.Events'), 'TableHasActiveFulltextIndex') = 1
+        BEGIN
+            SELECT @Ft = STRING_AGG(N'"' + w + N'*"', N' AND ')
+            FROM (SELECT REPLACE(value, N'"', N'') AS w FROM STRING_SPLIT(@Text, N' ')) s
+            WHERE w <> N'';
+            IF @Ft IS NOT NULL
+                SET @TextFilter = N'AND CONTAINS(e.Message, @Ft)';
+        END
+        ELSE
+        BEGIN
+            SET @Like = N'%' + REPLACE(REPLACE(REPLACE(LTRIM(RTRIM(@Text)), N'[', N'[[]'), N'%', N'[%]'), N'_', N'[_]') + N'%';
+            SET @TextFilter = N'AND e.Message LIKE @Like';
+        END;
+    END;
+
+    -- CONTAINS does not compile on a table without a full-text index: the text predicate is spliced in
+    DECLARE @sql NVARCHAR(MAX) = N'
+    SELECT TOP (@Top)
+        e.Id, e.MachineId, e.Ts, e.Type, e.Code, e.Message,
+        m.Name AS MachineName, m.Line AS Line, e.Severity AS SeverityRank
+    FROM dbo.Events e
+    INNER JOIN dbo.Machines m ON m.Id = e.MachineId
+    WHERE e.Ts >= @From AND e.Ts < @To
+      AND (@BeforeTs IS NULL OR e.Ts < @BeforeTs OR (e.Ts = @BeforeTs AND e.Id < @BeforeId))
+      AND (@MachineIds IS NULL OR e.MachineId IN (SELECT TRY_CAST(value AS INT) FROM STRING_SPLIT(@MachineIds, '','')))
+      AND (@Lines IS NULL OR m.Line IN (SELECT value FROM STRING_SPLIT(@Lines, '','')))
+      AND (@Types IS NULL OR e.Type IN (SELECT value FROM STRING_SPLIT(@Types, '','')))
+      AND (@Codes IS NULL OR e.Code IN (SELECT value FROM STRING_SPLIT(@Codes, '','')))
+      AND (@MinSeverity IS NULL OR e.Severity >= @MinSeverity)
+      ' + @TextFilter + N'
+    ORDER BY e.Ts DESC, e.Id DESC
+    OPTION (RECOMPILE);';
+
+    EXEC sp_executesql @sql,
+        N'@From DATETIME2, @To DATETIME2, @MachineIds NVARCHAR(MAX), @Lines NVARCHAR(MAX), @Types NVARCHAR(MAX),
+          @Codes NVARCHAR(MAX), @MinSeverity TINYINT, @Ft NVARCHAR(1000), @Like NVARCHAR(300), @Top INT,
+          @BeforeTs DATETIME2, @BeforeId INT',
+        @From, @To, @MachineIds, @Lines, @Types, @Codes, @MinSeverity, @Ft, @Like, @Top, @BeforeTs, @BeforeId;
+END;
+GO
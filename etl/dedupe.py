@@ -0,0 +1,146 @@
+# etl/dedupe.py
+# Persistent dedupe index: 64-bit content hashes of every committed row, kept
+# as a sorted array on disk (memory-mapped, binary searched) with a Bloom filter
+# in front, so duplicates are rejected across files and runs at ~9 bytes/row.
+# The unique keys on dbo.Events / dbo.Telemetry (db/06_dedupe_keys.sql) stay the
+# final guard, e.g. for rows committed right before a crash.
+import array, bisect, hashlib, mmap, os, sys
+from pathlib import Path
+
+# Hashes committed since the last merge are kept in memory up to this count
+MERGE_ROWS = int(os.getenv("DEDUPE_MERGE_ROWS", "1000000"))
+BLOOM_BITS_PER_ROW = 10
+BLOOM_HASHES = 7
+MIN_CAPACITY = 1 << 20
+
+def content_hash(*parts) -> int:
+    sig = "|".join("" if p is None else str(p) for p in parts)
+    return int.from_bytes(hashlib.blake2b(sig.encode(), digest_size=8).digest(), "little", signed=True)
+
+class Bloom:
+    def __init__(self, capacity: int, bits: bytearray = None):
+        self.capacity = capacity
+        self.m = capacity * BLOOM_BITS_PER_ROW
+        self.bits = bits if bits is not None else bytearray((self.m + 7) // 8)
+
+    def _positions(self, h: int):
+        # double hashing from the two 32-bit halves of the (already random) hash
+        h &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.m for i in range(BLOOM_HASHES)]
+
+    def add(self, h: int):
+        for p in self._positions(h):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, h: int) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(h))
+
+class DedupeIndex:
+    """Sorted int64 file <path>.idx + Bloom filter <path>.bloom.
+
+    Lookups: Bloom miss -> new; else staged/pending sets; else binary search on disk.
+    stage() marks a hash as taken by the current (uncommitted) chunk; commit()
+    moves staged hashes to pending once the chunk is in the database, rollback()
+    forgets them. flush() merges pending into the on-disk array.
+    """
+
+    def __init__(self, path: Path, auto_merge: bool = True):
+        self.idx_path = path.with_suffix(".idx")
+        self.bloom_path = path.with_suffix(".bloom")
+        self.auto_merge = auto_merge
+        self.staged = set()
+        self.pending = set()
+        self._open()
+
+    def _open(self):
+        self._mm = None
+        self.disk = memoryview(b"").cast("q")
+        if self.idx_path.exists() and self.idx_path.stat().st_size:
+            with self.idx_path.open("rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.disk = memoryview(self._mm).cast("q")
+        count = len(self.disk)
+        if self.bloom_path.exists():
+            raw = self.bloom_path.read_bytes()
+            capacity = int.from_bytes(raw[:8], "little")
+            self.bloom = Bloom(capacity, bytearray(raw[8:]))
+        else:
+            self.bloom = Bloom(max(MIN_CAPACITY, count * 2))
+            for h in self.disk:
+                self.bloom.add(h)
+
+    def __len__(self):
+        return len(self.disk) + len(self.pending)
+
+    def seen(self, h: int) -> bool:
+        if h in self.staged or h in self.pending:
+            return True
+        if h not in self.bloom:
+            return False
+        i = bisect.bisect_left(self.disk, h)
+        return i < len(self.disk) and self.disk[i] == h
+
+    def stage(self, h: int):
+        self.staged.add(h)
+
+    def commit(self):
+        for h in self.staged:
+            self.bloom.add(h)
+        self.pending |= self.staged
+        self.staged = set()
+        if self.auto_merge and len(self.pending) >= MERGE_ROWS:
+            self.flush()
+
+    def rollback(self):
+        self.staged = set()
+
+    def take_pending(self) -> bytes:
+        # worker processes hand their committed hashes to the parent, which owns the files
+        out = array.array("q", self.pending).tobytes()
+        self.pending = set()
+        return out
+
+    def add_many(self, raw: bytes):
+        hashes = array.array("q")
+        hashes.frombytes(raw)
+        for h in hashes:
+            self.bloom.add(h)
+        self.pending.update(hashes)
+        if self.auto_merge and len(self.pending) >= MERGE_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        tmp = self.idx_path.with_suffix(".idx.tmp")
+        count, i = len(self.disk), 0
+        with tmp.open("wb") as out:
+            # stream the merge: copy the disk run below each new hash, then the hash
+            for h in sorted(self.pending):
+                j = bisect.bisect_left(self.disk, h, i)
+                out.write(self.disk[i:j])
+                if j >= len(self.disk) or self.disk[j] != h:
+                    out.write(h.to_bytes(8, sys.byteorder, signed=True))
+                    count += 1
+                i = j
+            out.write(self.disk[i:])
+        self.disk.release()
+        if self._mm is not None:
+            self._mm.close()
+        os.replace(tmp, self.idx_path)
+        self.pending = set()
+
+        if count > self.bloom.capacity:
+            # the filter is sized at twice the row count; rebuild it from the merged array
+            self.bloom_path.unlink(missing_ok=True)
+        else:
+            self._save_bloom()
+        self._open()
+        if not self.bloom_path.exists():
+            self._save_bloom()
+
+    def _save_bloom(self):
+        tmp = self.bloom_path.with_suffix(".bloom.tmp")
+        tmp.write_bytes(self.bloom.capacity.to_bytes(8, "little") + bytes(self.bloom.bits))
+        os.replace(tmp, self.bloom_path)
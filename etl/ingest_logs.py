@@ -1,9 +1,16 @@
 # etl/ingest_logs.py
-import csv, glob, hashlib, json, os, sys
+import argparse, contextlib, json, multiprocessing, os, signal, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+
+import parquet_sink
+from dedupe import DedupeIndex, content_hash
+from readers import Cursor, iter_csv_rows, iter_json_items
+from state import StateStore
 
 # --- DB config from env (fallbacks for local dev) ---
 DB_SERVER = os.getenv("DB_SERVER")
@@ -21,30 +28,79 @@ DATA_DIR = Path(os.getenv("DATA_DIR", "data")).resolve()
 STATE_DIR = Path(os.getenv("STATE_DIR", ".etl_state")).resolve()
 STATE_DIR.mkdir(exist_ok=True)
 
-engine = create_engine(CONN_STR, pool_pre_ping=True, future=True)
-
-def file_processed(fp: Path) -> bool:
-    # Simple per-file fingerprint to avoid re-processing
-    h = hashlib.sha256(fp.read_bytes()).hexdigest()
-    state_file = STATE_DIR / (fp.name + ".sha256")
-    if state_file.exists() and state_file.read_text() == h:
-        return True
-    state_file.write_text(h)
-    return False
-
-def get_machine_id(conn, name: str) -> int:
-    row = conn.execute(
-        text("SELECT Id FROM dbo.Machines WHERE Name = :n"),
-        {"n": name}
-    ).fetchone()
-    if row:
-        return int(row.Id)
-    # create if not exists (optional)
-    r2 = conn.execute(
-        text("INSERT INTO dbo.Machines (Name, Line, Status) OUTPUT INSERTED.Id VALUES (:n, 'LineX', 'RUNNING')"),
-        {"n": name}
-    ).fetchone()
-    return int(r2[0])
+# Rows per executemany round trip (bulk path)
+BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "5000"))
+
+# Watch mode: a flush that fails on a DB error is retried, waiting up to this many seconds between tries
+RETRY_MAX = float(os.getenv("ETL_RETRY_MAX", "60"))
+
+# fast_executemany lets pyodbc ship a whole chunk of parameter rows in one call
+engine = create_engine(CONN_STR, pool_pre_ping=True, future=True, fast_executemany=True)
+
+# Offsets / fingerprints of every input file (see etl/state.py)
+state = StateStore(STATE_DIR / "state.sqlite3")
+
+# 64-bit hashes of every committed row, across files and runs (see etl/dedupe.py)
+dedupe = {kind: DedupeIndex(STATE_DIR / f"dedupe_{kind}") for kind in ("events", "telemetry")}
+
+# Caps concurrent chunk writes across worker processes (no-op when serial)
+writers = contextlib.nullcontext()
+
+class MachineCache:
+    """Name -> Id map kept for the whole run; unknown names are resolved per chunk."""
+
+    def __init__(self):
+        self.ids = {}
+        # set in worker processes: new machines are then created one worker at a
+        # time, in their own committed transaction, so no two workers add the same name
+        self.lock = None
+
+    def resolve(self, conn, names) -> dict:
+        missing = sorted({n for n in names if n not in self.ids})
+        if missing:
+            self._load(conn, missing)
+            unknown = [n for n in missing if n not in self.ids]
+            if unknown and self.lock is None:
+                self._create(conn, unknown)
+                self._load(conn, unknown)
+            elif unknown:
+                with self.lock, engine.begin() as mconn:
+                    self._create(mconn, unknown)
+                    self._load(mconn, unknown)
+        return self.ids
+
+    def _create(self, conn, names):
+        # create if not exists (optional) — one executemany batch for all new names
+        conn.execute(text("""
+            INSERT INTO dbo.Machines (Name, Line, Status)
+            SELECT :n, 'LineX', 'RUNNING'
+            WHERE NOT EXISTS (SELECT 1 FROM dbo.Machines WHERE Name = :n)
+        """), [{"n": n} for n in names])
+
+    def _load(self, conn, names):
+        # chunk the IN list to stay under the 2100 parameter limit of SQL Server
+        for i in range(0, len(names), 1000):
+            part = names[i:i + 1000]
+            params = {f"n{j}": n for j, n in enumerate(part)}
+            in_list = ", ".join(f":n{j}" for j in range(len(part)))
+            rows = conn.execute(
+                text(f"SELECT Id, Name FROM dbo.Machines WHERE Name IN ({in_list})"),
+                params
+            ).all()
+            for r in rows:
+                self.ids.setdefault(r.Name, int(r.Id))
+
+machines = MachineCache()
+
+def chunked(it, size):
+    buf = []
+    for item in it:
+        buf.append(item)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
 
 def parse_iso(ts: str) -> str:
     # Return ISO string acceptable by SQL Server (DATETIME2)
@@ -53,18 +109,107 @@ def parse_iso(ts: str) -> str:
     except Exception:
         raise ValueError(f"Bad timestamp: {ts}")
 
-def ingest_events(conn, fp: Path):
-    print(f"[ETL] Ingesting events from {fp}")
-    if file_processed(fp):
-        print(f"[ETL] Skipping (already processed): {fp.name}")
-        return
-    with fp.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+EVENTS_INSERT = text("""
+    INSERT INTO dbo.Events (MachineId, Ts, Type, Code, Message)
+    VALUES (:mid, :ts, :typ, :code, :msg)
+""")
 
-    # Optional: lightweight dedupe per file using a hash set
-    seen = set()
+TELEMETRY_INSERT = text("""
+    INSERT INTO dbo.Telemetry (MachineId, Ts, Temperature, Vibration, Throughput)
+    VALUES (:mid, :ts, :t, :v, :th)
+""")
+
+# SQL Server: chunks are bulk-inserted into a session temp table, then one proc
+# call moves the new rows into the table and adds them to the hourly/daily
+# rollups (db/07_rollups.sql) in the same transaction; it returns the Seq of
+# each row it inserted
+STAGES = {
+    "events": (
+        text("""
+            IF OBJECT_ID('tempdb..#EventsStage') IS NULL
+                CREATE TABLE #EventsStage (Seq INT NOT NULL, MachineId INT NOT NULL, Ts DATETIME2 NOT NULL,
+                    Type NVARCHAR(16) NOT NULL, Code NVARCHAR(32) NULL, Message NVARCHAR(200) NULL)
+            ELSE
+                TRUNCATE TABLE #EventsStage
+        """),
+        text("""
+            INSERT INTO #EventsStage (Seq, MachineId, Ts, Type, Code, Message)
+            VALUES (:seq, :mid, :ts, :typ, :code, :msg)
+        """),
+        text("EXEC dbo.sp_IngestEventsStage"),
+    ),
+    "telemetry": (
+        text("""
+            IF OBJECT_ID('tempdb..#TelemetryStage') IS NULL
+                CREATE TABLE #TelemetryStage (Seq INT NOT NULL, MachineId INT NOT NULL, Ts DATETIME2 NOT NULL,
+                    Temperature FLOAT NULL, Vibration FLOAT NULL, Throughput INT NULL)
+            ELSE
+                TRUNCATE TABLE #TelemetryStage
+        """),
+        text("""
+            INSERT INTO #TelemetryStage (Seq, MachineId, Ts, Temperature, Vibration, Throughput)
+            VALUES (:seq, :mid, :ts, :t, :v, :th)
+        """),
+        text("EXEC dbo.sp_IngestTelemetryStage"),
+    ),
+}
+
+INSERTS = {"events": EVENTS_INSERT, "telemetry": TELEMETRY_INSERT}
+
+# Data watermark read by the API response cache (db/08_watermark.sql); bumped last
+# so the row lock is held only until the chunk commits
+BUMP_WATERMARK = text("""
+    UPDATE dbo.EtlWatermark SET Version = Version + 1, UpdatedAt = SYSUTCDATETIME()
+    WHERE Name = 'ingest'
+""")
+
+def insert_chunk(conn, kind, chunk) -> int:
+    """Write one chunk of rows; returns the rows the database actually inserted."""
+    # rows carry "_machine" (name); the chunk's names are resolved in one step, then executemany.
+    # The chunk itself is left as it is, so a failed chunk can be written again
+    ids = machines.resolve(conn, {r["_machine"] for r in chunk})
+    chunk = [{**r, "name": r["_machine"], "mid": ids[r["_machine"]], "seq": seq} for seq, r in enumerate(chunk)]
+    if conn.dialect.name != "mssql":
+        # no staging procs / rollups outside SQL Server
+        conn.execute(INSERTS[kind], chunk)
+        new = chunk
+    else:
+        prepare, stage, load = STAGES[kind]
+        conn.execute(prepare)
+        conn.execute(stage, chunk)
+        # rows skipped as already in the table, or repeated within the chunk, are not in it
+        new = [chunk[r.Seq] for r in conn.execute(load)]
+        if new:
+            conn.execute(BUMP_WATERMARK)
+    copy = chunk if parquet_sink.PARQUET_BACKFILL else new
+    if parquet_sink.enabled() and copy:
+        # columnar copy for the analytics engine, written before the commit (idempotent part names)
+        parquet_sink.write_chunk(kind, copy)
+    return len(new)
+
+def write_rows(kind, rows, index, on_commit=None) -> int:
+    # each chunk goes in its own transaction; once it is committed its hashes
+    # join the dedupe index and on_commit() records progress
     inserted = 0
+    try:
+        for chunk in chunked(rows, BATCH_SIZE):
+            with writers, engine.begin() as conn:
+                inserted += insert_chunk(conn, kind, chunk)
+            index.commit()
+            if on_commit:
+                on_commit()
+    except BaseException:
+        # parse or write error: hashes of the uncommitted chunk were never stored
+        index.rollback()
+        raise
+    return inserted
+
+def report(kind: str, fp: Path, inserted: int, started: float):
+    elapsed = time.perf_counter() - started
+    rate = inserted / elapsed if elapsed > 0 else 0.0
+    print(f"[ETL] {kind} inserted: {inserted} from {fp.name} in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+def event_rows(rows, index):
     for r in rows:
         mname = r["MachineName"].strip()
         etype = r["Type"].strip().upper()
@@ -72,30 +217,14 @@ def ingest_events(conn, fp: Path):
         msg   = (r.get("Message") or "").strip() or None
         ts    = parse_iso(r["Ts"].strip())
 
-        # content signature
-        sig = hashlib.sha1(f"{mname}|{etype}|{code}|{msg}|{ts}".encode()).hexdigest()
-        if sig in seen:
+        # content signature, checked against everything committed so far
+        sig = content_hash(mname, etype, code, msg, ts)
+        if index.seen(sig):
             continue
-        seen.add(sig)
+        index.stage(sig)
+        yield {"_machine": mname, "ts": ts, "typ": etype, "code": code, "msg": msg}
 
-        mid = get_machine_id(conn, mname)
-        conn.execute(text("""
-            INSERT INTO dbo.Events (MachineId, Ts, Type, Code, Message)
-            VALUES (:mid, :ts, :typ, :code, :msg)
-        """), {"mid": mid, "ts": ts, "typ": etype, "code": code, "msg": msg})
-        inserted += 1
-
-    print(f"[ETL] Events inserted: {inserted}")
-
-def ingest_telemetry(conn, fp: Path):
-    print(f"[ETL] Ingesting telemetry from {fp}")
-    if file_processed(fp):
-        print(f"[ETL] Skipping (already processed): {fp.name}")
-        return
-    items = json.loads(fp.read_text(encoding="utf-8"))
-
-    seen = set()
-    inserted = 0
+def telemetry_rows(items, index):
     for r in items:
         mname = str(r["MachineName"]).strip()
         ts    = parse_iso(str(r["Ts"]).strip())
@@ -103,35 +232,276 @@ def ingest_telemetry(conn, fp: Path):
         vib   = r.get("Vibration")
         thr   = r.get("Throughput")
 
-        sig = hashlib.sha1(f"{mname}|{ts}|{temp}|{vib}|{thr}".encode()).hexdigest()
-        if sig in seen:
+        # natural key: one sample per machine and timestamp (UX_Telemetry_Machine_Ts)
+        sig = content_hash(mname, ts)
+        if index.seen(sig):
             continue
-        seen.add(sig)
+        index.stage(sig)
+        yield {"_machine": mname, "ts": ts, "t": temp, "v": vib, "th": thr}
 
-        mid = get_machine_id(conn, mname)
-        conn.execute(text("""
-            INSERT INTO dbo.Telemetry (MachineId, Ts, Temperature, Vibration, Throughput)
-            VALUES (:mid, :ts, :t, :v, :th)
-        """), {"mid": mid, "ts": ts, "t": temp, "v": vib, "th": thr})
-        inserted += 1
+def ingest_file(fp: Path, kind: str, parse) -> int:
+    """Ingest what is new in one file, committing chunk by chunk; returns rows inserted."""
+    print(f"[ETL] Ingesting {kind.lower()} from {fp}")
+    state.import_legacy(fp, STATE_DIR)
+    start = state.resume_point(fp)
+    if start is None:
+        print(f"[ETL] Skipping (already processed): {fp.name}")
+        return 0
+    started = time.perf_counter()
+    cursor = Cursor(*start)
+    if cursor.offset:
+        print(f"[ETL] Resuming {fp.name} at byte {cursor.offset} (record {cursor.records})")
+
+    with fp.open("rb") as f:
+        inserted = write_rows(kind.lower(), parse(f, cursor), dedupe[kind.lower()],
+                              on_commit=lambda: state.commit(fp, cursor.offset, cursor.records))
+    state.commit(fp, cursor.offset, cursor.records, complete=True)
+    report(kind, fp, inserted, started)
+    return inserted
+
+def parse_events(f, cursor, tail=False):
+    return event_rows(iter_csv_rows(f, cursor, tail), dedupe["events"])
+
+def parse_telemetry(f, cursor, tail=False):
+    return telemetry_rows(iter_json_items(f, cursor, tail), dedupe["telemetry"])
+
+KINDS = {"events": parse_events, "telemetry": parse_telemetry}
+
+def ingest_events(fp: Path) -> int:
+    return ingest_file(fp, "Events", parse_events)
+
+def ingest_telemetry(fp: Path) -> int:
+    return ingest_file(fp, "Telemetry", parse_telemetry)
+
+INGESTERS = {"events": ingest_events, "telemetry": ingest_telemetry}
+
+def discover():
+    files = [("events", fp) for fp in sorted(DATA_DIR.glob("events_*.csv"))]
+    # JSON telemetry (array or JSON Lines)
+    files += [("telemetry", fp) for fp in sorted([*DATA_DIR.glob("telemetry_*.json"), *DATA_DIR.glob("telemetry_*.jsonl")])]
+    return files
+
+def process_file(kind: str, path: str):
+    """Run one file; failures are returned (not raised) so they can be reported per file."""
+    fp = Path(path)
+    try:
+        return fp.name, INGESTERS[kind](fp), None
+    except Exception as e:
+        print(f"[ETL] FAILED {fp.name}: {e}", file=sys.stderr)
+        return fp.name, 0, f"{type(e).__name__}: {e}"
+
+def work_file(kind: str, path: str):
+    # pool task: also hand back the hashes committed by this worker
+    return (*process_file(kind, path), dedupe[kind].take_pending())
+
+def init_worker(writer_slots, machine_lock, batch_size):
+    global writers, BATCH_SIZE
+    # connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+    writers = writer_slots
+    machines.lock = machine_lock
+    BATCH_SIZE = batch_size
+    # the parent owns the dedupe index files
+    for index in dedupe.values():
+        index.auto_merge = False
+
+def run_parallel(files, workers: int, writer_count: int):
+    ctx = multiprocessing.get_context()
+    initargs = (ctx.BoundedSemaphore(writer_count), ctx.Lock(), BATCH_SIZE)
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=init_worker, initargs=initargs) as pool:
+        futures = {pool.submit(work_file, kind, str(fp)): kind for kind, fp in files}
+        results = []
+        for f in as_completed(futures):
+            name, inserted, err, hashes = f.result()
+            dedupe[futures[f]].add_many(hashes)
+            results.append((name, inserted, err))
+        return results
+
+class Watcher:
+    """Polls DATA_DIR and ingests new and appended records in micro-batches.
 
-    print(f"[ETL] Telemetry inserted: {inserted}")
+    A flush happens when flush_rows records are buffered or the oldest buffered
+    record has waited flush_interval seconds. Rows from all files go out in one
+    transaction, then every file's offset is committed to the state store.
+    Ingest lag is commit time minus the file mtime seen when the rows were read.
+    A flush that fails on a DB error keeps its rows and is retried with backoff
+    (up to RETRY_MAX seconds apart); nothing more is read until it succeeds.
+    """
+
+    def __init__(self, flush_rows: int, flush_interval: float, poll_interval: float):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.seen = {}     # name -> (size, mtime_ns) at the last read
+        self.cursors = {}  # name -> Cursor, may be ahead of the committed state
+        self.pending = {kind: [] for kind in KINDS}
+        self.pending_files = {}
+        self.buffered = 0
+        self.buffered_since = None
+        self.oldest_write = None
+        self.failed = False   # the last flush raised: its rows are still pending
+
+    def run(self):
+        print(f"[ETL] Watching {DATA_DIR} (flush {self.flush_rows} rows / {self.flush_interval}s)")
+        delay = 0.0
+        try:
+            while True:
+                try:
+                    if self.failed:
+                        self.flush()
+                    self.poll()
+                    if self.buffered and time.monotonic() - self.buffered_since >= self.flush_interval:
+                        self.flush()
+                    delay = 0.0
+                except DBAPIError as e:
+                    # DB down, failover, deadlock victim...: keep the buffered rows and try again
+                    delay = min(RETRY_MAX, max(1.0, delay * 2))
+                    print(f"[ETL] Flush of {self.buffered} rows failed, retrying in {delay:.0f}s: {e}", file=sys.stderr)
+                    time.sleep(delay)
+                    continue
+                time.sleep(self.poll_interval)
+        finally:
+            if self.failed:
+                # leaving with rows that never committed: their hashes must not be recorded
+                for index in dedupe.values():
+                    index.rollback()
+            else:
+                self.flush()
+            for index in dedupe.values():
+                index.flush()
+
+    def poll(self):
+        for kind, fp in discover():
+            try:
+                st = fp.stat()
+            except FileNotFoundError:
+                continue
+            key = (st.st_size, st.st_mtime_ns)
+            if self.seen.get(fp.name) == key:
+                continue
+            self.read_new(kind, fp, st)
+            # only once read to the end: a read cut short by a failed flush goes on next time
+            self.seen[fp.name] = key
+
+    def cursor_for(self, fp: Path, size: int) -> Cursor:
+        cursor = self.cursors.get(fp.name)
+        if cursor is not None and size < cursor.offset:
+            # truncated or replaced: commit what is buffered, then let the state store decide
+            self.flush()
+            cursor = None
+        if cursor is None:
+            state.import_legacy(fp, STATE_DIR)
+            start = state.resume_point(fp)
+            if start is None:
+                row = state.get(fp.name)
+                start = (row["offset"], row["records"])
+            cursor = self.cursors[fp.name] = Cursor(*start)
+        return cursor
+
+    def read_new(self, kind: str, fp: Path, st):
+        cursor = self.cursor_for(fp, st.st_size)
+        parse = KINDS[kind]
+        with fp.open("rb") as f:
+            for row in parse(f, cursor, tail=True):
+                self.pending[kind].append(row)
+                self.pending_files[fp.name] = (fp, cursor)
+                if not self.buffered:
+                    self.buffered_since = time.monotonic()
+                self.buffered += 1
+                self.oldest_write = min(self.oldest_write or st.st_mtime, st.st_mtime)
+                if self.buffered >= self.flush_rows:
+                    self.flush()
+
+    def flush(self):
+        if not self.buffered:
+            return
+        try:
+            with writers, engine.begin() as conn:
+                for kind, rows in self.pending.items():
+                    if rows:
+                        insert_chunk(conn, kind, rows)
+        except BaseException:
+            # the rows stay pending and their hashes staged, for the next attempt
+            self.failed = True
+            raise
+        self.failed = False
+        for index in dedupe.values():
+            index.commit()
+        committed_at = time.time()
+        for fp, cursor in self.pending_files.values():
+            state.commit(fp, cursor.offset, cursor.records)
+        lag = max(0.0, committed_at - self.oldest_write)
+        state.record_flush(self.buffered, lag, committed_at)
+        print(f"[ETL] Flushed {self.buffered} rows from {len(self.pending_files)} files, ingest lag {lag:.2f}s")
+
+        self.pending = {kind: [] for kind in KINDS}
+        self.pending_files = {}
+        self.buffered = 0
+        self.buffered_since = None
+        self.oldest_write = None
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Ingest events CSV and telemetry JSON into FactoryDB")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("ETL_WORKERS", "1")),
+                    help="worker processes parsing files in parallel (1 = serial)")
+    ap.add_argument("--writers", type=int, default=None,
+                    help="max concurrent chunk writes to the database (default: workers)")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per executemany round trip")
+    ap.add_argument("--watch", action="store_true", help="keep running and ingest new/appended data")
+    ap.add_argument("--flush-rows", type=int, default=int(os.getenv("ETL_FLUSH_ROWS", "1000")),
+                    help="watch mode: flush once this many rows are buffered")
+    ap.add_argument("--flush-interval", type=float, default=float(os.getenv("ETL_FLUSH_INTERVAL", "1.0")),
+                    help="watch mode: max seconds a buffered row waits before a flush")
+    ap.add_argument("--lag", action="store_true", help="print ingest lag of recent watch-mode flushes and exit")
+    ap.add_argument("--compact-parquet", action="store_true",
+                    help="merge the small Parquet parts under PARQUET_DIR per partition and exit (run with the ETL stopped)")
+    ap.add_argument("--poll-interval", type=float, default=float(os.getenv("ETL_POLL_INTERVAL", "0.5")),
+                    help="watch mode: seconds between directory scans")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    global BATCH_SIZE
+    args = parse_args(argv)
+    BATCH_SIZE = args.batch_size
 
-def main():
     if not DATA_DIR.exists():
         print(f"[ETL] Data dir does not exist: {DATA_DIR}", file=sys.stderr)
         sys.exit(1)
 
-    with engine.begin() as conn:
-        # CSV events
-        for fp in sorted(DATA_DIR.glob("events_*.csv")):
-            ingest_events(conn, fp)
+    if args.lag:
+        print(json.dumps(state.lag_stats()))
+        return
 
-        # JSON telemetry
-        for fp in sorted(DATA_DIR.glob("telemetry_*.json")):
-            ingest_telemetry(conn, fp)
+    if args.compact_parquet:
+        if not parquet_sink.enabled():
+            print("[ETL] PARQUET_DIR is not set", file=sys.stderr)
+            sys.exit(1)
+        for kind in KINDS:
+            print(f"[ETL] Compacted {parquet_sink.compact(kind)} {kind} partitions")
+        return
 
-    print("[ETL] Done.")
+    if args.watch:
+        # compose stops containers with SIGTERM; leave through the flush in Watcher.run
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        Watcher(args.flush_rows, args.flush_interval, args.poll_interval).run()
+        return
+
+    started = time.perf_counter()
+    files = discover()
+    if args.workers > 1 and len(files) > 1:
+        results = run_parallel(files, args.workers, args.writers or args.workers)
+    else:
+        results = [process_file(kind, str(fp)) for kind, fp in files]
+    for index in dedupe.values():
+        index.flush()
+
+    failed = [(name, err) for name, _, err in results if err]
+    total = sum(n for _, n, _ in results)
+    print(f"[ETL] Done. {total} rows from {len(files)} files in {time.perf_counter() - started:.2f}s")
+    for name, err in failed:
+        print(f"[ETL] Failed: {name}: {err}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,187 @@
+# etl/lifecycle.py
+# Daily data-lifecycle job (db/10_lifecycle.sql). Every day of raw telemetry and
+# events older than RAW_RETENTION_DAYS is written to gzip files in the ETL's own
+# input formats, then dropped from the hot tables by sp_DropRawDay; the day's
+# hourly/daily rollups (kept up to date by the ETL) stay. Telemetry goes with a
+# partition truncate. Day partitions are also kept LIFECYCLE_AHEAD_DAYS ahead of today.
+#
+# Archives: <ARCHIVE_DIR>/<YYYY-MM>/events_<day>_<hash>.csv.gz and
+# telemetry_<day>_<hash>.jsonl.gz. The hash is of the content, so a day archived
+# again after a failed drop overwrites its files, and late rows for an archived
+# day get files of their own. To restore a day, gunzip its files into DATA_DIR,
+# run the ETL, then EXEC dbo.sp_RebuildRollups with @From/@To set to that day.
+#
+#   python etl/lifecycle.py [--retention-days 90] [--max-days 31] [--dry-run]
+import argparse, csv, gzip, hashlib, io, json, os, sys, time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+DB_SERVER = os.getenv("DB_SERVER")
+DB_NAME   = os.getenv("DB_NAME")
+DB_USER   = os.getenv("DB_USER")
+DB_PASS   = os.getenv("DB_PASS")
+ODBC_DRIVER = os.getenv("ODBC_DRIVER")
+
+CONN_STR = (
+    f"mssql+pyodbc://{DB_USER}:{DB_PASS}@{DB_SERVER}/{DB_NAME}"
+    f"?driver={ODBC_DRIVER.replace(' ', '+')}&TrustServerCertificate=yes"
+)
+
+# raw rows are kept this many whole days before today (UTC)
+RAW_RETENTION_DAYS = int(os.getenv("RAW_RETENTION_DAYS", "90"))
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", "archive")).resolve()
+LIFECYCLE_AHEAD_DAYS = int(os.getenv("LIFECYCLE_AHEAD_DAYS", "7"))
+# rows fetched per round trip while writing an archive
+FETCH_ROWS = 10000
+
+engine = create_engine(CONN_STR, pool_pre_ping=True, future=True)
+
+# --- which days ---
+PARTITIONS_SQL = text("""
+    SELECT RangeFrom, RangeTo FROM dbo.vw_TelemetryPartitions
+    WHERE Rows > 0 AND (RangeFrom IS NULL OR RangeFrom < :c)
+    ORDER BY PartitionNumber
+""")
+TELEMETRY_DAYS_SQL = text("""
+    SELECT DISTINCT DATETRUNC(day, Ts) AS Day FROM dbo.Telemetry
+    WHERE Ts >= :lo AND Ts < :hi
+""")
+EVENT_DAYS_SQL = text("SELECT DISTINCT DATETRUNC(day, Ts) AS Day FROM dbo.Events WHERE Ts < :c")
+
+def expired_days(conn, cutoff: datetime) -> list:
+    """Days before `cutoff` that still have raw rows, oldest first."""
+    days = {r.Day for r in conn.execute(EVENT_DAYS_SQL, {"c": cutoff})}
+    # only non-empty partitions are read (row counts come from metadata)
+    for p in conn.execute(PARTITIONS_SQL, {"c": cutoff}).all():
+        lo = p.RangeFrom or datetime(1900, 1, 1)
+        hi = min(p.RangeTo, cutoff) if p.RangeTo else cutoff
+        days.update(r.Day for r in conn.execute(TELEMETRY_DAYS_SQL, {"lo": lo, "hi": hi}))
+    return sorted(days)
+
+# --- archive files (same formats the ETL reads) ---
+EVENTS_SQL = text("""
+    SELECT m.Name AS MachineName, e.Type, e.Code, e.Message, e.Ts
+    FROM dbo.Events e JOIN dbo.Machines m ON m.Id = e.MachineId
+    WHERE e.Ts >= :d AND e.Ts < :n
+    ORDER BY e.Ts, e.Id
+""")
+TELEMETRY_SQL = text("""
+    SELECT m.Name AS MachineName, t.Ts, t.Temperature, t.Vibration, t.Throughput
+    FROM dbo.Telemetry t JOIN dbo.Machines m ON m.Id = t.MachineId
+    WHERE t.Ts >= :d AND t.Ts < :n
+    ORDER BY t.MachineId, t.Ts
+""")
+
+def iso_z(ts) -> str:
+    return ts.isoformat() + "Z" if isinstance(ts, datetime) else str(ts)
+
+def event_lines(rows):
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(["MachineName", "Type", "Code", "Message", "Ts"])
+    for r in rows:
+        w.writerow([r.MachineName, r.Type, r.Code, r.Message, iso_z(r.Ts)])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+def telemetry_lines(rows):
+    for r in rows:
+        yield json.dumps({"MachineName": r.MachineName, "Ts": iso_z(r.Ts), "Temperature": r.Temperature,
+                          "Vibration": r.Vibration, "Throughput": r.Throughput}) + "\n"
+
+ARCHIVES = {
+    # kind: (query, line writer, extension)
+    "events": (EVENTS_SQL, event_lines, "csv"),
+    "telemetry": (TELEMETRY_SQL, telemetry_lines, "jsonl"),
+}
+
+def write_archive(conn, kind: str, day: datetime):
+    """Stream one day of `kind` into a gzip file; returns (rows, path or None when empty)."""
+    sql, lines, ext = ARCHIVES[kind]
+    out = ARCHIVE_DIR / f"{day:%Y-%m}"
+    out.mkdir(parents=True, exist_ok=True)
+    tmp = out / f".{kind}_{day:%Y-%m-%d}.{os.getpid()}.tmp"
+    h = hashlib.sha1()
+    n = 0
+
+    result = conn.execution_options(yield_per=FETCH_ROWS).execute(sql, {"d": day, "n": day + timedelta(days=1)})
+
+    def counted():
+        nonlocal n
+        for r in result:
+            n += 1
+            yield r
+
+    with open(tmp, "wb") as raw:
+        # no name or mtime in the header: same rows, same bytes
+        with gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0) as gz:
+            for line in lines(counted()):
+                data = line.encode("utf-8")
+                h.update(data)
+                gz.write(data)
+        raw.flush()
+        os.fsync(raw.fileno())
+    if not n:
+        tmp.unlink()
+        return 0, None
+    final = out / f"{kind}_{day:%Y-%m-%d}_{h.hexdigest()[:12]}.{ext}.gz"
+    os.replace(tmp, final)
+    return n, final
+
+def archive_day(day: datetime) -> dict:
+    """Archive and drop one day; returns the row counts and files."""
+    with engine.connect() as conn:
+        tel, tel_file = write_archive(conn, "telemetry", day)
+        evt, evt_file = write_archive(conn, "events", day)
+    with engine.begin() as conn:
+        conn.execute(text("EXEC dbo.sp_DropRawDay @Day=:d, @TelemetryRows=:t, @EventRows=:e"),
+                     {"d": day, "t": tel, "e": evt})
+    return {"day": f"{day:%Y-%m-%d}", "telemetry": tel, "events": evt,
+            "files": [str(f) for f in (tel_file, evt_file) if f]}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Archive and drop raw telemetry/events older than the retention")
+    ap.add_argument("--retention-days", type=int, default=RAW_RETENTION_DAYS,
+                    help="whole days of raw rows to keep before today (UTC)")
+    ap.add_argument("--max-days", type=int, default=31, help="archive at most this many days per run (oldest first)")
+    ap.add_argument("--dry-run", action="store_true", help="list the days that would be archived")
+    args = ap.parse_args(argv)
+    if args.retention_days < 1:
+        ap.error("--retention-days must be at least 1")
+
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    cutoff = today - timedelta(days=args.retention_days)
+
+    with engine.begin() as conn:
+        if not args.dry_run:
+            conn.execute(text("EXEC dbo.sp_EnsureTelemetryPartitions @Through=:t"),
+                         {"t": today + timedelta(days=LIFECYCLE_AHEAD_DAYS)})
+        days = expired_days(conn, cutoff)
+
+    print(f"[LIFECYCLE] {len(days)} days before {cutoff:%Y-%m-%d} to archive")
+    if args.dry_run:
+        for day in days:
+            print(f"[LIFECYCLE]   {day:%Y-%m-%d}")
+        return
+
+    failed = 0
+    for day in days[:args.max_days]:
+        started = time.perf_counter()
+        try:
+            res = archive_day(day)
+        except Exception as e:
+            # e.g. rows arrived for the day meanwhile: it is picked up again next run
+            failed += 1
+            print(f"[LIFECYCLE] {day:%Y-%m-%d} failed: {e}", file=sys.stderr)
+            continue
+        print(f"[LIFECYCLE] {res['day']}: archived {res['telemetry']} telemetry + {res['events']} events rows "
+              f"in {time.perf_counter() - started:.2f}s -> {', '.join(res['files']) or '-'}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
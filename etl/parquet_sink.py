@@ -0,0 +1,101 @@
+# etl/parquet_sink.py
+# Optional columnar copy of every ingested chunk for the analytics engine
+# (backend/analytics.py). Set PARQUET_DIR to enable; requires pyarrow.
+#
+# Layout (hive partitions, read with hive_partitioning):
+#   <PARQUET_DIR>/<kind>/day=YYYY-MM-DD/machine=<k>/part-<hash>.parquet
+# where k is MachineId % PARQUET_MACHINE_BUCKETS, or the MachineId itself when
+# PARQUET_MACHINE_BUCKETS=0. One directory per machine gives the best pruning
+# but, at thousands of machines, a file per machine per chunk; buckets keep
+# files large. Part names are a hash of all of the part's rows, so a chunk
+# written again after a failed commit replaces its file instead of duplicating
+# it. Only the rows the database inserted are written (not duplicates it skipped).
+# `python etl/ingest_logs.py --compact-parquet` merges each partition's parts.
+import hashlib, os, uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+PARQUET_DIR = os.getenv("PARQUET_DIR")
+PARQUET_MACHINE_BUCKETS = int(os.getenv("PARQUET_MACHINE_BUCKETS", "16"))
+# backfill a new PARQUET_DIR from files already in the database (run with a fresh state dir):
+# copy every parsed row, not only those inserted now
+PARQUET_BACKFILL = os.getenv("PARQUET_BACKFILL", "").lower() in ("1", "true")
+
+# columns per kind: (parquet name, row key, arrow type name)
+COLUMNS = {
+    "events": [("MachineId", "mid", "int32"), ("MachineName", "name", "string"), ("Ts", "ts", "timestamp"),
+               ("Type", "typ", "string"), ("Code", "code", "string"), ("Message", "msg", "string")],
+    "telemetry": [("MachineId", "mid", "int32"), ("MachineName", "name", "string"), ("Ts", "ts", "timestamp"),
+                  ("Temperature", "t", "float64"), ("Vibration", "v", "float64"), ("Throughput", "th", "int32")],
+}
+
+def enabled() -> bool:
+    return bool(PARQUET_DIR)
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("PARQUET_DIR requires pyarrow (pip install pyarrow)")
+    return pa, pq
+
+def _schema(pa, kind):
+    types = {"int32": pa.int32(), "string": pa.string(), "float64": pa.float64(), "timestamp": pa.timestamp("us")}
+    return pa.schema([(name, types[t]) for name, _, t in COLUMNS[kind]])
+
+def partition(mid: int) -> int:
+    return mid % PARQUET_MACHINE_BUCKETS if PARQUET_MACHINE_BUCKETS > 0 else mid
+
+def utc_naive(ts: str) -> datetime:
+    dt = datetime.fromisoformat(ts)
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+def write_chunk(kind: str, rows) -> int:
+    """Write one chunk's inserted rows (dicts with mid/name/ts/...) as one part per partition; returns files written."""
+    pa, pq = _arrow()
+    schema = _schema(pa, kind)
+    parts = defaultdict(list)
+    for r in rows:
+        ts = utc_naive(r["ts"])
+        parts[(ts.strftime("%Y-%m-%d"), partition(r["mid"]))].append((r, ts))
+
+    root = Path(PARQUET_DIR) / kind
+    for (day, part), items in parts.items():
+        items.sort(key=lambda x: (x[0]["mid"], x[1]))
+        cols = [[ts if key == "ts" else r.get(key) for r, ts in items] for _, key, _ in COLUMNS[kind]]
+        table = pa.table([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema)
+
+        # every value of every row: chunks that differ in any row never share a name
+        h = hashlib.sha1()
+        for r, ts in items:
+            h.update(repr(tuple(ts if key == "ts" else r.get(key) for _, key, _ in COLUMNS[kind])).encode())
+        out = root / f"day={day}" / f"machine={part}"
+        out.mkdir(parents=True, exist_ok=True)
+        final = out / f"part-{h.hexdigest()[:16]}.parquet"
+        # write under a temp name so readers never see a half-written file
+        tmp = out / f".{final.name}.{uuid.uuid4().hex}.tmp"
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, final)
+    return len(parts)
+
+def compact(kind: str) -> int:
+    """Merge every partition's parts into one file sorted by (MachineId, Ts); returns partitions merged."""
+    pa, pq = _arrow()
+    root = Path(PARQUET_DIR) / kind
+    merged = 0
+    for out in sorted(p for p in root.glob("day=*/machine=*") if p.is_dir()):
+        files = sorted(out.glob("part-*.parquet"))
+        if len(files) < 2:
+            continue
+        table = pa.concat_tables([pq.read_table(f, schema=_schema(pa, kind)) for f in files])
+        table = table.sort_by([("MachineId", "ascending"), ("Ts", "ascending")])
+        final = out / f"part-c{uuid.uuid4().hex[:15]}.parquet"
+        tmp = out / f".{final.name}.tmp"
+        pq.write_table(table, tmp, compression="zstd", row_group_size=1 << 20)
+        os.replace(tmp, final)
+        for f in files:
+            f.unlink()
+        merged += 1
+    return merged
@@ -0,0 +1,139 @@
+# etl/readers.py
+# Streaming readers: rows come out one at a time from a binary file and the
+# cursor tracks the byte offset just past the last record handed out, so
+# memory never depends on the file size and a run can resume mid-file.
+import codecs, csv, json
+
+CHUNK_SIZE = 64 * 1024
+# A single JSON item larger than this is treated as a malformed file
+MAX_ITEM_BYTES = 16 * 1024 * 1024
+
+WHITESPACE = b" \t\r\n"
+
+class Cursor:
+    """Position after the last record read: byte offset + record index."""
+
+    def __init__(self, offset: int = 0, records: int = 0):
+        self.offset = offset
+        self.records = records
+
+    def advance(self, offset: int):
+        self.offset = offset
+        self.records += 1
+
+def iter_lines(f, start: int, tail: bool = False):
+    # (decoded line, byte offset after it); offsets come from the raw bytes, not tell().
+    # tail=True: a last line without newline may still be being written, leave it for later
+    f.seek(start)
+    pos = start
+    for line in f:
+        if tail and not line.endswith(b"\n"):
+            return
+        pos += len(line)
+        yield line.decode("utf-8"), pos
+
+def iter_csv_rows(f, cursor: Cursor, tail: bool = False):
+    header = f.readline()
+    if not header or (tail and not header.endswith(b"\n")):
+        return
+    fields = next(csv.reader([header.decode("utf-8-sig")]))
+    pos = max(cursor.offset, len(header))
+
+    def lines():
+        nonlocal pos
+        for line, pos in iter_lines(f, pos, tail):
+            yield line
+
+    for row in csv.reader(lines()):
+        if not row:
+            continue
+        cursor.advance(pos)
+        yield dict(zip(fields, row))
+    cursor.offset = pos
+
+def json_array_start(f):
+    """Byte offset just past the opening '[', or None for JSON Lines."""
+    f.seek(0)
+    pos = 0
+    while True:
+        chunk = f.read(4096)
+        if not chunk:
+            return None
+        stripped = chunk.lstrip(WHITESPACE + codecs.BOM_UTF8)
+        if stripped:
+            return pos + len(chunk) - len(stripped) + 1 if stripped[:1] == b"[" else None
+        pos += len(chunk)
+
+def iter_json_items(f, cursor: Cursor, tail: bool = False):
+    """Yield items of a JSON array, or of a JSON Lines stream, without loading the file.
+
+    With tail=True an incomplete end (item or array still being written) ends the
+    iteration instead of raising; the cursor stays on the last complete item.
+    """
+    start = json_array_start(f)
+    if start is None:
+        yield from iter_json_lines(f, cursor, tail)
+        return
+    start = max(start, cursor.offset)
+    f.seek(start)
+
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, eof = "", 0, False
+    offset = start  # byte offset of buf[pos]
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+    def skip(chars):
+        # chars are all ASCII, so one char is one byte
+        nonlocal pos, offset
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+                offset += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buf):
+            if tail:
+                return
+            raise ValueError("Unterminated JSON array")
+        if buf[pos] == "]":
+            # the cursor stays on the last item so items appended before ']' are picked up
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof and tail:
+                return
+            if eof or len(buf) - pos > MAX_ITEM_BYTES:
+                raise
+            fill()
+            continue
+        if end == len(buf) and not eof:
+            # a scalar could continue in the next chunk; decode again with more input
+            fill()
+            continue
+        offset += len(buf[pos:end].encode("utf-8"))
+        cursor.advance(offset)
+        pos = end
+        yield item
+
+def iter_json_lines(f, cursor: Cursor, tail: bool = False):
+    pos = cursor.offset
+    for line, pos in iter_lines(f, cursor.offset, tail):
+        line = line.strip().lstrip("\ufeff")
+        if not line:
+            continue
+        cursor.advance(pos)
+        yield json.loads(line)
+    cursor.offset = pos
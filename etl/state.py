@@ -0,0 +1,128 @@
+# etl/state.py
+# Incremental ingest state (SQLite): per input file we keep the size/mtime seen
+# at the last commit, the byte offset + record index committed so far, and a
+# fingerprint of the bytes before that offset. A file that only grew resumes
+# from its offset; a file whose prefix changed is ingested again from the start.
+import hashlib, os, sqlite3, time
+from pathlib import Path
+
+# Fingerprint = sha256 of the first and the last WINDOW bytes before the offset,
+# so checking a prefix never means re-reading the whole file
+WINDOW = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name        TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    offset      INTEGER NOT NULL,
+    records     INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    complete    INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS flushes (
+    committed_at REAL NOT NULL,
+    rows         INTEGER NOT NULL,
+    lag_s        REAL NOT NULL
+);
+"""
+
+# Watch-mode flush history kept for lag stats
+FLUSH_HISTORY = 1000
+
+def prefix_fingerprint(fp: Path, offset: int) -> str:
+    h = hashlib.sha256(str(offset).encode())
+    with fp.open("rb") as f:
+        h.update(f.read(min(offset, WINDOW)))
+        tail = max(WINDOW, offset - WINDOW)
+        if tail < offset:
+            f.seek(tail)
+            h.update(f.read(offset - tail))
+    return h.hexdigest()
+
+class StateStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # one connection per process: worker processes must not reuse the parent's
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, name: str):
+        return self.conn.execute("SELECT * FROM files WHERE name = ?", (name,)).fetchone()
+
+    def resume_point(self, fp: Path):
+        """(offset, records) to continue from, or None when the file is fully ingested."""
+        st = fp.stat()
+        row = self.get(fp.name)
+        if row is None:
+            return 0, 0
+        if row["complete"] and row["size"] == st.st_size and row["mtime_ns"] == st.st_mtime_ns:
+            return None
+        if row["offset"] <= st.st_size and prefix_fingerprint(fp, row["offset"]) == row["fingerprint"]:
+            return row["offset"], row["records"]
+        print(f"[ETL] Prefix changed, re-reading from the start: {fp.name}")
+        return 0, 0
+
+    def commit(self, fp: Path, offset: int, records: int, complete: bool = False):
+        st = fp.stat()
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO files (name, size, mtime_ns, offset, records, fingerprint, complete, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    size=excluded.size, mtime_ns=excluded.mtime_ns, offset=excluded.offset,
+                    records=excluded.records, fingerprint=excluded.fingerprint,
+                    complete=excluded.complete, updated_at=excluded.updated_at
+                """,
+                (fp.name, st.st_size, st.st_mtime_ns, offset, records,
+                 prefix_fingerprint(fp, offset), int(complete), time.time()),
+            )
+
+    def record_flush(self, rows: int, lag_s: float, committed_at: float):
+        with self.conn:
+            self.conn.execute("INSERT INTO flushes VALUES (?, ?, ?)", (committed_at, rows, lag_s))
+            self.conn.execute(
+                "DELETE FROM flushes WHERE rowid <= (SELECT MAX(rowid) FROM flushes) - ?", (FLUSH_HISTORY,)
+            )
+
+    def lag_stats(self) -> dict:
+        lags = [r[0] for r in self.conn.execute("SELECT lag_s FROM flushes ORDER BY lag_s")]
+        last = self.conn.execute("SELECT * FROM flushes ORDER BY rowid DESC LIMIT 1").fetchone()
+        if not lags:
+            return {"flushes": 0}
+        return {
+            "flushes": len(lags),
+            "last_commit_at": last["committed_at"],
+            "last_rows": last["rows"],
+            "last_lag_s": round(last["lag_s"], 3),
+            "p50_lag_s": round(lags[len(lags) // 2], 3),
+            "p95_lag_s": round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 3),
+            "max_lag_s": round(lags[-1], 3),
+        }
+
+    def import_legacy(self, fp: Path, state_dir: Path):
+        # one-time migration of the old "<file>.sha256" markers: a file whose
+        # full-content hash still matches is recorded as completely ingested
+        legacy = state_dir / (fp.name + ".sha256")
+        if not legacy.exists() or self.get(fp.name) is not None:
+            return
+        digest = legacy.read_text().split("\n")[0].strip()
+        h = hashlib.sha256()
+        with fp.open("rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        if h.hexdigest() == digest:
+            size = fp.stat().st_size
+            self.commit(fp, size, 0, complete=True)
@@ -1,23 +1,46 @@
+import { useState } from "react";
 import { getToken } from "../lib/auth";
 
+const BASE = import.meta.env.VITE_API_BASE || "http://127.0.0.1:5000";
+
 export default function DownloadReportButton() {
+  const [busy, setBusy] = useState(false);
+
   const onClick = async () => {
     const token = getToken();
     if (!token) { alert("Please login as Admin to download."); return; }
+    const headers = { Authorization: `Bearer ${token}` };
+
+    setBusy(true);
+    try {
+      // submit (or reuse) the report job, then long-poll until it is built
+      let r = await fetch(`${BASE}/reports?format=xlsx`, { method: "POST", headers });
+      if (!r.ok) throw new Error("submit failed");
+      let job = await r.json();
+      while (job.status === "queued" || job.status === "running") {
+        r = await fetch(`${BASE}${job.statusUrl}?wait=30`, { headers });
+        if (!r.ok) throw new Error("status failed");
+        job = await r.json();
+      }
+      if (job.status !== "done") throw new Error(job.error || "report failed");
 
-    const url = `${import.meta.env.VITE_API_BASE || "http://127.0.0.1:5000"}/reports/latest`;
-    const r = await fetch(url, { headers: { Authorization: `Bearer ${token}` } });
-    if (!r.ok) { alert("Download failed"); return; }
-    const blob = await r.blob();
-    const a = document.createElement("a");
-    a.href = URL.createObjectURL(blob);
-    a.download = "kpi_report.xlsx";
-    a.click();
-    URL.revokeObjectURL(a.href);
+      r = await fetch(`${BASE}${job.downloadUrl}`, { headers });
+      if (!r.ok) throw new Error("download failed");
+      const blob = await r.blob();
+      const a = document.createElement("a");
+      a.href = URL.createObjectURL(blob);
+      a.download = job.file || "kpi_report.xlsx";
+      a.click();
+      URL.revokeObjectURL(a.href);
+    } catch (e) {
+      alert(`Download failed: ${e.message}`);
+    } finally {
+      setBusy(false);
+    }
   };
   return (
-    <button onClick={onClick} style={{ padding: "6px 10px", borderRadius: 8, width: "auto" }}>
-      Download KPI Report (.xlsx)
+    <button onClick={onClick} disabled={busy} style={{ padding: "6px 10px", borderRadius: 8, width: "auto" }}>
+      {busy ? "Building report…" : "Download KPI Report (.xlsx)"}
     </button>
   );
 }
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { getLatestLogs } from "../lib/api";
+import { getDashboard, getLatestLogs, subscribeLogs } from "../lib/api";
 import { Bar } from "react-chartjs-2";
 import {
   Chart as ChartJS,
@@ -12,38 +12,61 @@ import {
 
 ChartJS.register(BarElement, CategoryScale, LinearScale, Tooltip, Legend);
 
+function toChartData(counts) {
+  return {
+    labels: Array.from(counts.keys()).map(k => k.split(":")[1]),
+    datasets: [
+      {
+        label: "Errors (recent)",
+        data: Array.from(counts.values()).map(v => Number(v) || 0),
+      },
+    ],
+  };
+}
+
+function countError(counts, l) {
+  if (String(l?.type ?? "").toUpperCase() !== "ERROR") return;
+  const machineId = Number(l?.machineId ?? NaN);
+  const machineName = String(l?.machineName ?? `Machine ${machineId || "?"}`);
+  const key = `${machineId}:${machineName}`;
+  counts.set(key, (counts.get(key) || 0) + 1);
+}
+
 export default function ErrorsBarChart() {
   const [chartData, setChartData] = useState(null);
   const [err, setErr] = useState("");
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
+    // Count ERRORs by machine safely; initial snapshot, then live updates
+    const counts = new Map();
+    let unsubscribe = null;
+    let cancelled = false;
     (async () => {
       try {
         setLoading(true);
-        const logs = await getLatestLogs({ top: 200 });
+        const { latestLogs: logs } = await getDashboard();
+        for (const l of logs) countError(counts, l);
+        if (cancelled) return;
+        setChartData(toChartData(counts));
 
-        // Count ERRORs by machine safely
-        const counts = new Map();
-        for (const l of logs) {
-          if (String(l?.type ?? "").toUpperCase() !== "ERROR") continue;
-          const machineId = Number(l?.machineId ?? NaN);
-          const machineName = String(l?.machineName ?? `Machine ${machineId || "?"}`);
-          const key = `${machineId}:${machineName}`;
-          counts.set(key, (counts.get(key) || 0) + 1);
-        }
-
-        const labels = Array.from(counts.keys()).map(k => k.split(":")[1]);
-        const values = Array.from(counts.values()).map(v => Number(v) || 0);
-
-        setChartData({
-          labels,
-          datasets: [
-            {
-              label: "Errors (recent)",
-              data: values,
-            },
-          ],
+        unsubscribe = subscribeLogs({
+          types: ["ERROR"],
+          onLog: (l) => {
+            countError(counts, l);
+            setChartData(toChartData(counts));
+          },
+          // missed too many events while disconnected: start again from a fresh snapshot
+          onReset: async () => {
+            try {
+              const logs = await getLatestLogs({ top: 200 });
+              counts.clear();
+              for (const l of logs) countError(counts, l);
+              if (!cancelled) setChartData(toChartData(counts));
+            } catch (e) {
+              if (!cancelled) setErr(String(e));
+            }
+          },
         });
       } catch (e) {
         setErr(String(e));
@@ -51,6 +74,10 @@ export default function ErrorsBarChart() {
         setLoading(false);
       }
     })();
+    return () => {
+      cancelled = true;
+      if (unsubscribe) unsubscribe();
+    };
   }, []);
 
   if (loading) return <div>Loading error chart…</div>;
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { getKpis } from "../lib/api";
+import { getDashboard } from "../lib/api";
 
 export default function KpiCards() {
   const [kpis, setKpis] = useState([]);
@@ -10,7 +10,7 @@ export default function KpiCards() {
     (async () => {
       try {
         setLoading(true);
-        const data = await getKpis(); // defaults to last 7 days
+        const { kpis: data } = await getDashboard(); // defaults to last 7 days
         setKpis(data);
       } catch (e) {
         setErr(String(e));
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { getMachines, getLogs } from "../lib/api";
+import { getDashboard, getLogs } from "../lib/api";
 
 export default function MachinesTable() {
   const [machines, setMachines] = useState([]);
@@ -12,7 +12,7 @@ export default function MachinesTable() {
   useEffect(() => {
     (async () => {
       try {
-        const data = await getMachines();
+        const { machines: data } = await getDashboard();
         setMachines(data);
       } catch (e) {
         setError(String(e));
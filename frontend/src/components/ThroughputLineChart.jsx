@@ -1,5 +1,5 @@
-import { useEffect, useMemo, useState } from "react";
-import { getThroughput, getMachines } from "../lib/api";
+import { useEffect, useMemo, useRef, useState } from "react";
+import { getThroughput, getDashboard } from "../lib/api";
 import {
   Chart as ChartJS,
   LineElement,
@@ -14,12 +14,13 @@ import { Line } from "react-chartjs-2";
 ChartJS.register(LineElement, CategoryScale, LinearScale, PointElement, Tooltip, Legend);
 
 export default function ThroughputLineChart() {
-  const [bucket, setBucket] = useState("hour");         // "hour" | "day"
+  const [bucket, setBucket] = useState("hour");         // "15m" | "hour" | "day" | "week"
   const [machineId, setMachineId] = useState("");       // "" = all
   const [machines, setMachines] = useState([]);
   const [data, setData] = useState(null);
   const [err, setErr] = useState("");
   const [loading, setLoading] = useState(true);
+  const firstLoad = useRef(true);
   const [collapsed, setCollapsed] = useState(() => {
     // default collapsed on narrow screens
     if (typeof window !== "undefined") return window.innerWidth < 900;
@@ -30,7 +31,7 @@ export default function ThroughputLineChart() {
   useEffect(() => {
     (async () => {
       try {
-        const m = await getMachines();
+        const { machines: m } = await getDashboard();
         setMachines(m);
       } catch (e) {
         console.error(e);
@@ -45,10 +46,15 @@ export default function ThroughputLineChart() {
       try {
         setLoading(true);
         setErr("");
-        const res = await getThroughput({
-          bucket,
-          machineId: machineId ? Number(machineId) : undefined,
-        });
+        // first paint (hour, all machines) comes with the dashboard payload
+        const useDashboard = firstLoad.current && bucket === "hour" && !machineId;
+        firstLoad.current = false;
+        const res = useDashboard
+          ? (await getDashboard()).throughput
+          : await getThroughput({
+              bucket,
+              machineId: machineId ? Number(machineId) : undefined,
+            });
         const labels = res.points.map(p => new Date(p.ts).toLocaleString());
         const values = res.points.map(p => Number(p.throughput) || 0);
 
@@ -83,8 +89,10 @@ export default function ThroughputLineChart() {
         <div style={{ display: "flex", gap: 8 }}>
           {/* Bucket toggle */}
           <select value={bucket} onChange={e => setBucket(e.target.value)} disabled={collapsed}>
+            <option value="15m">Per 15 min</option>
             <option value="hour">Per hour</option>
             <option value="day">Per day</option>
+            <option value="week">Per week</option>
           </select>
 
           {/* Machine filter */}
@@ -22,6 +22,22 @@ export async function login(username, password) {
   });
 }
 
+// Everything the dashboard needs on first paint, in one request (the API runs the reads concurrently).
+// Components share one in-flight request per page load.
+let dashboardPromise = null;
+export function getDashboard() {
+  if (!dashboardPromise) {
+    const url = new URL(`${BASE}/dashboard`);
+    url.searchParams.set("top", "200");
+    dashboardPromise = fetch(url).then((res) => {
+      if (!res.ok) throw new Error("Failed to fetch dashboard");
+      return res.json();
+    });
+    dashboardPromise.catch(() => { dashboardPromise = null; });
+  }
+  return dashboardPromise;
+}
+
 // Fetch list of machines
 export async function getMachines() {
   const res = await fetch(`${BASE}/machines`);
@@ -29,9 +45,12 @@ export async function getMachines() {
   return res.json();
 }
 
-// Fetch logs for one machine
-export async function getLogs(machineId) {
-  const res = await fetch(`${BASE}/logs/${machineId}`);
+// Fetch logs for one machine (newest first; pass nextBefore from the previous page for older rows)
+export async function getLogs(machineId, { limit, before } = {}) {
+  const url = new URL(`${BASE}/logs/${machineId}`);
+  if (limit) url.searchParams.set("limit", String(limit));
+  if (before) url.searchParams.set("before", before);
+  const res = await fetch(url);
   if (!res.ok) throw new Error("Failed to fetch logs");
   return res.json();
 }
@@ -45,6 +64,75 @@ export async function getLatestLogs({ top = 50, machineId } = {}) {
   return res.json();
 }
 
+// Live feed of new events (server-sent events). Returns a function that closes the stream.
+// EventSource reconnects on its own and resumes from the last event id it saw; onReset means
+// more events were missed than the server replays, so reload the view. While the stream is
+// refused (503: the worker's live streams are all taken) new events come from polling
+// /sp/latest-logs, and the stream is tried again every so often, resuming from the last id seen.
+const LIVE_POLL_MS = 5000;
+const LIVE_RETRY_MS = 30000;
+
+export function subscribeLogs({ machineIds, types, onLog, onReset, onError } = {}) {
+  const url = new URL(`${BASE}/live/events`);
+  if (machineIds?.length) url.searchParams.set("machineId", machineIds.join(","));
+  if (types?.length) url.searchParams.set("type", types.join(","));
+  const ids = machineIds?.map(Number);
+  const kinds = types?.map((t) => String(t).toUpperCase());
+  const wants = (ev) => (!ids?.length || ids.includes(ev.machineId))
+    && (!kinds?.length || kinds.includes(String(ev.type).toUpperCase()));
+  let es = null;
+  let lastId = null;
+  let poll = null;
+  let retry = null;
+  let closed = false;
+
+  const deliver = (ev) => {
+    if (lastId !== null && ev.id <= lastId) return;
+    lastId = ev.id;
+    onLog?.(ev);
+  };
+
+  const pollOnce = async () => {
+    try {
+      const rows = await getLatestLogs({ top: 200, machineId: ids?.length === 1 ? ids[0] : undefined });
+      const fresh = rows.filter(wants).sort((a, b) => a.id - b.id);
+      if (lastId === null) {
+        // nothing seen yet: start from what the view already loaded
+        lastId = fresh.length ? fresh[fresh.length - 1].id : 0;
+      } else {
+        fresh.forEach(deliver);
+      }
+    } catch (e) {
+      onError?.(e);
+    }
+    if (!closed && poll !== null) poll = setTimeout(pollOnce, LIVE_POLL_MS);
+  };
+
+  const open = () => {
+    if (lastId) url.searchParams.set("lastEventId", String(lastId));
+    es = new EventSource(url);
+    es.onopen = () => {
+      clearTimeout(poll);
+      poll = null;
+    };
+    es.addEventListener("log", (e) => deliver(JSON.parse(e.data)));
+    es.addEventListener("reset", (e) => onReset?.(JSON.parse(e.data)));
+    es.onerror = (e) => {
+      onError?.(e);
+      if (closed || es.readyState !== EventSource.CLOSED) return;
+      if (poll === null) poll = setTimeout(pollOnce, 0);
+      retry = setTimeout(open, LIVE_RETRY_MS);
+    };
+  };
+  open();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    clearTimeout(poll);
+    es.close();
+  };
+}
+
 export async function getKpis({ fromISO, toISO} = {}) {
   const url = new URL(`${BASE}/sp/kpis`);
   if (fromISO) url.searchParams.set("from", fromISO);
@@ -54,12 +142,16 @@ export async function getKpis({ fromISO, toISO} = {}) {
   return res.json();
 }
 
-export async function getThroughput({ fromISO, toISO, bucket = "hour", machineId } = {}) {
+// bucket: 1m | 5m | 15m | hour | day | week; machineIds ("all" or ids) returns one series per machine;
+// the server downsamples each series to maxPoints (LTTB) so the chart payload stays small
+export async function getThroughput({ fromISO, toISO, bucket = "hour", machineId, machineIds, maxPoints = 1000 } = {}) {
   const url = new URL(`${BASE}/metrics/throughput`);
   if (fromISO) url.searchParams.set("from", fromISO);
   if (toISO) url.searchParams.set("to", toISO);
   if (bucket) url.searchParams.set("bucket", bucket);
   if (machineId) url.searchParams.set("machineId", String(machineId));
+  if (machineIds) url.searchParams.set("machineIds", Array.isArray(machineIds) ? machineIds.join(",") : machineIds);
+  if (maxPoints) url.searchParams.set("maxPoints", String(maxPoints));
   const headers = new Headers();
   const t = getToken(); if (t) headers["Authorization"] = `Bearer ${t}`;
   const r = await fetch(url, { headers });